@@ -0,0 +1,269 @@
+"""Time hot write/read paths against a synthetic data set.
+
+    python benchmark.py fanout --sweep 1000,10000,100000,1000000  # question-create p50/p99
+    python benchmark.py search --questions 50000  # ILIKE vs full-text search
+    python benchmark.py related --questions 1000   # related-questions refresh/rebuild
+
+Runs against a throwaway SQLite file unless --database-url is given. Never
+point it at a database you care about: it creates and drops tables.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def timed(label, fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:40} {best:10.1f} ms  ({result})')
+    return best
+
+
+def seed_users(count, start=0):
+    from sqlalchemy import insert
+    from models import db, User
+
+    now = datetime.utcnow()
+    rows = [{'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password': 'x', 'created_at': now}
+            for i in range(start, start + count)]
+    for i in range(0, count, 5000):
+        db.session.execute(insert(User), rows[i:i + 5000])
+    db.session.commit()
+
+
+WORDS = ('flask sqlalchemy react hooks python django query index cursor docker deploy '
+         'render migration alembic token session cookie cache redis worker thread async '
+         'pandas numpy router state props css grid layout test mock fixture').split()
+
+
+def seed_questions(count):
+    from sqlalchemy import insert
+    from models import db, Category, Question, User
+
+    rng = random.Random(42)
+    category = Category(category_name='Bench', created_by='bench')
+    user = User(username='bench-author', email='bench-author@example.com', password='x')
+    db.session.add_all([category, user])
+    db.session.commit()
+    now = datetime.utcnow()
+
+    def text(words):
+        # Mostly common words, plus a long tail of rarer ones like real titles have
+        return ' '.join(rng.choice(WORDS) if rng.random() < 0.8 else f'term{rng.randrange(5000)}'
+                        for _ in range(words))
+
+    rows = [{'title': text(6), 'description': text(40), 'category_id': category.id, 'user_id': user.id,
+             'language': 'Python', 'created_at': now} for _ in range(count)]
+    for i in range(0, count, 5000):
+        db.session.execute(insert(Question), rows[i:i + 5000])
+    db.session.commit()
+
+
+def bench_search(app, args):
+    from models import db, Question
+    from views.pagination_utils import DEFAULT_LIMIT
+    from views.search_utils import apply_search, question_index, top_ranked
+
+    seed_questions(args.questions)
+    terms = args.terms
+
+    def ilike():
+        # What GET /api/questions?search= did before: a substring scan, no ranking
+        query = Question.query.filter(
+            Question.title.ilike(f'%{terms}%') | Question.description.ilike(f'%{terms}%')
+        ).order_by(Question.created_at.desc(), Question.id.desc())
+        return f'{len(query.limit(DEFAULT_LIMIT + 1).all())} rows'
+
+    def full_text_page():
+        # One page, as GET /api/questions?search=&limit= serves it
+        query, scores = apply_search(Question.query, terms)
+        if scores is None:
+            return f'{len(query.limit(DEFAULT_LIMIT + 1).all())} rows'
+        return f'{len(top_ranked(query, scores, DEFAULT_LIMIT + 1))} rows of {len(scores)} hits'
+
+    def full_text_all():
+        query, scores = apply_search(Question.query, terms)
+        questions = query.all() if scores is None else top_ranked(query, scores)
+        return f'{len(questions)} rows'
+
+    def cold_index():
+        question_index.loaded_at = None
+        question_index.load()
+        return f'{len(question_index.doc_terms)} questions'
+
+    print(f'Search {args.questions} questions for "{terms}" on {db.engine.dialect.name}')
+    timed('ILIKE substring scan, one page', ilike)
+    if db.engine.dialect.name != 'postgresql':
+        timed('build in-process index', cold_index, repeat=1)
+    timed('full-text search, one page', full_text_page)
+    timed('full-text search, every match', full_text_all)
+
+
+def bench_related(app, args):
+    from models import db, Question
+    from views import related_utils
+    from views.related_utils import rebuild_related, refresh_related, related_index
+
+    seed_questions(args.questions)
+    related_index.load(force=True)
+    sample = [q.id for q in Question.query.order_by(Question.id).limit(args.sample)]
+
+    def refresh():
+        for question_id in sample:
+            refresh_related(question_id)
+        return f'{len(sample)} questions'
+
+    def rebuild():
+        return f'{rebuild_related()} questions'
+
+    def top_lists():
+        return {question_id: [other for other, _ in related_index.top_k(question_id)] for question_id in sample}
+
+    print(f'Related questions over {args.questions} questions in one category on {db.engine.dialect.name}')
+    timed('refresh_related, candidate-limited', refresh)
+    timed('rebuild_related, candidate-limited', rebuild, repeat=1)
+    limited = top_lists()
+
+    # Every question shares the category feature, so this scores all of them
+    related_utils.MIN_CANDIDATE_DF = related_utils.MAX_CANDIDATES = 10 ** 9
+    timed('refresh_related, every shared feature', refresh)
+    timed('rebuild_related, every shared feature', rebuild, repeat=1)
+    exhaustive = top_lists()
+
+    # Share of the exhaustive top-k that candidate limiting still finds
+    recalls = [len(set(limited[q]) & set(exhaustive[q])) / len(exhaustive[q]) for q in sample if exhaustive[q]]
+    recall = sum(recalls) / len(recalls) if recalls else 1.0
+    print(f'{"mean recall@" + str(related_utils.TOP_K):40} {recall:10.3f}     ({len(recalls)} questions)')
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(p * len(ordered)) - 1, 0)]
+
+
+def wait_for_tasks(timeout=3600):
+    from views.task_utils import task_queue_depth
+
+    deadline = time.monotonic() + timeout
+    while task_queue_depth() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def bench_fanout(app, args):
+    """p50/p99 of POST /api/questions as the user count grows.
+
+    Every created question broadcasts a notification to all users. With
+    --inline the broadcast runs inside the request, as it did before.
+    Otherwise it runs through submit_task, as in production, and the table
+    also shows how long the queued broadcasts took to drain.
+    """
+    from models import db, Category, Notifications, User
+    from views.auth import generate_jwt
+
+    app.config['TASKS_ALWAYS_EAGER'] = args.inline
+    if db.engine.dialect.name == 'sqlite':
+        # SQLite has one writer: concurrent broadcasts fail with "database is
+        # locked" instead of queueing, so run them one at a time. Use
+        # --database-url with Postgres for production-like numbers.
+        from concurrent.futures import ThreadPoolExecutor
+        from views import task_utils
+        task_utils._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='moringadesk-task')
+    category = Category(category_name='Bench', created_by='bench')
+    db.session.add(category)
+    db.session.commit()
+    category_id = category.id
+
+    mode = 'inline' if args.inline else 'submit_task'
+    print(f'POST /api/questions x {args.requests}, broadcast {mode}, on {db.engine.dialect.name}')
+    print(f'{"users":>10} {"p50 ms":>10} {"p99 ms":>10} {"max ms":>10} {"drain s":>10}')
+
+    seeded = 0
+    client = app.test_client()
+    for users in args.sweep:
+        seed_users(users - seeded, start=seeded)
+        seeded = users
+        asker = User.query.filter_by(username='bench0').one()
+        headers = {'Authorization': f'Bearer {generate_jwt(asker)}'}
+
+        latencies = []
+        for i in range(args.requests):
+            start = time.perf_counter()
+            response = client.post('/api/questions', headers=headers, json={
+                'title': f'Benchmark question {i}', 'description': 'fan-out benchmark',
+                'category_id': category_id, 'language': 'Python'
+            })
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 201, response.get_json()
+
+        drain_started = time.perf_counter()
+        wait_for_tasks()
+        drain = time.perf_counter() - drain_started
+        print(f'{users:>10} {percentile(latencies, 0.5):>10.1f} {percentile(latencies, 0.99):>10.1f} '
+              f'{max(latencies):>10.1f} {drain:>10.1f}')
+
+        # Start every step from empty inboxes
+        Notifications.query.delete()
+        User.query.update({User.unread_notifications: 0})
+        db.session.commit()
+
+
+BENCHMARKS = {
+    'fanout': bench_fanout,
+    'related': bench_related,
+    'search': bench_search,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    parser.add_argument('--sweep', type=lambda v: [int(n) for n in v.split(',')], default=[1000, 10000, 100000, 1000000],
+                        help='user counts for the fanout benchmark')
+    parser.add_argument('--requests', type=int, default=100, help='questions created per step of the sweep')
+    parser.add_argument('--inline', action='store_true', help='fanout: broadcast inside the request')
+    parser.add_argument('--questions', type=int, default=20000)
+    parser.add_argument('--sample', type=int, default=50, help='related: questions refreshed and checked for recall')
+    parser.add_argument('--terms', default='flask cursor', help='search text for the search benchmark')
+    args = parser.parse_args()
+
+    path = None
+    if not args.database_url:
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='moringadesk-bench-')
+        os.close(fd)
+        args.database_url = f'sqlite:///{path}'
+        # WAL lets the request thread read and write while background
+        # fan-outs commit, closer to how Postgres behaves (and persists in the file)
+        import sqlite3
+        sqlite3.connect(path).execute('PRAGMA journal_mode=WAL').close()
+    # Read by db_pool.database_url() when the app is created
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    app.config['TASKS_ALWAYS_EAGER'] = True
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            BENCHMARKS[args.benchmark](app, args)
+            db.session.remove()
+            db.drop_all()
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
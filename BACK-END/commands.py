@@ -0,0 +1,55 @@
+import click
+from views.analytics_utils import LOOKBACK_DAYS, rollup_stats
+from views.email_utils import run_outbox_worker
+from views.moderation_utils import reconcile_report_summaries
+from views.notify_utils import reconcile_unread_counts
+from views.ranking_utils import recompute_rankings
+from views.related_utils import TOP_K, rebuild_related
+from views.reputation_utils import recompute_user_stats
+from views.vote_utils import recompute_vote_tallies
+
+def register_commands(app):
+    @app.cli.command('mail-worker')
+    @click.option('--once', is_flag=True, help='Drain the outbox and exit.')
+    def mail_worker(once):
+        """Send queued mail from the outbox."""
+        run_outbox_worker(app, once=once)
+
+    @app.cli.command('rollup-stats')
+    @click.option('--full', is_flag=True, help='Rebuild every day from scratch.')
+    @click.option('--lookback', default=LOOKBACK_DAYS, show_default=True, help='Already rolled-up days to re-scan.')
+    def rollup_stats_command(full, lookback):
+        """Refresh the daily rollups behind /api/admin/stats. Run it from cron."""
+        click.echo(f'Rolled up {rollup_stats(full=full, lookback=lookback)} day(s)')
+
+    @app.cli.command('reconcile-unread')
+    def reconcile_unread():
+        """Repair drifted unread-notification counters."""
+        click.echo(f'Repaired {reconcile_unread_counts()} user(s)')
+
+    @app.cli.command('reconcile-reports')
+    def reconcile_reports():
+        """Repair drifted report summaries and per-reason counts."""
+        click.echo(f'Repaired {reconcile_report_summaries()} question(s)')
+
+    @app.cli.command('recompute-vote-tallies')
+    def recompute_vote_tallies_command():
+        """Recount answer votes and scores. Run before recompute-rankings and recompute-user-stats."""
+        click.echo(f'Recounted votes on {recompute_vote_tallies()} answer(s)')
+
+    @app.cli.command('recompute-rankings')
+    def recompute_rankings_command():
+        """Recount question activity and refresh hot scores."""
+        click.echo(f'Re-scored {recompute_rankings()} question(s)')
+
+    @app.cli.command('recompute-user-stats')
+    def recompute_user_stats_command():
+        """Rebuild user_stats (reputation and leaderboard) from scratch."""
+        click.echo(f'Rebuilt stats for {recompute_user_stats()} user(s)')
+
+    @app.cli.command('rebuild-related')
+    @click.option('--top-k', default=TOP_K, show_default=True, help='Related questions kept per question.')
+    def rebuild_related_command(top_k):
+        """Recompute every question's related-questions list."""
+        total = rebuild_related(top_k, progress=lambda done, total: click.echo(f'{done}/{total}'))
+        click.echo(f'Rebuilt related questions for {total} question(s)')
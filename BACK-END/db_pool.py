@@ -0,0 +1,116 @@
+# db_pool.py
+"""Database URL and engine options, read from the environment.
+
+    DATABASE_URL              required; in debug mode (FLASK_DEBUG) falls back
+                              to a local SQLite file, moringadesk.db
+    DB_POOL_SIZE              persistent connections per process (5)
+    DB_MAX_OVERFLOW           extra connections allowed under burst (10)
+    DB_POOL_TIMEOUT           seconds to wait for a free connection (30)
+    DB_POOL_RECYCLE           replace connections older than this, seconds (1800)
+    DB_POOL_PRE_PING          test connections on checkout (true)
+    DB_STATEMENT_TIMEOUT_MS   Postgres statement_timeout, 0 for none (0)
+    DB_PGBOUNCER              behind PgBouncer in transaction mode (false)
+
+With DB_PGBOUNCER the app keeps no pool of its own (PgBouncer is the pool) and
+the statement timeout is set per transaction, since session settings would
+leak between clients. NOTIFICATION_PUBSUB='postgres' needs a session-mode
+connection and does not work through a transaction-mode PgBouncer.
+"""
+import logging
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool, QueuePool
+
+DEBUG_DATABASE_URL = 'sqlite:///moringadesk.db'
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+pool_stats = {'checkouts': 0, 'overflow_checkouts': 0, 'timeouts': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0}
+
+def _flag(name, default):
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', '').strip()
+    if not url:
+        if not _flag('FLASK_DEBUG', False):
+            raise RuntimeError('DATABASE_URL is not set. Point it at the Postgres database, '
+                               'or run with --debug to use a local SQLite file.')
+        logger.warning('DATABASE_URL is not set; using %s for local development', DEBUG_DATABASE_URL)
+        url = DEBUG_DATABASE_URL
+    # Render and Heroku hand out postgres://, which SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait and when overflow kicks in."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            with _lock:
+                pool_stats['timeouts'] += 1
+            raise
+        waited = (time.perf_counter() - start) * 1000
+        with _lock:
+            pool_stats['checkouts'] += 1
+            pool_stats['wait_ms_total'] += waited
+            pool_stats['wait_ms_max'] = max(pool_stats['wait_ms_max'], waited)
+            if self.overflow() > 0:
+                pool_stats['overflow_checkouts'] += 1
+        return conn
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for url, from the DB_* environment variables."""
+    if not url.startswith('postgresql'):
+        # SQLite picks its own pool; only pre-ping applies
+        return {'pool_pre_ping': _flag('DB_POOL_PRE_PING', True)}
+
+    options = {'pool_pre_ping': _flag('DB_POOL_PRE_PING', True)}
+    timeout_ms = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+
+    if _flag('DB_PGBOUNCER', False):
+        options['poolclass'] = NullPool
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    })
+    if timeout_ms:
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return options
+
+def configure_engine(engine):
+    """Engine hooks that can't be expressed as create_engine() options."""
+    timeout_ms = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    if engine.dialect.name == 'postgresql' and _flag('DB_PGBOUNCER', False) and timeout_ms:
+        @event.listens_for(engine, 'begin')
+        def set_statement_timeout(conn):
+            conn.exec_driver_sql(f'SET LOCAL statement_timeout = {timeout_ms}')
+
+def pool_status(engine):
+    """Current pool occupancy plus the counters collected since startup."""
+    pool = engine.pool
+    with _lock:
+        status = dict(pool_stats)
+    status['pool_class'] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    status['wait_ms_avg'] = round(status['wait_ms_total'] / status['checkouts'], 3) if status['checkouts'] else 0.0
+    return status
@@ -0,0 +1,152 @@
+"""Check that hot endpoint queries use indexes.
+
+Runs EXPLAIN for the query behind each hot endpoint and exits non-zero
+if any of them falls back to a sequential scan.
+
+    python explain_check.py               # check the configured database
+    python explain_check.py --seed 200000 # add synthetic rows first
+
+Planners happily seq-scan tiny tables, so run it against a seeded,
+realistically sized database.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from app import create_app
+from models import (
+    db, User, Question, Answers, Category, FollowUp, Votes,
+    QuestionTags, Tags, Reports, Notifications
+)
+
+
+def hot_queries():
+    return {
+        'GET /api/notifications/me': Notifications.query.filter_by(user_id=1)
+            .order_by(Notifications.created_at.desc()).limit(20),
+        'GET /api/notifications/me?is_read=false': Notifications.query.filter_by(user_id=1, is_read=False)
+            .order_by(Notifications.created_at.desc()).limit(20),
+        'GET /api/questions': Question.query
+            .order_by(Question.created_at.desc(), Question.id.desc()).limit(20),
+        'GET /api/questions/is_unsolved': Question.query.filter_by(is_solved=False)
+            .order_by(Question.created_at.desc(), Question.id.desc()).limit(20),
+        'GET /api/questions?category_id&language&solved': Question.query
+            .filter_by(category_id=1, language='Python', is_solved=False)
+            .order_by(Question.created_at.desc()).limit(20),
+        'GET /api/questions/<id>/answers': Answers.query.filter_by(question_id=1),
+        'POST /api/followups (contributors)': FollowUp.query.filter_by(question_id=1),
+        'POST /api/votes': Votes.query.filter_by(user_id=1, answer_id=1),
+        'GET /api/answers/<id> votes': Votes.query.filter_by(answer_id=1),
+        'POST /api/questiontags': QuestionTags.query.filter_by(question_id=1, tag_id=1),
+        'reports for a question': Reports.query.filter_by(question_id=1),
+    }
+
+
+def compile_sql(query):
+    return str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def seq_scans_postgres(sql):
+    plan = db.session.execute(text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    found = []
+    def walk(node):
+        if node.get('Node Type') == 'Seq Scan':
+            found.append(node.get('Relation Name'))
+        for child in node.get('Plans', []):
+            walk(child)
+    walk(plan[0]['Plan'])
+    return found
+
+
+def seq_scans_sqlite(sql):
+    found = []
+    for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)):
+        detail = row[-1]
+        # "SCAN votes" is a full scan; "SCAN questions USING INDEX ..." is not
+        if detail.startswith('SCAN ') and 'USING' not in detail:
+            found.append(detail.replace('TABLE ', '').split()[1])
+    return found
+
+
+def seed(count):
+    """Bulk insert `count` rows into each hot table."""
+    now = datetime.utcnow()
+    category = Category.query.first() or Category(category_name='Seed', created_by='seed')
+    tag = Tags.query.first() or Tags(name='seed')
+    db.session.add_all([category, tag])
+    db.session.commit()
+
+    users = max(count // 100, 10)
+    start_user = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    start_question = (db.session.query(db.func.max(Question.id)).scalar() or 0) + 1
+    start_answer = (db.session.query(db.func.max(Answers.id)).scalar() or 0) + 1
+    user_ids = list(range(start_user, start_user + users))
+
+    def chunks(rows, size=5000):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def bulk(model, rows):
+        for batch in chunks(rows):
+            db.session.execute(insert(model), batch)
+        db.session.commit()
+
+    bulk(User, ({'id': uid, 'username': f'seed{uid}', 'email': f'seed{uid}@example.com',
+                 'password': 'x', 'created_at': now} for uid in user_ids))
+    bulk(Question, ({'id': start_question + i, 'title': f'Seed question {i}', 'description': 'seed',
+                     'category_id': category.id, 'user_id': user_ids[i % users],
+                     'language': ('Python', 'JavaScript', 'SQL')[i % 3], 'is_solved': i % 2 == 0,
+                     'created_at': now - timedelta(seconds=i)} for i in range(count)))
+    bulk(Answers, ({'id': start_answer + i, 'question_id': start_question + i % count, 'content': 'seed',
+                    'user_id': user_ids[(i + 1) % users], 'created_at': now} for i in range(count)))
+    bulk(FollowUp, ({'question_id': start_question + i % count, 'answer_id': start_answer + i,
+                     'user_id': user_ids[i % users], 'content': 'seed', 'created_at': now} for i in range(count)))
+    bulk(Votes, ({'user_id': user_ids[i % users], 'answer_id': start_answer + i, 'vote_type': 'up'}
+                 for i in range(count)))
+    bulk(QuestionTags, ({'question_id': start_question + i, 'tag_id': tag.id} for i in range(count)))
+    bulk(Reports, ({'user_id': user_ids[i % users], 'category_id': category.id,
+                    'question_id': start_question + i, 'reason': 'seed', 'created_at': now}
+                   for i in range(count)))
+    bulk(Notifications, ({'user_id': user_ids[i % users], 'type': 'seed', 'message': 'seed',
+                          'is_read': i % 3 == 0, 'created_at': now - timedelta(seconds=i)}
+                         for i in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0, help='insert this many synthetic rows per table first')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.seed:
+            seed(args.seed)
+
+        postgres = db.engine.dialect.name == 'postgresql'
+        db.session.execute(text('ANALYZE'))
+        check = seq_scans_postgres if postgres else seq_scans_sqlite
+
+        failures = 0
+        for endpoint, query in hot_queries().items():
+            tables = check(compile_sql(query))
+            status = 'SEQ SCAN on ' + ', '.join(tables) if tables else 'ok'
+            failures += bool(tables)
+            print(f'{endpoint:50} {status}')
+
+    if failures:
+        print(f'\n{failures} quer{"y" if failures == 1 else "ies"} regressed to a sequential scan')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
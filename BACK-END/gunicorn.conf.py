@@ -0,0 +1,37 @@
+# gunicorn.conf.py
+# Picked up automatically when gunicorn is started from this directory.
+import os
+import shutil
+import tempfile
+
+from prometheus_client import multiprocess
+
+# Workers share metric samples through this directory (see metrics.py). It
+# must exist before the app is imported, and start out empty on every boot.
+# Done here rather than in on_starting: with --preload the master imports the
+# app before that hook runs.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'moringadesk-metrics'))
+shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+# Notification streams (GET /api/notifications/stream) hold their connection
+# open for as long as the browser tab is. With the default sync worker each
+# one would pin a whole worker process, so use threads: every open stream
+# takes one of a worker's GUNICORN_THREADS threads, and the rest keep serving
+# requests. For thousands of concurrent streams, switch to an async worker
+# (GUNICORN_WORKER_CLASS=gevent, with gevent installed).
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+
+def on_starting(server):
+    # -w on the command line bypasses WEB_CONCURRENCY, which the app checks itself
+    from views.pubsub_utils import check_transport
+    check_transport(os.environ.get('NOTIFICATION_PUBSUB', 'memory'), server.cfg.workers)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (pool connections, queue depth, streams)
+    multiprocess.mark_process_dead(worker.pid)
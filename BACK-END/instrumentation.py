@@ -0,0 +1,163 @@
+# instrumentation.py
+"""Per-request wall time, DB time and SQL statement counts.
+
+Every response carries a Server-Timing header, e.g.
+    Server-Timing: app;dur=41.2, db;dur=12.9;desc="7 queries"
+and each endpoint and blueprint keeps rolling latency histograms, read by
+GET /api/admin/timings. Other sinks (e.g. metrics.py) can subscribe with
+add_observer(app, fn).
+
+N+1 detection: with N_PLUS_ONE_THRESHOLD set (on by default in debug mode),
+a request that runs the same statement more than that many times logs a
+warning with the statement.
+
+Timing state lives in the WSGI environ rather than flask.g, because batched
+sub-requests share the outer request's app context.
+"""
+import threading
+import time
+from collections import deque
+from flask import request, has_request_context
+from sqlalchemy import event
+
+ENVIRON_KEY = 'moringadesk.instrumentation'
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+WINDOW_SECONDS = 60
+WINDOWS = 15  # histograms cover the last 15 minutes
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+
+def add_observer(app, fn):
+    """Call fn(endpoint, blueprint, method, status, wall_ms, db_ms, queries) after every request to app."""
+    app.extensions.setdefault('instrumentation_observers', []).append(fn)
+
+class RollingHistogram:
+    """Bucketed latencies over a sliding window of fixed-size time slices."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slices = deque(maxlen=WINDOWS)
+
+    def _current(self, now):
+        start = int(now // WINDOW_SECONDS) * WINDOW_SECONDS
+        if not self._slices or self._slices[-1]['start'] != start:
+            self._slices.append({'start': start, 'buckets': [0] * len(BUCKETS_MS),
+                                 'count': 0, 'wall_ms': 0.0, 'db_ms': 0.0, 'queries': 0})
+        return self._slices[-1]
+
+    def observe(self, wall_ms, db_ms, queries):
+        index = next(i for i, bound in enumerate(BUCKETS_MS) if wall_ms <= bound)
+        with self._lock:
+            current = self._current(time.time())
+            current['buckets'][index] += 1
+            current['count'] += 1
+            current['wall_ms'] += wall_ms
+            current['db_ms'] += db_ms
+            current['queries'] += queries
+
+    def summary(self):
+        oldest = time.time() - WINDOW_SECONDS * WINDOWS
+        with self._lock:
+            slices = [s for s in self._slices if s['start'] >= oldest]
+            buckets = [sum(column) for column in zip(*[s['buckets'] for s in slices])] or [0] * len(BUCKETS_MS)
+            count = sum(s['count'] for s in slices)
+            totals = {key: sum(s[key] for s in slices) for key in ('wall_ms', 'db_ms', 'queries')}
+        if not count:
+            return None
+
+        def percentile(p):
+            # Upper bound of the bucket holding the p-th percentile
+            target, seen = p * count, 0
+            for bound, n in zip(BUCKETS_MS, buckets):
+                seen += n
+                if seen >= target:
+                    return bound if bound != float('inf') else None
+            return None
+
+        return {
+            'count': count,
+            'avg_ms': round(totals['wall_ms'] / count, 2),
+            'avg_db_ms': round(totals['db_ms'] / count, 2),
+            'avg_queries': round(totals['queries'] / count, 2),
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'buckets': {('+Inf' if b == float('inf') else str(b)): n for b, n in zip(BUCKETS_MS, buckets)},
+        }
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+def _histogram(key):
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, RollingHistogram())
+    return histogram
+
+def timing_summary():
+    """{'endpoints': {name: summary}, 'blueprints': {name: summary}} over the rolling window."""
+    result = {'endpoints': {}, 'blueprints': {}}
+    for (kind, name), histogram in list(_histograms.items()):
+        summary = histogram.summary()
+        if summary:
+            result[kind][name] = summary
+    return result
+
+def _state():
+    if not has_request_context():
+        return None  # background tasks and streamed bodies aren't attributed
+    return request.environ.get(ENVIRON_KEY)
+
+def init_instrumentation(app, engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('instrumentation_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info['instrumentation_start'].pop()) * 1000
+        state = _state()
+        if state is None:
+            return
+        state['db_ms'] += elapsed
+        state['queries'] += 1
+        if state['n_plus_one']:
+            # Bound parameters keep the text identical across N+1 iterations
+            state['shapes'][statement] = state['shapes'].get(statement, 0) + 1
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        starts = context.connection.info.get('instrumentation_start') if context.connection else None
+        if starts:
+            starts.pop()
+
+    @app.before_request
+    def start_timer():
+        threshold = app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD if app.debug else 0)
+        request.environ[ENVIRON_KEY] = {'start': time.perf_counter(), 'db_ms': 0.0, 'queries': 0,
+                                        'shapes': {}, 'n_plus_one': threshold}
+
+    @app.after_request
+    def record_timing(response):
+        state = request.environ.get(ENVIRON_KEY)
+        if state is None:
+            return response
+        wall_ms = (time.perf_counter() - state['start']) * 1000
+        endpoint = request.endpoint or '<unmatched>'
+        blueprint = request.blueprint or '<app>'
+
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={wall_ms:.1f}, db;dur={state["db_ms"]:.1f};desc="{state["queries"]} queries"'
+        )
+        _histogram(('endpoints', endpoint)).observe(wall_ms, state['db_ms'], state['queries'])
+        _histogram(('blueprints', blueprint)).observe(wall_ms, state['db_ms'], state['queries'])
+        for observer in app.extensions.get('instrumentation_observers', ()):
+            observer(endpoint, blueprint, request.method, response.status_code,
+                     wall_ms, state['db_ms'], state['queries'])
+
+        for statement, count in state['shapes'].items():
+            if count > state['n_plus_one']:
+                app.logger.warning('Possible N+1 in %s: statement ran %d times: %s',
+                                   endpoint, count, ' '.join(statement.split())[:300])
+        return response
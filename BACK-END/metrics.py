@@ -0,0 +1,157 @@
+# metrics.py
+"""Prometheus metrics, served at GET /metrics.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+before the app is imported (gunicorn.conf.py does this), so every worker writes
+its samples there and any worker can answer a scrape for all of them.
+
+Scrapers authenticate with Authorization: Bearer <METRICS_TOKEN> (app config
+or environment). Without a token, /metrics only answers in debug or testing
+mode and refuses everywhere else, so production never exposes it by accident.
+
+The request path only touches prometheus_client's own per-metric values.
+Process-local stats that already exist elsewhere (pool, caches, queues)
+are folded in at most every REFRESH_SECONDS per worker instead of
+being recorded twice.
+"""
+import os
+import threading
+import time
+from flask import Response, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+REFRESH_SECONDS = 5
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'moringadesk_request_duration_seconds', 'Request wall time', ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'moringadesk_request_db_seconds', 'Time spent in SQL per request', ['endpoint'], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter('moringadesk_requests', 'Requests served', ['endpoint', 'method', 'status'])
+SQL_STATEMENTS = Counter('moringadesk_sql_statements', 'SQL statements run by requests', ['endpoint'])
+
+NOTIFICATION_FANOUT_ROWS = Histogram(
+    'moringadesk_notification_fanout_rows', 'Notifications written per broadcast',
+    buckets=(10, 100, 1000, 10000, 100000, 1000000)
+)
+
+# Cumulative per-process stats, carried over as counter increments
+CACHE_REQUESTS = Counter('moringadesk_cache_requests', 'Cache lookups', ['cache', 'result'])
+POOL_EVENTS = Counter('moringadesk_db_pool_events', 'Connection pool events', ['event'])
+POOL_WAIT = Counter('moringadesk_db_pool_wait_seconds', 'Total time spent waiting for a pooled connection')
+
+# Point-in-time per-process values, summed over live workers
+POOL_CONNECTIONS = Gauge('moringadesk_db_pool_connections', 'Pooled connections', ['state'], multiprocess_mode='livesum')
+TASK_QUEUE_DEPTH = Gauge('moringadesk_task_queue_depth', 'Background tasks queued or running', multiprocess_mode='livesum')
+SSE_SUBSCRIBERS = Gauge('moringadesk_sse_subscribers', 'Open notification streams', multiprocess_mode='livesum')
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+_seen = {}
+
+def _carry(counter, key, total):
+    # Turn a running total into counter increments since the last refresh
+    delta = total - _seen.get(key, 0)
+    if delta > 0:
+        counter.inc(delta)
+    _seen[key] = total
+
+def _refresh_process_metrics(engine):
+    from db_pool import pool_status
+    from views.auth import user_cache_stats
+    from views.cache_utils import response_cache_stats
+    from views.pubsub_utils import broker
+    from views.task_utils import task_queue_depth
+
+    for result in ('hits', 'misses'):
+        _carry(CACHE_REQUESTS.labels('user', result), ('user', result), user_cache_stats[result])
+        _carry(CACHE_REQUESTS.labels('response', result), ('response', result), response_cache_stats[result])
+    _carry(CACHE_REQUESTS.labels('response', 'not_modified'), ('response', 'not_modified'),
+           response_cache_stats['not_modified'])
+
+    pool = pool_status(engine)
+    for event in ('checkouts', 'overflow_checkouts', 'timeouts'):
+        _carry(POOL_EVENTS.labels(event), ('pool', event), pool[event])
+    _carry(POOL_WAIT, ('pool', 'wait'), pool['wait_ms_total'] / 1000)
+    for state in ('checked_out', 'checked_in', 'overflow'):
+        if state in pool:
+            POOL_CONNECTIONS.labels(state).set(pool[state])
+
+    TASK_QUEUE_DEPTH.set(task_queue_depth())
+    SSE_SUBSCRIBERS.set(broker.subscriber_count())
+
+def _refresh(engine, force=False):
+    # Requests never wait here: if another thread is refreshing, skip this round
+    global _last_refresh
+    now = time.monotonic()
+    if not force and now - _last_refresh < REFRESH_SECONDS:
+        return
+    if not _refresh_lock.acquire(blocking=force):
+        return
+    try:
+        _last_refresh = now
+        _refresh_process_metrics(engine)
+    finally:
+        _refresh_lock.release()
+
+class DatabaseCollector:
+    """Values that live in the database, read once per scrape by whichever worker answers it."""
+
+    app = None
+
+    def describe(self):
+        # Lets the registry learn the metric names without querying the database
+        yield GaugeMetricFamily('moringadesk_mail_outbox_depth', 'Pending outgoing mail')
+
+    def collect(self):
+        from views.email_utils import outbox_depth
+        if self.app is None:
+            return
+        try:
+            with self.app.app_context():
+                depth = outbox_depth()
+        except Exception:
+            self.app.logger.exception('Could not read the mail outbox depth')
+            return
+        yield GaugeMetricFamily('moringadesk_mail_outbox_depth', 'Pending outgoing mail', value=depth)
+
+_database_collector = DatabaseCollector()
+REGISTRY.register(_database_collector)
+
+def init_metrics(app, engine):
+    from instrumentation import add_observer
+
+    def observe(endpoint, blueprint, method, status, wall_ms, db_ms, queries):
+        REQUEST_LATENCY.labels(endpoint, method).observe(wall_ms / 1000)
+        REQUEST_DB_TIME.labels(endpoint).observe(db_ms / 1000)
+        REQUESTS.labels(endpoint, method, str(status)).inc()
+        if queries:
+            SQL_STATEMENTS.labels(endpoint).inc(queries)
+        _refresh(engine)
+
+    add_observer(app, observe)
+
+    _database_collector.app = app
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_database_collector)
+    else:
+        registry = REGISTRY
+
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN') or os.environ.get('METRICS_TOKEN')
+        if not token and not (app.debug or app.testing):
+            return Response('Unauthorized: set METRICS_TOKEN to enable /metrics\n',
+                            status=401, mimetype='text/plain')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+
+        _refresh(engine, force=True)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
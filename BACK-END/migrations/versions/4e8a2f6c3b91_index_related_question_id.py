@@ -0,0 +1,26 @@
+"""Index related_questions.related_question_id
+
+Revision ID: 4e8a2f6c3b91
+Revises: 9d3c5b7e1f26
+Create Date: 2026-10-18 15:20:37.112904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8a2f6c3b91'
+down_revision = '9d3c5b7e1f26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('related_questions', schema=None) as batch_op:
+        batch_op.create_index('ix_related_questions_related_question_id', ['related_question_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('related_questions', schema=None) as batch_op:
+        batch_op.drop_index('ix_related_questions_related_question_id')
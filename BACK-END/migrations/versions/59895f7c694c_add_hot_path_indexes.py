@@ -0,0 +1,49 @@
+"""Add indexes for hot foreign-key and filter columns
+
+Revision ID: 59895f7c694c
+Revises: fc58f6102e15
+Create Date: 2026-10-18 11:20:06.117482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '59895f7c694c'
+down_revision = 'fc58f6102e15'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_notifications_user_id_is_read_created_at', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at']),
+    ('ix_follow_ups_question_id', 'follow_ups', ['question_id']),
+    ('ix_follow_ups_answer_id', 'follow_ups', ['answer_id']),
+    ('ix_votes_answer_id', 'votes', ['answer_id']),
+    ('ix_question_tags_question_id_tag_id', 'question_tags', ['question_id', 'tag_id']),
+    ('ix_questions_category_language_solved_created', 'questions', ['category_id', 'language', 'is_solved', 'created_at']),
+    ('ix_reports_question_id', 'reports', ['question_id']),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction, and doesn't
+        # block writes while it builds
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,33 @@
+"""Make question tags unique per question
+
+Revision ID: 6b3f0e2a9c14
+Revises: d4e7a91c05b2
+Create Date: 2026-10-18 15:31:09.640271
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b3f0e2a9c14'
+down_revision = 'd4e7a91c05b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first row of each duplicated (question, tag) pair
+    op.execute(
+        "DELETE FROM question_tags WHERE id NOT IN ("
+        "SELECT min_id FROM (SELECT MIN(id) AS min_id FROM question_tags GROUP BY question_id, tag_id) AS kept)"
+    )
+    with op.batch_alter_table('question_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_tags_question_id_tag_id')
+        batch_op.create_unique_constraint('unique_question_tag', ['question_id', 'tag_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('question_tags', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_question_tag', type_='unique')
+        batch_op.create_index('ix_question_tags_question_id_tag_id', ['question_id', 'tag_id'], unique=False)
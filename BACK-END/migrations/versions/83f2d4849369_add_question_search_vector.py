@@ -0,0 +1,37 @@
+"""Add full-text search vector to questions
+
+Revision ID: 83f2d4849369
+Revises: 32a6943c3711
+Create Date: 2026-10-18 09:12:40.512306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '83f2d4849369'
+down_revision = '32a6943c3711'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres only: SQLite uses the in-process index in views/search_utils.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        "ALTER TABLE questions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED"
+    )
+    op.create_index('ix_questions_search_vector', 'questions', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_questions_search_vector', table_name='questions')
+    op.drop_column('questions', 'search_vector')
@@ -0,0 +1,35 @@
+"""Add stream tickets
+
+Revision ID: 9d3c5b7e1f26
+Revises: c7d21e9a4b58
+Create Date: 2026-10-18 15:02:11.408317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3c5b7e1f26'
+down_revision = 'c7d21e9a4b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stream_tickets',
+    sa.Column('ticket_hash', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ticket_hash')
+    )
+    with op.batch_alter_table('stream_tickets', schema=None) as batch_op:
+        batch_op.create_index('ix_stream_tickets_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stream_tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_stream_tickets_expires_at')
+
+    op.drop_table('stream_tickets')
@@ -0,0 +1,82 @@
+"""Add question ranking columns
+
+Revision ID: a83c5d17e6f0
+Revises: 6b3f0e2a9c14
+Create Date: 2026-10-18 16:12:55.274019
+
+"""
+from datetime import datetime
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83c5d17e6f0'
+down_revision = '6b3f0e2a9c14'
+branch_labels = None
+depends_on = None
+
+# Snapshot of views/ranking_utils.hot_score at the time of this migration
+EPOCH = datetime(2005, 12, 8, 7, 46, 43)
+
+
+def _hot_score(answer_count, followup_count, vote_total, created_at):
+    points = vote_total + 2 * answer_count + followup_count
+    order = math.log10(max(abs(points), 1))
+    sign = 1 if points > 0 else -1 if points < 0 else 0
+    if isinstance(created_at, str):  # SQLite hands back raw text
+        created_at = datetime.fromisoformat(created_at)
+    seconds = ((created_at or datetime.utcnow()) - EPOCH).total_seconds()
+    return round(sign * order + seconds / 45000, 7)
+
+
+def upgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answer_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('followup_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('vote_total', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_activity_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('hot_score', sa.Float(), server_default='0', nullable=False))
+        batch_op.create_index('ix_questions_hot_score_id', ['hot_score', 'id'], unique=False)
+        batch_op.create_index('ix_questions_vote_total_id', ['vote_total', 'id'], unique=False)
+        batch_op.create_index('ix_questions_last_activity_at_id', ['last_activity_at', 'id'], unique=False)
+
+    # Backfill from the existing answers and follow-ups
+    op.execute(
+        "UPDATE questions SET "
+        "answer_count = (SELECT COUNT(*) FROM answers WHERE answers.question_id = questions.id), "
+        "followup_count = (SELECT COUNT(*) FROM follow_ups WHERE follow_ups.question_id = questions.id), "
+        "vote_total = COALESCE((SELECT SUM(score) FROM answers WHERE answers.question_id = questions.id), 0), "
+        "last_activity_at = COALESCE("
+        "(SELECT MAX(created_at) FROM answers WHERE answers.question_id = questions.id), created_at)"
+    )
+    op.execute(
+        "UPDATE questions SET last_activity_at = ("
+        "SELECT MAX(created_at) FROM follow_ups WHERE follow_ups.question_id = questions.id) "
+        "WHERE last_activity_at < ("
+        "SELECT MAX(created_at) FROM follow_ups WHERE follow_ups.question_id = questions.id)"
+    )
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, answer_count, followup_count, vote_total, created_at FROM questions"
+    )).fetchall()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE questions SET hot_score = :hot_score WHERE id = :id"),
+            [{'id': row.id, 'hot_score': _hot_score(*row[1:])} for row in rows]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_index('ix_questions_last_activity_at_id')
+        batch_op.drop_index('ix_questions_vote_total_id')
+        batch_op.drop_index('ix_questions_hot_score_id')
+        batch_op.drop_column('hot_score')
+        batch_op.drop_column('last_activity_at')
+        batch_op.drop_column('vote_total')
+        batch_op.drop_column('followup_count')
+        batch_op.drop_column('answer_count')
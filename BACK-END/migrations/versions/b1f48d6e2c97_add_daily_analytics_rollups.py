@@ -0,0 +1,60 @@
+"""Add daily analytics rollups
+
+Revision ID: b1f48d6e2c97
+Revises: e5b92c4f7a38
+Create Date: 2026-10-18 17:40:03.582914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1f48d6e2c97'
+down_revision = 'e5b92c4f7a38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_activity',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('questions', sa.Integer(), nullable=False),
+    sa.Column('answers', sa.Integer(), nullable=False),
+    sa.Column('reports', sa.Integer(), nullable=False),
+    sa.Column('signups', sa.Integer(), nullable=False),
+    sa.Column('active_users', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('daily_question_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('language', sa.String(length=50), nullable=False),
+    sa.Column('questions', sa.Integer(), nullable=False),
+    sa.Column('solved', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'category_id', 'language')
+    )
+
+    # Let the live "today" bucket read a small index range
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at', ['created_at'], unique=False)
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.create_index('ix_answers_created_at', ['created_at'], unique=False)
+    with op.batch_alter_table('follow_ups', schema=None) as batch_op:
+        batch_op.create_index('ix_follow_ups_created_at', ['created_at'], unique=False)
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.create_index('ix_reports_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_reports_created_at')
+    with op.batch_alter_table('follow_ups', schema=None) as batch_op:
+        batch_op.drop_index('ix_follow_ups_created_at')
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.drop_index('ix_answers_created_at')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at')
+
+    op.drop_table('daily_question_rollups')
+    op.drop_table('daily_activity')
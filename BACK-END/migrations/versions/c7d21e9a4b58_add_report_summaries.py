@@ -0,0 +1,76 @@
+"""Add report summaries, unique reports and hidden questions
+
+Revision ID: c7d21e9a4b58
+Revises: b1f48d6e2c97
+Create Date: 2026-10-18 18:22:47.903165
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d21e9a4b58'
+down_revision = 'b1f48d6e2c97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep each user's first report per question before adding the constraint
+    op.execute(
+        "DELETE FROM reports WHERE id NOT IN ("
+        "SELECT min_id FROM (SELECT MIN(id) AS min_id FROM reports GROUP BY user_id, question_id) AS kept)"
+    )
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.create_unique_constraint('unique_user_question_report', ['user_id', 'question_id'])
+
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_hidden', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    op.create_table('report_summaries',
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('report_count', sa.Integer(), nullable=False),
+    sa.Column('open_count', sa.Integer(), nullable=False),
+    sa.Column('first_reported_at', sa.DateTime(), nullable=True),
+    sa.Column('last_reported_at', sa.DateTime(), nullable=True),
+    sa.Column('reviewed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.PrimaryKeyConstraint('question_id')
+    )
+    with op.batch_alter_table('report_summaries', schema=None) as batch_op:
+        batch_op.create_index('ix_report_summaries_open_count_question_id', ['open_count', 'question_id'], unique=False)
+
+    op.create_table('report_reason_counts',
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('reason', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.PrimaryKeyConstraint('question_id', 'reason')
+    )
+
+    # Backfill; existing reports all count as open
+    op.execute(
+        "INSERT INTO report_summaries (question_id, report_count, open_count, first_reported_at, last_reported_at) "
+        "SELECT question_id, COUNT(*), COUNT(*), MIN(created_at), MAX(created_at) "
+        "FROM reports WHERE question_id IS NOT NULL GROUP BY question_id"
+    )
+    op.execute(
+        "INSERT INTO report_reason_counts (question_id, reason, count) "
+        "SELECT question_id, LOWER(TRIM(reason)), COUNT(*) "
+        "FROM reports WHERE question_id IS NOT NULL AND reason IS NOT NULL "
+        "GROUP BY question_id, LOWER(TRIM(reason))"
+    )
+
+
+def downgrade():
+    op.drop_table('report_reason_counts')
+    with op.batch_alter_table('report_summaries', schema=None) as batch_op:
+        batch_op.drop_index('ix_report_summaries_open_count_question_id')
+
+    op.drop_table('report_summaries')
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_column('is_hidden')
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_user_question_report', type_='unique')
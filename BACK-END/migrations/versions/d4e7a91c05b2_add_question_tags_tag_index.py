@@ -0,0 +1,26 @@
+"""Index question_tags by tag
+
+Revision ID: d4e7a91c05b2
+Revises: fc1d9f5ddbe8
+Create Date: 2026-10-18 15:02:47.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e7a91c05b2'
+down_revision = 'fc1d9f5ddbe8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('question_tags', schema=None) as batch_op:
+        batch_op.create_index('ix_question_tags_tag_id_question_id', ['tag_id', 'question_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question_tags', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_tags_tag_id_question_id')
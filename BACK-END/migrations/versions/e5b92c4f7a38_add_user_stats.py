@@ -0,0 +1,53 @@
+"""Add user stats for reputation and leaderboard
+
+Revision ID: e5b92c4f7a38
+Revises: a83c5d17e6f0
+Create Date: 2026-10-18 16:58:20.411736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b92c4f7a38'
+down_revision = 'a83c5d17e6f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('questions_asked', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('answers_given', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('approved_answers', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('net_votes', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('reputation', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_user_stats_reputation_user_id', ['reputation', 'user_id'], unique=False)
+
+    # Backfill; weights match views/reputation_utils.py at the time of this migration
+    op.execute(
+        "INSERT INTO user_stats (user_id, questions_asked, answers_given, approved_answers, net_votes) "
+        "SELECT users.id, "
+        "(SELECT COUNT(*) FROM questions WHERE questions.user_id = users.id), "
+        "(SELECT COUNT(*) FROM answers WHERE answers.user_id = users.id), "
+        "(SELECT COUNT(*) FROM answers WHERE answers.user_id = users.id AND answers.is_approved = true), "
+        "COALESCE((SELECT SUM(score) FROM answers WHERE answers.user_id = users.id), 0) "
+        "FROM users"
+    )
+    op.execute(
+        "UPDATE user_stats SET reputation = "
+        "questions_asked + 2 * answers_given + 15 * approved_answers + 10 * net_votes"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_stats_reputation_user_id')
+
+    op.drop_table('user_stats')
@@ -0,0 +1,30 @@
+"""Add scores to related questions
+
+Revision ID: fc1d9f5ddbe8
+Revises: 31609e9d7e66
+Create Date: 2026-10-18 14:10:31.902557
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc1d9f5ddbe8'
+down_revision = '31609e9d7e66'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('related_questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('is_auto', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_related_questions_question_id_score', ['question_id', 'score'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('related_questions', schema=None) as batch_op:
+        batch_op.drop_index('ix_related_questions_question_id_score')
+        batch_op.drop_column('is_auto')
+        batch_op.drop_column('score')
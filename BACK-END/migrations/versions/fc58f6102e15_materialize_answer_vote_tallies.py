@@ -0,0 +1,51 @@
+"""Materialize answer vote tallies and restore unique votes
+
+Revision ID: fc58f6102e15
+Revises: fc5ff891bb3e
+Create Date: 2026-10-18 10:41:52.330871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc58f6102e15'
+down_revision = 'fc5ff891bb3e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep only the latest vote per (user, answer) before restoring the constraint
+    op.execute(
+        "DELETE FROM votes WHERE id NOT IN ("
+        "SELECT max_id FROM (SELECT MAX(id) AS max_id FROM votes GROUP BY user_id, answer_id) AS latest)"
+    )
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.create_unique_constraint('unique_user_answer_vote', ['user_id', 'answer_id'])
+
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('upvotes', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('downvotes', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('score', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_answers_question_id_score', ['question_id', 'score'], unique=False)
+
+    # Backfill tallies from the existing votes
+    op.execute(
+        "UPDATE answers SET "
+        "upvotes = (SELECT COUNT(*) FROM votes WHERE votes.answer_id = answers.id AND votes.vote_type = 'up'), "
+        "downvotes = (SELECT COUNT(*) FROM votes WHERE votes.answer_id = answers.id AND votes.vote_type = 'down')"
+    )
+    op.execute("UPDATE answers SET score = upvotes - downvotes")
+
+
+def downgrade():
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.drop_index('ix_answers_question_id_score')
+        batch_op.drop_column('score')
+        batch_op.drop_column('downvotes')
+        batch_op.drop_column('upvotes')
+
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_user_answer_vote', type_='unique')
@@ -0,0 +1,28 @@
+"""Add question pagination indexes
+
+Revision ID: fc5ff891bb3e
+Revises: 83f2d4849369
+Create Date: 2026-10-18 10:02:17.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc5ff891bb3e'
+down_revision = '83f2d4849369'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.create_index('ix_questions_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_questions_is_solved_created_at_id', ['is_solved', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_index('ix_questions_is_solved_created_at_id')
+        batch_op.drop_index('ix_questions_created_at_id')
@@ -1,5 +1,6 @@
 from extensions import db  # ✅ Use the shared db instance
 from datetime import datetime
+from sqlalchemy import event, DDL
 
 # Association Table for many-to-many User <-> Tags
 user_tags = db.Table('user_tags',
@@ -9,6 +10,9 @@ user_tags = db.Table('user_tags',
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_created_at', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -17,6 +21,8 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
+    # Kept in step with notifications by views/notify_utils.py
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     questions = db.relationship('Question', backref='user', cascade='all, delete-orphan')
@@ -26,6 +32,7 @@ class User(db.Model):
     follow_ups = db.relationship('FollowUp', backref='user', cascade='all, delete-orphan')
     reports = db.relationship('Reports', backref='user', cascade='all, delete-orphan')
     faqs = db.relationship('FAQs', backref='user', cascade='all, delete-orphan')
+    stats = db.relationship('UserStats', backref='user', uselist=False, cascade='all, delete-orphan')
     tags = db.relationship('Tags', secondary=user_tags, backref=db.backref('users', lazy='dynamic'))
 
 
@@ -43,6 +50,17 @@ class Category(db.Model):
 
 class Question(db.Model):
     __tablename__ = 'questions'
+    __table_args__ = (
+        # Keyset pagination: ORDER BY created_at DESC, id DESC
+        db.Index('ix_questions_created_at_id', 'created_at', 'id'),
+        db.Index('ix_questions_is_solved_created_at_id', 'is_solved', 'created_at', 'id'),
+        # Dashboard filters
+        db.Index('ix_questions_category_language_solved_created', 'category_id', 'language', 'is_solved', 'created_at'),
+        # ?sort=hot|top|active
+        db.Index('ix_questions_hot_score_id', 'hot_score', 'id'),
+        db.Index('ix_questions_vote_total_id', 'vote_total', 'id'),
+        db.Index('ix_questions_last_activity_at_id', 'last_activity_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -51,21 +69,51 @@ class Question(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     language = db.Column(db.String(50), nullable=False)
+    # Ranking inputs, maintained by views/ranking_utils.py in the same transaction as the write
+    answer_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    followup_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    vote_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_activity_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hot_score = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    # Set by moderation (views/moderation_utils.py); hidden questions drop out of public reads
+    is_hidden = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     # Relationships
     related_questions = db.relationship('RelatedQuestions', foreign_keys='RelatedQuestions.question_id', backref='question', lazy=True)
     answers = db.relationship('Answers', backref='question', cascade='all, delete-orphan')
     question_tags = db.relationship('QuestionTags', backref='question', cascade='all, delete-orphan')
+    # Read-only: follow-ups are written through FollowUp.question_id / answers
+    follow_ups = db.relationship('FollowUp', viewonly=True)
+
+
+# Full-text search vector (Postgres only). It is a generated column, so Postgres
+# keeps it current on every insert/update; it is deliberately not mapped.
+for statement in (
+    "ALTER TABLE questions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX ix_questions_search_vector ON questions USING gin (search_vector)",
+):
+    event.listen(Question.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
 
 
 class Answers(db.Model):
     __tablename__ = 'answers'
+    __table_args__ = (
+        # Also serves plain question_id lookups (leading column)
+        db.Index('ix_answers_question_id_score', 'question_id', 'score'),
+        db.Index('ix_answers_created_at', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     content = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     is_approved = db.Column(db.Boolean, default=False)
+    # Vote tallies, maintained by views/votes.py in the same transaction as the vote
+    upvotes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    downvotes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     follow_ups = db.relationship('FollowUp', backref='answer', cascade='all, delete-orphan')
@@ -74,6 +122,11 @@ class Answers(db.Model):
 
 class FollowUp(db.Model):
     __tablename__ = 'follow_ups'
+    __table_args__ = (
+        db.Index('ix_follow_ups_question_id', 'question_id'),
+        db.Index('ix_follow_ups_answer_id', 'answer_id'),
+        db.Index('ix_follow_ups_created_at', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'))
@@ -84,18 +137,30 @@ class FollowUp(db.Model):
 
 class Votes(db.Model):
     __tablename__ = 'votes'
+    __table_args__ = (
+        # One vote per user per answer; create_vote relies on it for ON CONFLICT
+        db.UniqueConstraint('user_id', 'answer_id', name='unique_user_answer_vote'),
+        db.Index('ix_votes_answer_id', 'answer_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     answer_id = db.Column(db.Integer, db.ForeignKey('answers.id'))
     vote_type = db.Column(db.String(10))  # 'up' or 'down'
-    # ✅ Removed the unique constraint to allow vote updates freely
 
 
 class RelatedQuestions(db.Model):
     __tablename__ = 'related_questions'
+    __table_args__ = (
+        db.Index('ix_related_questions_question_id_score', 'question_id', 'score'),
+        # Which lists mention a question (stale-row cleanup, deletes)
+        db.Index('ix_related_questions_related_question_id', 'related_question_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'))
     related_question_id = db.Column(db.Integer)
+    # Rows written by views/related_utils.py; hand-made links keep is_auto False
+    score = db.Column(db.Float)
+    is_auto = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
 
 class Tags(db.Model):
@@ -111,6 +176,10 @@ class Tags(db.Model):
 
 class QuestionTags(db.Model):
     __tablename__ = 'question_tags'
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'tag_id', name='unique_question_tag'),
+        db.Index('ix_question_tags_tag_id_question_id', 'tag_id', 'question_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'))
     tag_id = db.Column(db.Integer, db.ForeignKey('tags.id'))
@@ -118,6 +187,12 @@ class QuestionTags(db.Model):
 
 class Reports(db.Model):
     __tablename__ = 'reports'
+    __table_args__ = (
+        # One report per user per question; create_report relies on it for ON CONFLICT
+        db.UniqueConstraint('user_id', 'question_id', name='unique_user_question_report'),
+        db.Index('ix_reports_question_id', 'question_id'),
+        db.Index('ix_reports_created_at', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
@@ -126,8 +201,34 @@ class Reports(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class ReportSummary(db.Model):
+    # Per-question rollup of reports, maintained at insert time by views/moderation_utils.py
+    __tablename__ = 'report_summaries'
+    __table_args__ = (
+        # Moderation queue: WHERE open_count > 0 ORDER BY open_count DESC, question_id DESC
+        db.Index('ix_report_summaries_open_count_question_id', 'open_count', 'question_id'),
+    )
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), primary_key=True)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    open_count = db.Column(db.Integer, nullable=False, default=0)  # reports since the last review
+    first_reported_at = db.Column(db.DateTime)
+    last_reported_at = db.Column(db.DateTime)
+    reviewed_at = db.Column(db.DateTime)
+
+
+class ReportReasonCount(db.Model):
+    __tablename__ = 'report_reason_counts'
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), primary_key=True)
+    reason = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
 class Notifications(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     type = db.Column(db.String(100))
@@ -144,3 +245,68 @@ class FAQs(db.Model):
     category = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+
+class MailOutbox(db.Model):
+    __tablename__ = 'mail_outbox'
+    __table_args__ = (
+        db.Index('ix_mail_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent or dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+
+class StreamTicket(db.Model):
+    # Single-use, short-lived credentials for the notification stream, since
+    # EventSource can't send an Authorization header (views/notifications.py)
+    __tablename__ = 'stream_tickets'
+    __table_args__ = (
+        db.Index('ix_stream_tickets_expires_at', 'expires_at'),
+    )
+    ticket_hash = db.Column(db.String(64), primary_key=True)  # sha256 hex; the ticket itself isn't stored
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class UserStats(db.Model):
+    # One row per active user, maintained incrementally by views/reputation_utils.py
+    __tablename__ = 'user_stats'
+    __table_args__ = (
+        # Leaderboard: ORDER BY reputation DESC, user_id DESC
+        db.Index('ix_user_stats_reputation_user_id', 'reputation', 'user_id'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    questions_asked = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    answers_given = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    approved_answers = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    net_votes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    reputation = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+
+# -------------------- Admin analytics rollups --------------------
+# Filled for every finished day by `flask rollup-stats` (views/analytics_utils.py)
+class DailyActivity(db.Model):
+    __tablename__ = 'daily_activity'
+    day = db.Column(db.Date, primary_key=True)
+    questions = db.Column(db.Integer, nullable=False, default=0)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    reports = db.Column(db.Integer, nullable=False, default=0)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    active_users = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyQuestionRollup(db.Model):
+    __tablename__ = 'daily_question_rollups'
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)
+    language = db.Column(db.String(50), primary_key=True)
+    questions = db.Column(db.Integer, nullable=False, default=0)
+    solved = db.Column(db.Integer, nullable=False, default=0)
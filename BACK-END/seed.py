@@ -4,6 +4,11 @@ from models import (
     RelatedQuestions, Tags, QuestionTags, Reports, Notifications, FAQs
 )
 from werkzeug.security import generate_password_hash
+from views.moderation_utils import reconcile_report_summaries
+from views.notify_utils import reconcile_unread_counts
+from views.ranking_utils import recompute_rankings
+from views.reputation_utils import recompute_user_stats
+from views.vote_utils import recompute_vote_tallies
 
 app = create_app()
 
@@ -118,4 +123,12 @@ with app.app_context():
     db.session.add_all([faq1, faq2])
     db.session.commit()
 
+    # The rows above bypass the API, so fill in the denormalized counters.
+    # Vote tallies first: rankings and user stats sum the answer scores.
+    recompute_vote_tallies()
+    recompute_rankings()
+    recompute_user_stats()
+    reconcile_unread_counts()
+    reconcile_report_summaries()
+
     print("✅ Fully seeded the database successfully.")
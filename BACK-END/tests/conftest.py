@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# app.py builds an app at import time; keep it off any real database
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from werkzeug.security import generate_password_hash
+from app import create_app
+from models import db, Category, User
+from views.auth import generate_jwt
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # A file rather than :memory:, so threads get their own connections.
+    # TEST_DATABASE_URL runs the suite against a scratch Postgres database instead.
+    monkeypatch.setenv('DATABASE_URL', os.environ.get('TEST_DATABASE_URL') or f'sqlite:///{tmp_path / "test.db"}')
+    app = create_app()
+    app.config.update(TESTING=True, TASKS_ALWAYS_EAGER=True, MAIL_OUTBOX_WORKER=False)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Category(category_name='Backend', created_by='admin'))
+        db.session.add_all([
+            User(username='alice', email='alice@example.com', password=generate_password_hash('pw')),
+            User(username='bob', email='bob@example.com', password=generate_password_hash('pw')),
+            User(username='admin', email='admin@example.com', password=generate_password_hash('pw'), is_admin=True),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app):
+    """auth('alice') -> headers carrying that user's token."""
+    def headers(username):
+        user = User.query.filter_by(username=username).one()
+        return {'Authorization': f'Bearer {generate_jwt(user)}'}
+    return headers
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from models import db, Question, DailyActivity
+from views.analytics_utils import LOOKBACK_DAYS, rollup_stats
+
+
+def ask(days_ago, solved=False):
+    question = Question(title='Q', description='d', user_id=1, category_id=1, language='Python',
+                        is_solved=solved, created_at=datetime.utcnow() - timedelta(days=days_ago))
+    db.session.add(question)
+    db.session.commit()
+    return question
+
+
+def stats(client, auth):
+    response = client.get('/api/admin/stats', headers=auth('admin'))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_stats_only_count_today_live(client, auth):
+    ask(40)
+    ask(0)
+
+    body = stats(client, auth)
+    assert DailyActivity.query.count() == 0  # a read never rolls up
+    assert body['rolled_up_through'] is None and body['stale_days'] is None
+    assert body['totals']['questions'] == 1
+
+    rollup_stats()
+    body = stats(client, auth)
+    assert body['stale_days'] == 0
+    assert body['totals']['questions'] == 2
+
+
+def test_stale_rollup_is_reported(client, auth):
+    ask(40)
+    rollup_stats()
+    DailyActivity.query.filter(DailyActivity.day > datetime.utcnow().date() - timedelta(days=4)).delete()
+    db.session.commit()
+
+    assert stats(client, auth)['stale_days'] == 3
+
+
+def test_late_solved_flag_reaches_old_days(client, auth):
+    old = ask(LOOKBACK_DAYS + 20)
+    ask(0, solved=True)
+    rollup_stats()
+
+    response = client.put(f'/api/questions/{old.id}/is_solved', json={'is_solved': True}, headers=auth('alice'))
+    assert response.status_code == 200
+
+    body = stats(client, auth)
+    assert body['totals']['solved'] == 2
+    assert body['by_language'] == [{'language': 'Python', 'questions': 2, 'solved': 2}]
+
+    # The next run only re-scans recent days and must agree
+    rollup_stats()
+    assert stats(client, auth)['by_language'] == body['by_language']
+
+
+def test_recategorized_and_deleted_questions_leave_old_buckets(client, auth):
+    old = ask(LOOKBACK_DAYS + 20, solved=True)
+    rollup_stats()
+
+    client.put(f'/api/questions/{old.id}', json={'language': 'JavaScript'}, headers=auth('alice'))
+    assert stats(client, auth)['by_language'] == [
+        {'language': 'JavaScript', 'questions': 1, 'solved': 1},
+        {'language': 'Python', 'questions': 0, 'solved': 0},
+    ]
+
+    client.delete(f'/api/questions/{old.id}', headers=auth('alice'))
+    assert stats(client, auth)['totals']['solved'] == 0
@@ -0,0 +1,40 @@
+from flask import jsonify
+
+from models import db, Category
+from views import auth as auth_views
+
+
+def test_uncommitted_changes_do_not_leak_between_sub_requests(app, client, auth):
+    def half_done():
+        # Adds a row, then bails out without committing
+        db.session.add(Category(category_name='Leaked', created_by='batch'))
+        db.session.flush()
+        return jsonify({'error': 'changed my mind'}), 400
+    app.add_url_rule('/api/test/half-done', 'half_done', half_done, methods=['POST'])
+
+    response = client.post('/api/batch', headers=auth('alice'), json=[
+        {'method': 'POST', 'path': '/api/test/half-done'},
+        # Commits on its own; must not sweep the leaked category along
+        {'method': 'POST', 'path': '/api/questions',
+         'body': {'title': 'Batched', 'description': 'd', 'category_id': 1, 'language': 'Python'}},
+    ])
+    assert [r['status'] for r in response.get_json()] == [400, 201]
+    assert Category.query.filter_by(category_name='Leaked').count() == 0
+
+
+def test_batch_decodes_the_jwt_once(client, auth, monkeypatch):
+    calls = []
+    real_decode = auth_views.decode_jwt
+    monkeypatch.setattr(auth_views, 'decode_jwt', lambda token: calls.append(token) or real_decode(token))
+
+    response = client.post('/api/batch', headers=auth('alice'), json=[
+        {'method': 'GET', 'path': '/api/notifications/me'} for _ in range(5)
+    ])
+    assert [r['status'] for r in response.get_json()] == [200] * 5
+    assert len(calls) == 1
+
+
+def test_batch_with_a_bad_token_is_refused(client):
+    response = client.post('/api/batch', headers={'Authorization': 'Bearer forged'},
+                           json=[{'method': 'GET', 'path': '/api/notifications/me'}])
+    assert response.status_code == 401
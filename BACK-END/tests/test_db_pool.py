@@ -0,0 +1,20 @@
+import pytest
+from db_pool import DEBUG_DATABASE_URL, database_url
+
+
+def test_database_url_is_required_outside_debug(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    monkeypatch.delenv('FLASK_DEBUG', raising=False)
+    with pytest.raises(RuntimeError, match='DATABASE_URL'):
+        database_url()
+
+
+def test_debug_falls_back_to_local_sqlite(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    monkeypatch.setenv('FLASK_DEBUG', '1')
+    assert database_url() == DEBUG_DATABASE_URL
+
+
+def test_postgres_scheme_is_rewritten(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'postgres://user:pw@db/moringadesk')
+    assert database_url() == 'postgresql://user:pw@db/moringadesk'
@@ -0,0 +1,195 @@
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, MailOutbox
+from views import email_utils
+from views.email_utils import BATCH_SIZE, enqueue_email, process_outbox, run_outbox_worker, send_reset_email
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Just enough SMTP for smtplib: accepts everything except RCPT to bounce@..."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.reply('220 stub ESMTP')
+        data = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            line = line.decode().rstrip('\r\n')
+            if data is not None:
+                if line == '.':
+                    with self.server.lock:
+                        self.server.messages.append('\n'.join(data))
+                    data = None
+                    self.reply('250 queued')
+                else:
+                    data.append(line)
+                continue
+
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 stub')
+            elif command == 'RCPT' and 'bounce@' in line:
+                self.reply('550 no such user')
+            elif command == 'DATA':
+                data = []
+                self.reply('354 go ahead')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp(app):
+    server = SMTPStub()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state = app.extensions['mail']
+    state.server, state.port = '127.0.0.1', server.server_address[1]
+    state.use_tls = state.use_ssl = False
+    state.username = state.password = None
+    state.suppress = False
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def statuses():
+    db.session.expire_all()
+    return {m.recipient: m.status for m in MailOutbox.query}
+
+
+def test_drains_the_outbox_one_connection_per_batch(app, smtp):
+    count = 4 * BATCH_SIZE
+    for i in range(count):
+        enqueue_email(f'user{i}@example.com', 'Hello', f'Message {i}')
+    db.session.commit()
+
+    started = time.perf_counter()
+    run_outbox_worker(app, once=True)
+    elapsed = time.perf_counter() - started
+
+    assert len(smtp.messages) == count
+    assert smtp.connections == count // BATCH_SIZE
+    assert set(statuses().values()) == {'sent'}
+    # Generous bound; the stub answers instantly, so this only catches pathological slowness
+    assert elapsed < 30, f'{count} messages took {elapsed:.1f}s'
+
+
+def test_reset_link_is_not_kept_after_sending(app, smtp):
+    send_reset_email('alice@example.com', 'secret-reset-token')
+    assert 'secret-reset-token' in MailOutbox.query.one().body
+
+    process_outbox()
+
+    assert any('secret-reset-token' in m for m in smtp.messages)
+    message = db.session.get(MailOutbox, 1)
+    assert message.status == 'sent' and message.body == ''
+
+
+def test_rejected_recipient_backs_off_then_dies(app, smtp):
+    enqueue_email('bounce@example.com', 'Hello', 'reset link')
+    enqueue_email('fine@example.com', 'Hello', 'hi')
+    db.session.commit()
+
+    process_outbox()
+    assert statuses() == {'bounce@example.com': 'pending', 'fine@example.com': 'sent'}
+    bounced = MailOutbox.query.filter_by(recipient='bounce@example.com').one()
+    assert bounced.attempts == 1 and '550' in bounced.last_error
+    assert process_outbox() == 0  # backing off, not due yet
+
+    # Make it due again until it runs out of attempts
+    for _ in range(email_utils.MAX_ATTEMPTS - 1):
+        MailOutbox.query.filter_by(recipient='bounce@example.com') \
+            .update({MailOutbox.next_attempt_at: datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        process_outbox()
+
+    bounced = MailOutbox.query.filter_by(recipient='bounce@example.com').one()
+    assert (bounced.status, bounced.attempts, bounced.body) == ('dead', email_utils.MAX_ATTEMPTS, '')
+
+
+def test_unreachable_server_retries_everything(app, smtp):
+    # Nothing listens on a port we just closed
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    app.extensions['mail'].port = sock.getsockname()[1]
+    sock.close()
+
+    for i in range(3):
+        enqueue_email(f'user{i}@example.com', 'Hello', 'hi')
+    db.session.commit()
+
+    assert process_outbox() == 3
+    assert set(statuses().values()) == {'pending'}
+    assert {m.attempts for m in MailOutbox.query} == {1}
+
+
+def test_claims_are_committed_before_smtp(app, smtp, monkeypatch):
+    enqueue_email('alice@example.com', 'Hello', 'hi')
+    db.session.commit()
+    seen = []
+
+    real_connect = email_utils.mail.connect
+    def connect():
+        # Another session sees the claim while the batch is on the wire
+        with db.engine.connect() as other:
+            seen.append(other.execute(db.select(MailOutbox.status)).scalar())
+        return real_connect()
+    monkeypatch.setattr(email_utils.mail, 'connect', connect)
+
+    process_outbox()
+    assert seen == ['sending']
+    assert statuses() == {'alice@example.com': 'sent'}
+
+
+def test_expired_claim_is_picked_up_again(app, smtp):
+    enqueue_email('alice@example.com', 'Hello', 'hi')
+    db.session.commit()
+    # A worker that claimed the row and died
+    MailOutbox.query.update({MailOutbox.status: 'sending'})
+    db.session.commit()
+
+    assert process_outbox() == 1
+    assert statuses() == {'alice@example.com': 'sent'}
+
+
+def test_claim_that_never_settles_is_dead_lettered(app, smtp):
+    enqueue_email('alice@example.com', 'Hello', 'reset link')
+    db.session.commit()
+
+    # Every claim dies with its worker before the send is settled
+    for attempt in range(1, email_utils.MAX_ATTEMPTS + 1):
+        assert email_utils._claim(BATCH_SIZE, datetime.utcnow()) != []
+        message = MailOutbox.query.one()
+        assert (message.status, message.attempts) == ('sending', attempt)
+        MailOutbox.query.update({MailOutbox.next_attempt_at: datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+    assert process_outbox() == 0
+    assert smtp.messages == []
+    message = MailOutbox.query.one()
+    assert (message.status, message.attempts, message.body) == ('dead', email_utils.MAX_ATTEMPTS, '')
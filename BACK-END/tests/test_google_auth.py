@@ -0,0 +1,104 @@
+import http.server
+import json
+import threading
+import time
+
+import pytest
+import rsa
+from google.auth import crypt, jwt as google_jwt
+
+from views import google_auth_utils
+from views.auth import GOOGLE_CLIENT_ID
+from views.google_auth_utils import GoogleTokenVerifier
+
+
+@pytest.fixture(scope='module')
+def keys():
+    """Two signing keys, so tests can rotate from one to the other."""
+    pairs = {}
+    for kid in ('key-1', 'key-2'):
+        public, private = rsa.newkeys(1024)
+        pairs[kid] = (public.save_pkcs1().decode(), private.save_pkcs1().decode())
+    return pairs
+
+
+@pytest.fixture
+def cert_server(keys):
+    """Stand-in for Google's cert endpoint; set server.kids to choose which keys it publishes."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.hits += 1
+            body = json.dumps({kid: keys[kid][0] for kid in server.kids}).encode()
+            self.send_response(200)
+            self.send_header('Cache-Control', 'public, max-age=3600')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.hits, server.kids = 0, ['key-1']
+    server.url = f'http://127.0.0.1:{server.server_port}/certs'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def id_token(keys, kid):
+    now = int(time.time())
+    signer = crypt.RSASigner.from_string(keys.get(kid, keys['key-1'])[1], key_id=kid)
+    payload = {'iss': 'accounts.google.com', 'aud': GOOGLE_CLIENT_ID, 'email': 'grace@example.com',
+               'name': 'Grace', 'iat': now, 'exp': now + 600}
+    return google_jwt.encode(signer, payload).decode()
+
+
+def test_known_key_is_served_from_cache(keys, cert_server):
+    verifier = GoogleTokenVerifier(cert_server.url)
+    for _ in range(5):
+        assert verifier.verify(id_token(keys, 'key-1'), GOOGLE_CLIENT_ID)['email'] == 'grace@example.com'
+    assert cert_server.hits == 1
+
+
+def test_unknown_key_ids_do_not_hammer_the_cert_endpoint(keys, cert_server):
+    verifier = GoogleTokenVerifier(cert_server.url)
+    verifier.verify(id_token(keys, 'key-1'), GOOGLE_CLIENT_ID)
+
+    for i in range(50):
+        with pytest.raises(ValueError):
+            verifier.verify(id_token(keys, f'forged-{i}'), GOOGLE_CLIENT_ID)
+    assert cert_server.hits == 1
+    assert verifier.stats['unknown_key_rejections'] == 50
+
+
+def test_rotated_key_is_fetched_once_the_cooldown_has_passed(keys, cert_server):
+    verifier = GoogleTokenVerifier(cert_server.url)
+    verifier.verify(id_token(keys, 'key-1'), GOOGLE_CLIENT_ID)
+    cert_server.kids = ['key-1', 'key-2']  # Google rotates in a new key
+
+    # Still inside the cooldown: rejected without a fetch
+    with pytest.raises(ValueError):
+        verifier.verify(id_token(keys, 'key-2'), GOOGLE_CLIENT_ID)
+    assert cert_server.hits == 1
+
+    verifier._fetched_at -= google_auth_utils.UNKNOWN_KEY_COOLDOWN + 1
+    assert verifier.verify(id_token(keys, 'key-2'), GOOGLE_CLIENT_ID)['email'] == 'grace@example.com'
+    assert cert_server.hits == 2
+
+    # A forged id right after the refetch is rejected without another one
+    with pytest.raises(ValueError):
+        verifier.verify(id_token(keys, 'forged'), GOOGLE_CLIENT_ID)
+    assert cert_server.hits == 2
+
+
+def test_google_login_rejects_unknown_key(client, keys, cert_server, monkeypatch):
+    monkeypatch.setattr(google_auth_utils, '_verifier', GoogleTokenVerifier(cert_server.url))
+
+    response = client.post('/api/auth/google-login', json={'token': id_token(keys, 'key-1')})
+    assert response.status_code == 200 and response.get_json()['user']['email'] == 'grace@example.com'
+
+    response = client.post('/api/auth/google-login', json={'token': id_token(keys, 'forged')})
+    assert response.status_code == 400
+    assert cert_server.hits == 1
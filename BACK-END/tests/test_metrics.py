@@ -0,0 +1,37 @@
+import threading
+import time
+from views import task_utils
+from views.task_utils import submit_task, task_queue_depth
+
+
+def test_metrics_needs_a_token_outside_debug_and_testing(app, client, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    assert client.get('/metrics').status_code == 200
+
+    app.config['TESTING'] = False
+    assert client.get('/metrics').status_code == 401
+
+    monkeypatch.setenv('METRICS_TOKEN', 's3cret')
+    assert client.get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert b'moringadesk_task_queue_depth' in response.data
+
+
+def test_task_queue_depth_counts_until_done(app):
+    app.config['TASKS_ALWAYS_EAGER'] = False
+    release = threading.Event()
+    before = task_queue_depth()
+
+    with app.app_context():
+        futures = [submit_task(release.wait, 5) for _ in range(task_utils._executor._max_workers + 2)]
+    assert task_queue_depth() == before + len(futures)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    # Done-callbacks run just after result() is released
+    deadline = time.monotonic() + 5
+    while task_queue_depth() != before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert task_queue_depth() == before
@@ -0,0 +1,57 @@
+import pytest
+
+from app import create_app
+from models import StreamTicket
+from views import notifications
+
+
+def ticket_for(client, headers):
+    response = client.post('/api/notifications/stream-ticket', headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['ticket']
+
+
+def test_ticket_opens_the_stream_once(client, auth):
+    ticket = ticket_for(client, auth('alice'))
+    assert StreamTicket.query.count() == 1
+    assert ticket not in {t.ticket_hash for t in StreamTicket.query}  # only a hash is stored
+
+    response = client.get(f'/api/notifications/stream?ticket={ticket}')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert next(response.response) == b'retry: 5000\n\n'
+    response.close()
+
+    again = client.get(f'/api/notifications/stream?ticket={ticket}')
+    assert again.status_code == 401
+
+
+def test_expired_or_unknown_ticket_is_refused(client, auth, monkeypatch):
+    assert client.get('/api/notifications/stream?ticket=made-up').status_code == 401
+
+    monkeypatch.setattr(notifications, 'STREAM_TICKET_SECONDS', -1)
+    ticket = ticket_for(client, auth('alice'))
+    assert client.get(f'/api/notifications/stream?ticket={ticket}').status_code == 401
+
+
+def test_jwt_in_query_string_is_no_longer_accepted(client, auth):
+    token = auth('alice')['Authorization'].split(' ')[1]
+    assert client.get(f'/api/notifications/stream?token={token}').status_code == 401
+
+    response = client.get('/api/notifications/stream', headers=auth('alice'))
+    assert response.status_code == 200
+    response.close()
+
+
+def test_ticket_requires_a_login(client):
+    assert client.post('/api/notifications/stream-ticket').status_code == 401
+
+
+def test_memory_transport_refuses_several_workers(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    monkeypatch.delenv('NOTIFICATION_PUBSUB', raising=False)
+    with pytest.raises(RuntimeError, match='NOTIFICATION_PUBSUB'):
+        create_app()
+
+    monkeypatch.setenv('NOTIFICATION_PUBSUB', 'postgres')
+    assert create_app().config['NOTIFICATION_PUBSUB'] == 'postgres'
@@ -0,0 +1,45 @@
+import pytest
+
+from models import db, Notifications, User
+from views import notify_utils
+from views.notify_utils import broadcast_notification, reconcile_unread_counts
+
+
+def add_user(name):
+    user = User(username=name, email=f'{name}@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+@pytest.mark.parametrize('chunk', [None, 2])
+def test_broadcast_reaches_every_existing_user_once(app, chunk):
+    app.config['NOTIFICATION_FANOUT_CHUNK'] = chunk
+    for i in range(4):
+        add_user(f'user{i}')
+
+    assert broadcast_notification('question', 'hello') == 7
+    for user in User.query:
+        assert Notifications.query.filter_by(user_id=user.id).count() == user.unread_notifications == 1
+    assert reconcile_unread_counts() == 0
+
+
+@pytest.mark.parametrize('chunk', [None, 2])
+def test_users_created_mid_broadcast_are_left_out_consistently(app, monkeypatch, chunk):
+    app.config['NOTIFICATION_FANOUT_CHUNK'] = chunk
+    late = []
+    real_insert = notify_utils._insert_broadcast
+
+    def insert_then_sign_up(*args):
+        inserted = real_insert(*args)
+        # Someone signs up while the broadcast is in flight
+        late.append(add_user(f'late{len(late)}'))
+        return inserted
+    monkeypatch.setattr(notify_utils, '_insert_broadcast', insert_then_sign_up)
+
+    assert broadcast_notification('question', 'hello') == 3
+    db.session.expire_all()
+    for user_id in late:
+        assert db.session.get(User, user_id).unread_notifications == 0
+        assert Notifications.query.filter_by(user_id=user_id).count() == 0
+    assert reconcile_unread_counts() == 0
@@ -0,0 +1,46 @@
+import base64
+import json
+
+import pytest
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def ask(client, auth, title):
+    response = client.post('/api/questions', headers=auth('alice'), json={
+        'title': title, 'description': 'details', 'category_id': 1, 'language': 'Python'
+    })
+    assert response.status_code == 201
+
+
+def test_pages_follow_cursor(client, auth):
+    for i in range(5):
+        ask(client, auth, f'Question {i}')
+
+    first = client.get('/api/questions?limit=3').get_json()
+    assert len(first['questions']) == 3 and first['next_cursor']
+    second = client.get(f'/api/questions?limit=3&cursor={first["next_cursor"]}').get_json()
+    assert len(second['questions']) == 2 and second['next_cursor'] is None
+    ids = [q['id'] for q in first['questions'] + second['questions']]
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize('raw', [
+    cursor({'dt': 123}),
+    cursor([{'dt': 123}, 1]),
+    cursor([{'dt': 'yesterday'}, 1]),
+    cursor([{'when': '2024-01-01T00:00:00'}, 1]),
+    cursor([[1], 1]),
+    cursor([None, 1]),
+    cursor(['2024-01-01', 1]),
+    cursor([{'dt': '2024-01-01T00:00:00'}, 'one']),
+    cursor([{'dt': '2024-01-01T00:00:00'}]),
+    'not base64 at all!',
+])
+def test_malformed_cursor_is_a_400(client, auth, raw):
+    ask(client, auth, 'Only question')
+    response = client.get(f'/api/questions?cursor={raw}')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
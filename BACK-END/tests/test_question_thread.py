@@ -0,0 +1,58 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Answers, FollowUp, Question, QuestionTags, Tags
+
+
+@pytest.fixture
+def question_id(app):
+    question = Question(title='Thread me', description='details', user_id=1, category_id=1, language='Python')
+    db.session.add(question)
+    db.session.commit()
+    return question.id
+
+
+def add_replies(question_id, count, created_at=None):
+    tag = Tags(name=f'tag-{count}')
+    db.session.add(tag)
+    for i in range(count):
+        answer = Answers(question_id=question_id, content=f'answer {i}', user_id=1 + i % 3, created_at=created_at)
+        db.session.add(answer)
+        db.session.flush()
+        db.session.add(FollowUp(question_id=question_id, answer_id=answer.id, user_id=1 + (i + 1) % 3,
+                                content=f'follow-up {i}', created_at=created_at))
+    db.session.add(QuestionTags(question_id=question_id, tag=tag))
+    db.session.commit()
+
+
+def queries_for(client, question_id):
+    response = client.get(f'/api/questions/{question_id}/thread')
+    assert response.status_code == 200
+    match = re.search(r'desc="(\d+) queries"', response.headers['Server-Timing'])
+    return int(match.group(1)), response.get_json()
+
+
+def test_thread_uses_a_fixed_number_of_queries(client, question_id):
+    add_replies(question_id, 1)
+    small, _ = queries_for(client, question_id)
+
+    add_replies(question_id, 25)
+    large, thread = queries_for(client, question_id)
+
+    assert len(thread['answers']) == 26 and len(thread['tags']) == 2
+    assert small == large == 4
+
+
+def test_thread_orders_replies_and_tolerates_missing_timestamps(client, question_id):
+    add_replies(question_id, 2, created_at=datetime.utcnow() - timedelta(days=1))
+    add_replies(question_id, 2)
+    # Legacy rows written before created_at had a default
+    Answers.query.filter(Answers.id.in_([1, 3])).update({Answers.created_at: None}, synchronize_session=False)
+    FollowUp.query.filter_by(id=1).update({FollowUp.created_at: None}, synchronize_session=False)
+    db.session.commit()
+
+    _, thread = queries_for(client, question_id)
+    assert [a['id'] for a in thread['answers']] == [2, 4, 1, 3]
+    assert [f['id'] for a in thread['answers'] for f in a['follow_ups']] == [2, 4, 1, 3]
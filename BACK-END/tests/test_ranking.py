@@ -0,0 +1,27 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from views.ranking_utils import DECAY_SECONDS, hot_score
+
+CREATED = datetime(2024, 1, 1, 12, 0, 0)
+HALF_LIFE = timedelta(seconds=DECAY_SECONDS * math.log10(2))
+
+
+def test_half_life_is_about_three_and_three_quarter_hours():
+    assert HALF_LIFE.total_seconds() / 3600 == pytest.approx(3.76, abs=0.01)
+
+
+@pytest.mark.parametrize('points', [2, 10, 64])
+def test_score_halves_every_half_life(points):
+    # Half the points, one half-life newer: a tie
+    assert hot_score(0, 0, points // 2, CREATED + HALF_LIFE) == pytest.approx(
+        hot_score(0, 0, points, CREATED), abs=1e-6)
+
+
+def test_factor_of_ten_every_twelve_and_a_half_hours():
+    assert hot_score(0, 0, 10, CREATED + timedelta(hours=12.5)) == pytest.approx(
+        hot_score(0, 0, 100, CREATED), abs=1e-6)
+    # Past the half-life, newer wins at half the points
+    assert hot_score(0, 0, 5, CREATED + HALF_LIFE + timedelta(minutes=1)) > hot_score(0, 0, 10, CREATED)
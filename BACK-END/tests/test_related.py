@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from models import db, Category, Question, RelatedQuestions
+from views import related_utils
+from views.related_utils import RelatedIndex, question_features, refresh_related, related_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    related_index.loaded_at = None
+    yield
+    related_index.loaded_at = None
+
+
+def ask(title, description='', category_id=1):
+    question = Question(title=title, description=description, user_id=1,
+                        category_id=category_id, language='Python')
+    db.session.add(question)
+    db.session.commit()
+    refresh_related(question.id)
+    return question.id
+
+
+def auto_list(question_id):
+    rows = RelatedQuestions.query.filter_by(question_id=question_id, is_auto=True)
+    return sorted(row.related_question_id for row in rows)
+
+
+def test_neighbours_drop_a_question_that_drifted_away(app):
+    a = ask('flask sqlalchemy session rollback', 'session rollback after error')
+    b = ask('flask sqlalchemy session commit', 'session commit after error')
+    assert auto_list(a) == [b] and auto_list(b) == [a]
+
+    question = db.session.get(Question, b)
+    question.title, question.description = 'css grid layout', 'centering a div'
+    db.session.add(Category(category_name='Frontend', created_by='admin'))
+    question.category_id = 2
+    db.session.commit()
+    refresh_related(b)
+
+    assert auto_list(b) == []
+    assert auto_list(a) == []  # no stale row pointing at b any more
+
+
+def test_candidates_come_from_selective_features(monkeypatch):
+    monkeypatch.setattr(related_utils, 'MIN_CANDIDATE_DF', 1)
+    index = RelatedIndex()
+    # 99 questions share only the category; one also shares a rare term
+    for question_id in range(1, 100):
+        index._add(question_id, question_features(f'filler{question_id} words', '', 1, []))
+    index._add(100, question_features('alembic downgrade', '', 1, []))
+    index._add(101, question_features('alembic upgrade', '', 1, []))
+
+    assert index.candidates(101, index._vector(101)) == [100]
+    assert index.top_k(101)[0][0] == 100
+
+
+def test_candidates_are_capped(monkeypatch):
+    monkeypatch.setattr(related_utils, 'MAX_CANDIDATES', 10)
+    index = RelatedIndex()
+    for question_id in range(1, 51):
+        index._add(question_id, question_features('flask session', '', 1, []))
+    assert len(index.candidates(1, index._vector(1))) == 10
+
+
+def test_concurrent_refreshes_leave_one_list(app):
+    ids = [ask(f'flask sqlalchemy session {word}', 'session handling')
+           for word in ('rollback', 'commit', 'flush', 'expire', 'merge')]
+
+    def refresh(question_id):
+        with app.app_context():
+            refresh_related(question_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(refresh, ids * 4))
+
+    pairs = [(row.question_id, row.related_question_id)
+             for row in RelatedQuestions.query.filter_by(is_auto=True)]
+    assert len(pairs) == len(set(pairs))
+    for question_id in ids:
+        assert auto_list(question_id) == sorted(set(ids) - {question_id})
@@ -0,0 +1,54 @@
+import pytest
+from models import db, Question, Reports, ReportSummary, ReportReasonCount
+from views.moderation_utils import reconcile_report_summaries
+
+
+@pytest.fixture
+def question(app):
+    question = Question(title='Q', description='d', user_id=1, category_id=1, language='Python')
+    db.session.add(question)
+    db.session.commit()
+    return question.id
+
+
+def report(client, auth, user, question_id, reason):
+    return client.post('/api/reports', json={'category_id': 1, 'question_id': question_id, 'reason': reason},
+                       headers=auth(user))
+
+
+@pytest.mark.parametrize('reason', [None, 5, '   ', ['spam']])
+def test_create_rejects_bad_reason(client, auth, question, reason):
+    response = report(client, auth, 'bob', question, reason)
+    assert response.status_code == 400
+    assert Reports.query.count() == 0
+
+
+@pytest.mark.parametrize('reason', [None, 5, ''])
+def test_update_rejects_bad_reason(client, auth, question, reason):
+    report_id = report(client, auth, 'bob', question, 'spam').get_json()['report']['id']
+    response = client.put(f'/api/reports/{report_id}', json={'reason': reason}, headers=auth('bob'))
+    assert response.status_code == 400
+    assert db.session.get(Reports, report_id).reason == 'spam'
+
+
+def test_owner_can_update_report(client, auth, question):
+    report_id = report(client, auth, 'bob', question, 'spam').get_json()['report']['id']
+    response = client.put(f'/api/reports/{report_id}', json={'reason': 'Off topic'}, headers=auth('bob'))
+    assert response.status_code == 200
+    assert {r.reason: r.count for r in ReportReasonCount.query} == {'spam': 0, 'off topic': 1}
+
+
+def test_reconcile_repairs_drifted_counters(client, auth, question):
+    report(client, auth, 'bob', question, 'Spam')
+    report(client, auth, 'admin', question, 'spam ')
+    assert reconcile_report_summaries() == 0
+
+    ReportSummary.query.update({ReportSummary.report_count: 7, ReportSummary.open_count: 0})
+    ReportReasonCount.query.delete()
+    db.session.commit()
+
+    assert reconcile_report_summaries() == 1
+    summary = db.session.get(ReportSummary, question)
+    assert (summary.report_count, summary.open_count) == (2, 2)
+    assert [(r.reason, r.count) for r in ReportReasonCount.query] == [('spam', 2)]
+    assert reconcile_report_summaries() == 0
@@ -0,0 +1,54 @@
+import pytest
+from models import db, Question
+from views.search_utils import question_index
+
+
+@pytest.fixture
+def questions(app):
+    question_index.loaded_at = None
+    rows = [Question(title=f'flask question {i}', description='flask ' * (i % 3) + 'details', user_id=1,
+                     category_id=1, language='Python') for i in range(7)]
+    rows.append(Question(title='react hooks', description='nothing relevant', user_id=1, category_id=1,
+                         language='JavaScript'))
+    db.session.add_all(rows)
+    db.session.commit()
+    yield
+    question_index.loaded_at = None
+
+
+def test_search_pages_follow_rank(client, questions):
+    first = client.get('/api/questions?search=flask&limit=4').get_json()
+    rest = client.get(f'/api/questions?search=flask&limit=4&cursor={first["next_cursor"]}').get_json()
+    assert rest['next_cursor'] is None
+
+    ids = [q['id'] for q in first['questions'] + rest['questions']]
+    ranked = question_index.search('flask')
+    assert len(ids) == 7 and set(ids) == set(ranked)
+    assert ids == sorted(ids, key=lambda i: (ranked[i], i), reverse=True)
+
+    legacy = client.get('/api/questions?search=flask').get_json()
+    assert [q['id'] for q in legacy] == ids
+
+
+def test_search_respects_other_filters(client, questions):
+    response = client.get('/api/questions?search=flask&language=JavaScript&limit=5').get_json()
+    assert response == {'questions': [], 'next_cursor': None}
+
+
+def test_stale_index_is_rebuilt_with_concurrent_writes(app, client, questions, monkeypatch):
+    from views import search_utils
+
+    client.get('/api/questions?search=flask&limit=1')
+    question_index.loaded_at -= search_utils.INDEX_MAX_AGE + 1
+
+    # A write lands while the rebuild is reading the table
+    build = question_index._build
+    def build_then_write():
+        result = build()
+        question_index.add(999, 'flask late arrival', '')
+        return result
+    monkeypatch.setattr(question_index, '_build', build_then_write)
+
+    client.get('/api/questions?search=flask&limit=1')  # serves, then rebuilds (inline in tests)
+    assert 999 in question_index.search('late')
+    assert not question_index._rebuilding
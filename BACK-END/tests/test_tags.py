@@ -0,0 +1,60 @@
+from models import db, Question, QuestionTags, Tags
+from views.pagination_utils import DEFAULT_LIMIT
+
+
+def tagged_questions(count):
+    tag = Tags(name='python')
+    db.session.add(tag)
+    db.session.flush()
+    for i in range(count):
+        question = Question(title=f'Question {i}', description='d', user_id=1, category_id=1, language='Python')
+        db.session.add(question)
+        db.session.flush()
+        db.session.add(QuestionTags(question_id=question.id, tag_id=tag.id))
+    db.session.commit()
+    return tag.id
+
+
+def test_tag_questions_are_always_paginated(client, auth):
+    tag_id = tagged_questions(DEFAULT_LIMIT + 5)
+
+    first = client.get(f'/api/tags/{tag_id}/questions', headers=auth('alice')).get_json()
+    assert len(first['questions']) == DEFAULT_LIMIT and first['next_cursor']
+
+    rest = client.get(f'/api/tags/{tag_id}/questions?cursor={first["next_cursor"]}', headers=auth('alice')).get_json()
+    assert len(rest['questions']) == 5 and rest['next_cursor'] is None
+
+
+def test_short_tag_listing_still_has_next_cursor(client, auth):
+    tag_id = tagged_questions(2)
+    page = client.get(f'/api/tags/{tag_id}/questions', headers=auth('alice')).get_json()
+    assert len(page['questions']) == 2 and page['next_cursor'] is None
+    assert 'next_cursor' in page
+
+
+def test_only_owner_or_admin_can_replace_tags(client, auth):
+    tag_id = tagged_questions(1)  # question 1, asked by alice
+    url = '/api/questions/1/tags'
+
+    response = client.put(url, json={'tag_ids': []}, headers=auth('bob'))
+    assert response.status_code == 403
+    assert QuestionTags.query.filter_by(question_id=1).count() == 1
+
+    assert client.put(url, json={'tag_ids': []}, headers=auth('alice')).status_code == 200
+    assert client.put(url, json={'tag_ids': [tag_id]}, headers=auth('admin')).status_code == 200
+    assert QuestionTags.query.filter_by(question_id=1).count() == 1
+
+
+def test_update_onto_existing_pair_is_rejected(client, auth):
+    tag_id = tagged_questions(1)
+    other = Tags(name='flask')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add(QuestionTags(question_id=1, tag_id=other.id))
+    db.session.commit()
+    moved = QuestionTags.query.filter_by(tag_id=other.id).one().id
+
+    response = client.put(f'/api/questiontags/{moved}', json={'tag_id': tag_id}, headers=auth('alice'))
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'This tag is already assigned to the question'
+    assert sorted(qt.tag_id for qt in QuestionTags.query) == sorted([tag_id, other.id])
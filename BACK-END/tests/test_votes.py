@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from models import db, Answers, Question, UserStats, Votes
+
+
+@pytest.fixture
+def answer_id(client, auth):
+    # alice asks, bob answers; everyone else votes on bob's answer
+    response = client.post('/api/questions', headers=auth('alice'), json={
+        'title': 'Why are my votes off?', 'description': 'details', 'category_id': 1, 'language': 'Python'
+    })
+    question_id = response.get_json()['question']['id']
+    response = client.post(f'/api/questions/{question_id}/answers', headers=auth('bob'),
+                           json={'content': 'Count them in SQL'})
+    assert response.status_code == 201
+    return response.get_json()['answer']['id']
+
+
+def assert_tally_matches_votes(answer_id):
+    db.session.expire_all()
+    answer = db.session.get(Answers, answer_id)
+    up = Votes.query.filter_by(answer_id=answer_id, vote_type='up').count()
+    down = Votes.query.filter_by(answer_id=answer_id, vote_type='down').count()
+    assert (answer.upvotes, answer.downvotes, answer.score) == (up, down, up - down)
+    assert db.session.get(Question, answer.question_id).vote_total == up - down
+    assert db.session.get(UserStats, answer.user_id).net_votes == up - down
+    return up, down
+
+
+def click_all(app, answer_id, requests):
+    def click(args):
+        headers, vote_type = args
+        with app.test_client() as client:
+            return client.post('/api/votes', headers=headers,
+                               json={'answer_id': answer_id, 'vote_type': vote_type}).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(click, requests))
+
+
+def test_owner_can_update_and_delete_their_vote(client, auth, answer_id):
+    vote = client.post('/api/votes', headers=auth('alice'),
+                       json={'answer_id': answer_id, 'vote_type': 'up'}).get_json()['vote']
+
+    assert client.put(f'/api/votes/{vote["id"]}', headers=auth('admin'), json={'vote_type': 'down'}).status_code == 403
+    response = client.put(f'/api/votes/{vote["id"]}', headers=auth('alice'), json={'vote_type': 'down'})
+    assert response.status_code == 200 and response.get_json()['vote']['vote_type'] == 'down'
+    assert assert_tally_matches_votes(answer_id) == (0, 1)
+
+    assert client.delete(f'/api/votes/{vote["id"]}', headers=auth('admin')).status_code == 403
+    assert client.delete(f'/api/votes/{vote["id"]}', headers=auth('alice')).status_code == 200
+    assert assert_tally_matches_votes(answer_id) == (0, 0)
+
+
+def test_parallel_toggles_converge_on_the_right_tally(app, auth, answer_id):
+    voters = [auth(name) for name in ('alice', 'admin')]
+    # Seven clicks per voter: an odd number of toggles always leaves one vote standing
+    requests = [(headers, 'up') for headers in voters for _ in range(7)]
+
+    statuses = click_all(app, answer_id, requests)
+    assert set(statuses) <= {200, 201}
+    assert assert_tally_matches_votes(answer_id) == (2, 0)
+
+
+def test_parallel_mixed_votes_keep_tallies_consistent(app, auth, answer_id):
+    voters = [auth(name) for name in ('alice', 'admin')]
+    requests = [(headers, vote_type) for headers in voters for vote_type in ('up', 'down') * 5]
+
+    statuses = click_all(app, answer_id, requests)
+    assert set(statuses) <= {200, 201}
+    up, down = assert_tally_matches_votes(answer_id)
+    assert up + down <= len(voters)
+
+
+def test_deleting_a_voter_takes_their_vote_off_the_tally(client, auth, answer_id):
+    client.post('/api/votes', headers=auth('admin'), json={'answer_id': answer_id, 'vote_type': 'up'})
+    client.post('/api/votes', headers=auth('alice'), json={'answer_id': answer_id, 'vote_type': 'down'})
+    assert assert_tally_matches_votes(answer_id) == (1, 1)
+
+    admin_id = db.session.query(Votes.user_id).filter_by(vote_type='up').scalar()
+    assert client.delete(f'/api/users/{admin_id}', headers=auth('admin')).status_code == 200
+    assert assert_tally_matches_votes(answer_id) == (0, 1)
+
+
+def test_recompute_vote_tallies_repairs_drift(client, auth, answer_id):
+    from views.vote_utils import recompute_vote_tallies
+
+    client.post('/api/votes', headers=auth('admin'), json={'answer_id': answer_id, 'vote_type': 'up'})
+    Answers.query.update({Answers.upvotes: 5, Answers.score: 5})
+    db.session.commit()
+
+    assert recompute_vote_tallies() == 1
+    answer = db.session.get(Answers, answer_id)
+    assert (answer.upvotes, answer.downvotes, answer.score) == (1, 0, 1)
@@ -11,3 +11,5 @@ from .followup import *
 from .votes import *
 from .tags import *
 from .questiontags import *
+from .batch import *
+from .admin import *
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func
+from models import db, Category, DailyActivity, DailyQuestionRollup
+from db_pool import pool_status
+from instrumentation import timing_summary
+from .analytics_utils import ACTIVITY_COLUMNS, activity_between, live_window, questions_between
+from .auth import token_required
+
+admin_bp = Blueprint('admin_bp', __name__, url_prefix='/api/admin')
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+
+# -------------------- Dashboard Stats (Admin Only) --------------------
+# Finished days come from the rollup tables and only today is counted live.
+# If the rollup job has fallen behind, stale_days says how many finished days
+# are missing.
+@admin_bp.route('/stats', methods=['GET'])
+@token_required
+def get_stats(current_user):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    days = min(max(request.args.get('days', DEFAULT_DAYS, type=int), 1), MAX_DAYS)
+    now = datetime.utcnow()
+    today = now.date()
+    through, stale_days, live_start = live_window()
+    live_activity = activity_between(live_start, now + timedelta(seconds=1))
+    live_questions = questions_between(live_start, now + timedelta(seconds=1))
+
+    # Totals
+    rolled = db.session.query(*[func.coalesce(func.sum(getattr(DailyActivity, c)), 0) for c in ACTIVITY_COLUMNS]).one()
+    totals = dict(zip(ACTIVITY_COLUMNS, rolled))
+    for counts in live_activity.values():
+        for column in ACTIVITY_COLUMNS:
+            totals[column] += counts[column]
+    totals['users'] = totals.pop('signups')
+    totals.pop('active_users')
+
+    # Per category / language
+    by_category, by_language = {}, {}
+    rolled_questions = db.session.query(
+        DailyQuestionRollup.category_id, DailyQuestionRollup.language,
+        func.sum(DailyQuestionRollup.questions), func.sum(DailyQuestionRollup.solved)
+    ).group_by(DailyQuestionRollup.category_id, DailyQuestionRollup.language).all()
+    for category_id, language, n, solved in rolled_questions + [row[1:] for row in live_questions]:
+        for bucket, key in ((by_category, category_id), (by_language, language)):
+            entry = bucket.setdefault(key, {'questions': 0, 'solved': 0})
+            entry['questions'] += n
+            entry['solved'] += solved
+
+    names = dict(db.session.query(Category.id, Category.category_name).filter(Category.id.in_(by_category)))
+    solved = sum(entry['solved'] for entry in by_category.values())
+    totals['solved'] = solved
+    totals['solved_ratio'] = round(solved / totals['questions'], 4) if totals['questions'] else 0
+
+    # Daily volume for the last `days` days
+    first_day = today - timedelta(days=days - 1)
+    daily = {
+        row.day: {column: getattr(row, column) for column in ACTIVITY_COLUMNS}
+        for row in DailyActivity.query.filter(DailyActivity.day >= first_day)
+    }
+    daily.update({day: counts for day, counts in live_activity.items() if day >= first_day})
+    empty = dict.fromkeys(ACTIVITY_COLUMNS, 0)
+
+    return jsonify({
+        'totals': totals,
+        'by_category': [
+            dict(entry, category_id=key, category_name=names.get(key)) for key, entry in sorted(by_category.items())
+        ],
+        'by_language': [dict(entry, language=key) for key, entry in sorted(by_language.items())],
+        'daily': [
+            dict(daily.get(day, empty), date=day.isoformat())
+            for day in (first_day + timedelta(days=i) for i in range(days))
+        ],
+        'rolled_up_through': through.isoformat() if through else None,
+        'stale_days': stale_days
+    }), 200
+
+# -------------------- Connection Pool Stats (Admin Only) --------------------
+@admin_bp.route('/pool', methods=['GET'])
+@token_required
+def get_pool_stats(current_user):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    return jsonify(pool_status(db.engine)), 200
+
+# -------------------- Request Timings (Admin Only) --------------------
+# Rolling latency, DB time and query counts per endpoint and blueprint
+@admin_bp.route('/timings', methods=['GET'])
+@token_required
+def get_request_timings(current_user):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
+    return jsonify(timing_summary()), 200
@@ -0,0 +1,158 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func, select, union_all
+from models import db, User, Question, Answers, FollowUp, Reports, DailyActivity, DailyQuestionRollup
+from .db_utils import dialect_insert
+
+# Days re-scanned on each run, so late changes to recent questions that
+# bypassed rollup_question_change() still reach the rollups; older ones
+# need --full.
+LOOKBACK_DAYS = 7
+CHUNK_DAYS = 31
+ACTIVITY_COLUMNS = ('questions', 'answers', 'reports', 'signups', 'active_users')
+
+def _as_date(value):
+    # func.date() comes back as a date on Postgres and as text on SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def _midnight(day):
+    return datetime.combine(day, datetime.min.time())
+
+def _per_day(model, start, end):
+    day = func.date(model.created_at)
+    rows = db.session.query(day, func.count()) \
+        .filter(model.created_at >= start, model.created_at < end) \
+        .group_by(day).all()
+    return {_as_date(d): n for d, n in rows}
+
+def _active_per_day(start, end):
+    contributions = union_all(*[
+        select(func.date(model.created_at).label('day'), model.user_id.label('user_id'))
+        .where(model.created_at >= start, model.created_at < end)
+        for model in (Question, Answers, FollowUp)
+    ]).subquery()
+    rows = db.session.query(contributions.c.day, func.count(func.distinct(contributions.c.user_id))) \
+        .group_by(contributions.c.day).all()
+    return {_as_date(d): n for d, n in rows}
+
+def activity_between(start, end):
+    """{day: {questions, answers, ...}} for created_at in [start, end)."""
+    counts = {
+        'questions': _per_day(Question, start, end),
+        'answers': _per_day(Answers, start, end),
+        'reports': _per_day(Reports, start, end),
+        'signups': _per_day(User, start, end),
+        'active_users': _active_per_day(start, end),
+    }
+    days = {}
+    for column, per_day in counts.items():
+        for day, n in per_day.items():
+            days.setdefault(day, dict.fromkeys(ACTIVITY_COLUMNS, 0))[column] = n
+    return days
+
+def questions_between(start, end):
+    """[(day, category_id, language, questions, solved)] for created_at in [start, end)."""
+    day = func.date(Question.created_at)
+    rows = db.session.query(
+        day, Question.category_id, Question.language,
+        func.count(), func.sum(case((Question.is_solved.is_(True), 1), else_=0))
+    ).filter(Question.created_at >= start, Question.created_at < end) \
+        .group_by(day, Question.category_id, Question.language).all()
+    return [(_as_date(d), category_id, language, n, solved or 0) for d, category_id, language, n, solved in rows]
+
+def rolled_up_through():
+    return db.session.query(func.max(DailyActivity.day)).scalar()
+
+def live_window():
+    """(rolled_up_through, stale_days, live_start) for /api/admin/stats.
+
+    Only today is counted live, so the endpoint costs the same however far
+    behind the scheduled job is. Finished days the job hasn't rolled up yet
+    are missing from the figures; stale_days says how many (None before the
+    first rollup). Catching up is left to `flask rollup-stats`.
+    """
+    today = datetime.utcnow().date()
+    through = rolled_up_through()
+    stale_days = (today - timedelta(days=1) - through).days if through else None
+    return through, stale_days, _midnight(today)
+
+def _first_day():
+    firsts = [db.session.query(func.min(model.created_at)).scalar() for model in (User, Question)]
+    firsts = [f for f in firsts if f is not None]
+    return min(firsts).date() if firsts else None
+
+def question_bucket(question):
+    """The rollup bucket a question counts in: (category_id, language, is_solved)."""
+    return question.category_id, question.language, bool(question.is_solved)
+
+def rollup_question_change(created_at, old, new):
+    """Move a question between buckets of an already rolled-up day.
+
+    old and new are question_bucket() tuples; new is None for a deleted
+    question. Questions are usually solved, recategorized or deleted long
+    after the day they were asked, past the lookback, so the views that
+    change them call this in their own transaction. Days not rolled up yet
+    are left alone: the next run counts them from the questions.
+    """
+    if old == new or created_at is None:
+        return
+    day = created_at.date()
+    through = rolled_up_through()
+    if through is None or day > through:
+        return
+    for bucket, delta in ((old, -1), (new, 1)):
+        if bucket is None:
+            continue
+        category_id, language, solved = bucket
+        stmt = dialect_insert(DailyQuestionRollup).values(
+            day=day, category_id=category_id, language=language, questions=delta, solved=delta if solved else 0
+        )
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['day', 'category_id', 'language'],
+            set_={
+                'questions': DailyQuestionRollup.questions + stmt.excluded.questions,
+                'solved': DailyQuestionRollup.solved + stmt.excluded.solved,
+            }
+        ))
+
+def rollup_stats(full=False, lookback=LOOKBACK_DAYS):
+    """Bring the daily rollups up to yesterday. Returns the number of days written.
+
+    Meant to run on a schedule (e.g. hourly cron: `flask rollup-stats`). Each
+    run only re-scans the days since the last one plus a short lookback.
+    """
+    today = datetime.utcnow().date()
+    if full:
+        DailyActivity.query.delete(synchronize_session=False)
+        DailyQuestionRollup.query.delete(synchronize_session=False)
+    last = None if full else rolled_up_through()
+    start = last - timedelta(days=lookback) if last else _first_day()
+    if start is None or start >= today:
+        db.session.commit()
+        return 0
+
+    written = 0
+    while start < today:
+        end = min(start + timedelta(days=CHUNK_DAYS), today)
+        lo, hi = _midnight(start), _midnight(end)
+        activity = activity_between(lo, hi)
+        questions = questions_between(lo, hi)
+
+        DailyActivity.query.filter(DailyActivity.day >= start, DailyActivity.day < end).delete(synchronize_session=False)
+        DailyQuestionRollup.query.filter(
+            DailyQuestionRollup.day >= start, DailyQuestionRollup.day < end
+        ).delete(synchronize_session=False)
+
+        # A row for every day, including quiet ones, so the watermark keeps moving
+        span = (end - start).days
+        db.session.add_all([
+            DailyActivity(day=day, **activity.get(day, dict.fromkeys(ACTIVITY_COLUMNS, 0)))
+            for day in (start + timedelta(days=i) for i in range(span))
+        ])
+        db.session.add_all([
+            DailyQuestionRollup(day=day, category_id=category_id, language=language, questions=n, solved=solved)
+            for day, category_id, language, n, solved in questions
+        ])
+        db.session.commit()
+        written += span
+        start = end
+    return written
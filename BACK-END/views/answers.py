@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Answers, Question, User, Notifications, FollowUp  # ✅ FollowUp added
+from models import db, Answers, Question, User, FollowUp  # ✅ FollowUp added
+from .notify_utils import add_notification
+from .ranking_utils import record_activity
+from .reputation_utils import bump_user_stats
 
 answers_bp = Blueprint('answers_bp', __name__, url_prefix='/api')
 
@@ -11,7 +14,10 @@ def serialize_answer(answer):
         'content': answer.content,
         'question_id': answer.question_id,
         'user_id': answer.user_id,
-        'created_at': answer.created_at.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        'upvotes': answer.upvotes,
+        'downvotes': answer.downvotes,
+        'score': answer.score,
+        'created_at': answer.created_at.strftime('%a, %d %b %Y %H:%M:%S GMT') if answer.created_at else None
     }
 
 # CREATE Answer (with notification to question owner + thread contributors)
@@ -32,15 +38,16 @@ def create_answer(question_id):
 
     new_answer = Answers(content=content, question_id=question_id, user_id=user_id)
     db.session.add(new_answer)
+    record_activity(question_id, answers=1)
+    bump_user_stats(user_id, answers_given=1)
 
     # ✅ Notify the question owner (if not the same as the answerer)
     if question.user_id != user_id:
-        notification = Notifications(
+        add_notification(
             user_id=question.user_id,
             type='answer',
             message=f'{user.username} answered your question: "{question.title}"'
         )
-        db.session.add(notification)
 
     # ✅ Notify previous contributors (excluding current user and question owner)
     contributor_ids = set()
@@ -59,12 +66,11 @@ def create_answer(question_id):
 
     # Send notifications
     for uid in contributor_ids:
-        notif = Notifications(
+        add_notification(
             user_id=uid,
             type='thread',
             message=f'{user.username} also contributed to a thread you’re part of.'
         )
-        db.session.add(notif)
 
     db.session.commit()
 
@@ -90,19 +96,25 @@ def approve_answer(answer_id):
     if not answer:
         return jsonify({'error': 'Answer not found'}), 404
 
+    if not answer.is_approved:
+        bump_user_stats(answer.user_id, approved_answers=1)
     answer.is_approved = True
     db.session.commit()
 
     return jsonify({'success': 'Answer approved successfully'}), 200
 
-# READ: Get all answers for a question
+# READ: Get all answers for a question (?sort=score for best first)
 @answers_bp.route('/questions/<int:question_id>/answers', methods=['GET'])
 def get_answers_for_question(question_id):
     question = Question.query.get(question_id)
     if not question:
         return jsonify({'error': 'Question not found'}), 404
 
-    answers = Answers.query.filter_by(question_id=question_id).all()
+    query = Answers.query.filter_by(question_id=question_id)
+    if request.args.get('sort') == 'score':
+        query = query.order_by(Answers.score.desc(), Answers.created_at)
+
+    answers = query.all()
     return jsonify([serialize_answer(answer) for answer in answers]), 200
 
 # READ: Get answer by ID
@@ -146,6 +158,11 @@ def delete_answer(answer_id):
     if answer.user_id != user_id:
         return jsonify({'error': 'Unauthorized to delete this answer'}), 403
 
+    # Its follow-ups and votes go with it (cascade), so take them off the question too
+    record_activity(answer.question_id, answers=-1, followups=-len(answer.follow_ups),
+                    votes=-answer.score, touch=False)
+    bump_user_stats(answer.user_id, answers_given=-1, approved_answers=-int(bool(answer.is_approved)),
+                    net_votes=-answer.score)
     db.session.delete(answer)
     db.session.commit()
     return jsonify({'success': 'Answer deleted successfully'}), 200
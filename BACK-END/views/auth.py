@@ -1,14 +1,16 @@
 import jwt
 import datetime
+import threading
+from collections import namedtuple
+from cachetools import TTLCache
 from flask import Blueprint, request, jsonify
 from models import db, User
 from functools import wraps
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 from werkzeug.security import generate_password_hash, check_password_hash
 from urllib.parse import urlencode
 from extensions import mail # Required for app context
 from views.email_utils import send_reset_email  # ✅ Import helper function
+from views.google_auth_utils import google_verifier
 
 # Set up blueprint with prefix
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -38,6 +40,46 @@ def decode_jwt(token):
     except jwt.InvalidTokenError:
         return None
 
+# -------------------- Authenticated-User Cache --------------------
+# token_required hands views a read-only snapshot instead of an ORM row, so the
+# users table is only hit on a miss. Anything that changes these fields must
+# call invalidate_cached_user().
+
+UserSnapshot = namedtuple('UserSnapshot', ['id', 'username', 'email', 'is_admin', 'is_active'])
+
+USER_CACHE_TTL = 300  # seconds; bounds staleness across worker processes
+USER_CACHE_SIZE = 10000
+
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
+user_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+def get_cached_user(user_id):
+    with _user_cache_lock:
+        snapshot = _user_cache.get(user_id)
+    if snapshot is not None:
+        user_cache_stats['hits'] += 1
+        return snapshot
+
+    user_cache_stats['misses'] += 1
+    user = User.query.get(user_id)
+    if not user:
+        return None
+
+    snapshot = UserSnapshot(user.id, user.username, user.email, user.is_admin, user.is_active)
+    with _user_cache_lock:
+        _user_cache[user_id] = snapshot
+    return snapshot
+
+def invalidate_cached_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+    user_cache_stats['invalidations'] += 1
+
+# (token, claims) of a JWT already verified for this request. views/batch.py
+# hands it to its sub-requests, so a batch verifies its token once.
+VERIFIED_JWT_KEY = 'moringadesk.verified_jwt'
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -51,11 +93,13 @@ def token_required(f):
         if not token:
             return jsonify({'error': 'Token is missing!'}), 401
 
-        data = decode_jwt(token)
+        verified = request.environ.get(VERIFIED_JWT_KEY)
+        data = verified[1] if verified and verified[0] == token else decode_jwt(token)
         if not data:
             return jsonify({'error': 'Token is invalid or expired!'}), 401
+        request.environ[VERIFIED_JWT_KEY] = (token, data)
 
-        user = User.query.get(data['id'])
+        user = get_cached_user(data['id'])
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
@@ -116,7 +160,7 @@ def google_login():
     token = data.get('token')
 
     try:
-        idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), GOOGLE_CLIENT_ID)
+        idinfo = google_verifier().verify(token, GOOGLE_CLIENT_ID)
 
         email = idinfo['email']
         username = idinfo.get('name', email.split('@')[0])
@@ -172,7 +216,7 @@ def forgot_password():
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)
     }, SECRET_KEY, algorithm='HS256')
 
-    send_reset_email(user.email, reset_token)  # ✅ Now using the utility function
+    send_reset_email(user.email, reset_token)  # queued; the outbox worker sends it
 
     return jsonify({'success': 'Reset link sent to email'}), 200
 
@@ -198,5 +242,6 @@ def reset_password():
 
     user.password = generate_password_hash(new_password)
     db.session.commit()
+    invalidate_cached_user(user.id)
 
     return jsonify({'success': 'Password updated successfully'}), 200
@@ -0,0 +1,73 @@
+from flask import Blueprint, request, jsonify, current_app
+from models import db
+from .auth import VERIFIED_JWT_KEY, token_required
+
+batch_bp = Blueprint('batch_bp', __name__, url_prefix='/api')
+
+MAX_BATCH_SIZE = 50
+ALLOWED_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+# Endpoints that can't be answered inside a batch (recursive or never-ending)
+EXCLUDED_PATHS = {'/api/batch', '/api/notifications/stream'}
+
+def validate_sub_request(sub):
+    if not isinstance(sub, dict):
+        return 'Each sub-request must be an object'
+    method = str(sub.get('method', 'GET')).upper()
+    path = sub.get('path')
+    if method not in ALLOWED_METHODS:
+        return f'Unsupported method {method}'
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return 'path must start with /api/'
+    if path.split('?', 1)[0].rstrip('/') in EXCLUDED_PATHS:
+        return f'{path} cannot be batched'
+    return None
+
+# RUN several API calls in one HTTP request
+@batch_bp.route('/batch', methods=['POST'])
+@token_required
+def run_batch(current_user):
+    """Dispatch an array of {method, path, body} through the normal views.
+
+    Sub-requests run in order, in-process, inside this request's app
+    context. The DB session is rolled back and removed after each one, so
+    uncommitted changes or loaded rows never carry over to the next. They
+    reuse the caller's Authorization header; the token was verified once
+    above and token_required views reuse those claims instead of decoding
+    it again (jwt_required views still check the signature themselves).
+    Each gets its own status; one failing doesn't stop the rest.
+    """
+    subs = request.get_json(silent=True)
+    if not isinstance(subs, list) or not subs:
+        return jsonify({'error': 'Body must be a non-empty array of sub-requests'}), 400
+    if len(subs) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} sub-requests per batch'}), 400
+
+    for sub in subs:
+        error = validate_sub_request(sub)
+        if error:
+            return jsonify({'error': error}), 400
+
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    verified = {VERIFIED_JWT_KEY: request.environ[VERIFIED_JWT_KEY]}
+    results = []
+    for sub in subs:
+        method = str(sub.get('method', 'GET')).upper()
+        body = sub.get('body')
+        with current_app.test_request_context(sub['path'], method=method, headers=headers,
+                                              environ_base=verified,
+                                              json=body if body is not None else None):
+            try:
+                response = current_app.full_dispatch_request()
+                results.append({
+                    'status': response.status_code,
+                    'body': response.get_json(silent=True)
+                })
+            except Exception:
+                current_app.logger.exception('Batch sub-request %s %s failed', method, sub['path'])
+                results.append({'status': 500, 'body': {'error': 'Internal server error'}})
+            finally:
+                # Whatever the sub-request left uncommitted dies with it
+                db.session.rollback()
+                db.session.remove()
+
+    return jsonify(results), 200
@@ -0,0 +1,53 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from flask import current_app, request
+
+# -------------------- Versioned response cache --------------------
+# Serialized JSON for small, rarely-changing listings, keyed by a per-resource
+# version that the write handlers bump. The ETag is a hash of the body, so
+# every worker produces the same tag for the same content.
+
+RESPONSE_CACHE_TTL = 30  # seconds; bounds staleness in other worker processes
+
+CacheEntry = namedtuple('CacheEntry', ['version', 'etag', 'body', 'stored_at'])
+
+_versions = {}
+_entries = {}
+_lock = threading.Lock()
+response_cache_stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+def bump_version(resource):
+    """Call after committing any change to resource."""
+    with _lock:
+        _versions[resource] = _versions.get(resource, 0) + 1
+        _entries.pop(resource, None)
+
+def _respond(entry):
+    if request.if_none_match.contains(entry.etag):
+        response_cache_stats['not_modified'] += 1
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate with If-None-Match
+    return response
+
+def cached_json_response(resource, build):
+    """Serve build()'s JSON payload for resource, from cache when current."""
+    with _lock:
+        version = _versions.get(resource, 0)
+        entry = _entries.get(resource)
+
+    if entry and entry.version == version and time.monotonic() - entry.stored_at < RESPONSE_CACHE_TTL:
+        response_cache_stats['hits'] += 1
+        return _respond(entry)
+
+    response_cache_stats['misses'] += 1
+    body = current_app.json.dumps(build()).encode() + b'\n'
+    entry = CacheEntry(version, hashlib.sha256(body).hexdigest()[:32], body, time.monotonic())
+    with _lock:
+        if _versions.get(resource, 0) == version:
+            _entries[resource] = entry
+    return _respond(entry)
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Category
+from .cache_utils import bump_version, cached_json_response
 
 categories_bp = Blueprint('categories_bp', __name__, url_prefix='/api')
 
@@ -27,13 +28,13 @@ def create_category():
     category = Category(category_name=category_name, created_by=str(user_id))
     db.session.add(category)
     db.session.commit()
+    bump_version('categories')
     return jsonify({'message': 'Category created successfully', 'category': serialize_category(category)}), 201
 
 # READ all
 @categories_bp.route('/categories', methods=['GET'])
 def get_categories():
-    categories = Category.query.all()
-    return jsonify([serialize_category(c) for c in categories]), 200
+    return cached_json_response('categories', lambda: [serialize_category(c) for c in Category.query.all()])
 
 # READ one
 @categories_bp.route('/categories/<int:id>', methods=['GET'])
@@ -56,6 +57,7 @@ def update_category(id):
     if category_name:
         category.category_name = category_name
         db.session.commit()
+        bump_version('categories')
     return jsonify({'message': 'Category updated successfully', 'category': serialize_category(category)}), 200
 
 # DELETE
@@ -72,4 +74,5 @@ def delete_category(id):
 
     db.session.delete(category)
     db.session.commit()
+    bump_version('categories')
     return jsonify({'message': 'Category deleted successfully'}), 200
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+
+def dialect_insert(model):
+    """INSERT construct for the active backend, with .on_conflict_do_* support.
+
+    Both Postgres and SQLite (3.24+) understand INSERT ... ON CONFLICT, but
+    SQLAlchemy only exposes it through the dialect-specific insert().
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
@@ -1,12 +1,36 @@
+import threading
+from datetime import datetime, timedelta
 from flask_mail import Message
 from extensions import mail  # make sure mail is globally imported from app.py
 from flask import current_app
+from models import db, MailOutbox
+
+# -------------------- Outbox --------------------
+# Mail is written to the mail_outbox table and sent by a background worker,
+# so request handlers never wait on SMTP.
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30  # doubles after every failed attempt
+MAX_BACKOFF_SECONDS = 3600
+BATCH_SIZE = 50
+POLL_INTERVAL = 10
+CLAIM_SECONDS = 300  # longer than any SMTP batch should take
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+def enqueue_email(recipient, subject, body):
+    """Add a message to the outbox. The caller commits."""
+    message = MailOutbox(recipient=recipient, subject=subject, body=body)
+    db.session.add(message)
+    return message
 
 def send_reset_email(to_email, reset_token):
-    msg = Message(
-        subject="Password Reset - MoringaDesk",
-        recipients=[to_email],
-        body=f"""
+    enqueue_email(
+        to_email,
+        "Password Reset - MoringaDesk",
+        f"""
         Hello,
 
         Click the link below to reset your password:
@@ -19,5 +43,133 @@ def send_reset_email(to_email, reset_token):
         MoringaDesk Team
         """
     )
-    with current_app.app_context():
-        mail.send(msg)
+    db.session.commit()
+    wake_outbox_worker()
+
+def _record_failure(message, error, now):
+    # attempts was already counted when the row was claimed
+    message.last_error = str(error)[:2000]
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = 'dead'
+        message.body = ''
+        current_app.logger.error('Mail %s to %s dead after %d attempts: %s',
+                                 message.id, message.recipient, message.attempts, error)
+    else:
+        message.status = 'pending'
+        delay = min(BACKOFF_SECONDS * 2 ** (message.attempts - 1), MAX_BACKOFF_SECONDS)
+        message.next_attempt_at = now + timedelta(seconds=delay)
+
+def _claim(batch_size, now):
+    # Short transaction: mark due rows 'sending' and commit before any SMTP
+    # traffic, so no row lock is held while talking to the mail server. A
+    # claim that is never settled (the worker died) expires after
+    # CLAIM_SECONDS and the message is picked up again. The attempt is
+    # counted here rather than on failure, so a message that keeps killing
+    # its worker still runs out of attempts and is dead-lettered.
+    expired = MailOutbox.query \
+        .filter(MailOutbox.status == 'sending', MailOutbox.next_attempt_at <= now,
+                MailOutbox.attempts >= MAX_ATTEMPTS) \
+        .update({
+            MailOutbox.status: 'dead',
+            MailOutbox.body: '',
+            MailOutbox.last_error: 'Claim expired without a result',
+        }, synchronize_session=False)
+    if expired:
+        current_app.logger.error('%d mail(s) dead after %d unsettled claims', expired, MAX_ATTEMPTS)
+    batch = MailOutbox.query \
+        .filter(MailOutbox.status.in_(('pending', 'sending')), MailOutbox.next_attempt_at <= now,
+                MailOutbox.attempts < MAX_ATTEMPTS) \
+        .order_by(MailOutbox.next_attempt_at) \
+        .limit(batch_size) \
+        .with_for_update(skip_locked=True) \
+        .all()
+    claimed = [(m.id, m.recipient, m.subject, m.body) for m in batch]
+    for message in batch:
+        message.status = 'sending'
+        message.attempts += 1
+        message.next_attempt_at = now + timedelta(seconds=CLAIM_SECONDS)
+    db.session.commit()
+    return claimed
+
+def process_outbox(batch_size=BATCH_SIZE):
+    """Send one batch of due messages over a single SMTP connection.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED in a short transaction, so
+    several workers can drain the same outbox. Bodies are blanked once a
+    message is sent or dead, so password-reset links don't outlive
+    delivery. Returns the number of messages handled.
+    """
+    now = datetime.utcnow()
+    claimed = _claim(batch_size, now)
+    if not claimed:
+        return 0
+
+    sent, errors = [], {}
+    try:
+        with mail.connect() as connection:
+            for message_id, recipient, subject, body in claimed:
+                try:
+                    connection.send(Message(subject=subject, recipients=[recipient], body=body))
+                    sent.append(message_id)
+                except Exception as e:
+                    errors[message_id] = e
+    except Exception as e:
+        # Could not connect (or the connection dropped): retry everything unsent
+        for message_id, *_ in claimed:
+            if message_id not in sent:
+                errors.setdefault(message_id, e)
+
+    if sent:
+        MailOutbox.query.filter(MailOutbox.id.in_(sent), MailOutbox.status == 'sending').update({
+            MailOutbox.status: 'sent',
+            MailOutbox.sent_at: datetime.utcnow(),
+            MailOutbox.body: '',
+        }, synchronize_session=False)
+    if errors:
+        for message in MailOutbox.query.filter(MailOutbox.id.in_(list(errors)), MailOutbox.status == 'sending'):
+            _record_failure(message, errors[message.id], now)
+    db.session.commit()
+    return len(claimed)
+
+def outbox_depth():
+    """Pending messages, for monitoring."""
+    return MailOutbox.query.filter(MailOutbox.status.in_(('pending', 'sending'))).count()
+
+# -------------------- Worker --------------------
+def run_outbox_worker(app, once=False):
+    with app.app_context():
+        while True:
+            # Clear before draining: a wake-up that arrives mid-batch then
+            # survives until the wait below instead of being wiped out
+            _wakeup.clear()
+            try:
+                handled = process_outbox()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Mail outbox batch failed')
+                handled = 0
+            finally:
+                db.session.remove()
+
+            if once and not handled:
+                return
+            if not handled:
+                _wakeup.wait(POLL_INTERVAL)
+
+def wake_outbox_worker():
+    """Nudge the in-process worker, starting it on first use.
+
+    Set MAIL_OUTBOX_WORKER = False when a dedicated `flask mail-worker`
+    process drains the outbox instead.
+    """
+    global _worker
+    app = current_app._get_current_object()
+    if not app.config.get('MAIL_OUTBOX_WORKER', True):
+        return
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_outbox_worker, args=(app,),
+                                       name='moringadesk-mail', daemon=True)
+            _worker.start()
+    _wakeup.set()
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, FAQs
+from .cache_utils import bump_version, cached_json_response
 
 faqs_bp = Blueprint('faqs_bp', __name__, url_prefix='/api')
 
@@ -30,13 +31,15 @@ def create_faq():
     faq = FAQs(question=question, answer=answer, created_by=str(user_id))
     db.session.add(faq)
     db.session.commit()
+    bump_version('faqs')
     return jsonify({'message': 'FAQ created successfully', 'faq': serialize_faq(faq)}), 201
 
 # READ all FAQs
 @faqs_bp.route('/faqs', methods=['GET'])
 def get_faqs():
-    faqs = FAQs.query.order_by(FAQs.created_at.desc()).all()
-    return jsonify([serialize_faq(f) for f in faqs]), 200
+    return cached_json_response(
+        'faqs', lambda: [serialize_faq(f) for f in FAQs.query.order_by(FAQs.created_at.desc()).all()]
+    )
 
 # READ one FAQ
 @faqs_bp.route('/faqs/<int:id>', methods=['GET'])
@@ -64,6 +67,7 @@ def update_faq(id):
         faq.answer = answer
 
     db.session.commit()
+    bump_version('faqs')
     return jsonify({'message': 'FAQ updated successfully', 'faq': serialize_faq(faq)}), 200
 
 # DELETE FAQ
@@ -76,4 +80,5 @@ def delete_faq(id):
 
     db.session.delete(faq)
     db.session.commit()
+    bump_version('faqs')
     return jsonify({'message': 'FAQ deleted successfully'}), 200
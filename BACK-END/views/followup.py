@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, FollowUp, Answers, Question, Notifications, User
+from models import db, FollowUp, Answers, Question, User
 from datetime import datetime  # noqa: F401
+from .notify_utils import add_notification
+from .ranking_utils import record_activity
+from .stream_utils import stream_json
 
 followup_bp = Blueprint('followup_bp', __name__, url_prefix='/api')
 
@@ -13,7 +16,7 @@ def serialize_followup(followup):
         'question_id': followup.question_id,
         'answer_id': followup.answer_id,
         'content': followup.content,
-        'created_at': followup.created_at.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        'created_at': followup.created_at.strftime('%a, %d %b %Y %H:%M:%S GMT') if followup.created_at else None
     }
 
 # CREATE follow-up (notifies all previous contributors)
@@ -37,6 +40,7 @@ def create_followup():
         content=content
     )
     db.session.add(followup)
+    record_activity(question_id, followups=1)
 
     notified_user_ids = set()
     current_user = User.query.get(user_id)
@@ -44,36 +48,33 @@ def create_followup():
     # Notify question owner
     question = Question.query.get(question_id)
     if question and question.user_id != user_id:
-        notification = Notifications(
+        add_notification(
             user_id=question.user_id,
             type='followup',
             message=f"{current_user.username} followed up on your question: '{question.title}'"
         )
-        db.session.add(notification)
         notified_user_ids.add(question.user_id)
 
     # Notify all users who answered the question
     answer_users = db.session.query(Answers.user_id).filter_by(question_id=question_id).distinct()
     for row in answer_users:
         if row.user_id != user_id and row.user_id not in notified_user_ids:
-            notification = Notifications(
+            add_notification(
                 user_id=row.user_id,
                 type='followup',
                 message=f"{current_user.username} added a follow-up to a question you answered."
             )
-            db.session.add(notification)
             notified_user_ids.add(row.user_id)
 
     # Notify all previous follow-up authors
     followup_users = db.session.query(FollowUp.user_id).filter_by(question_id=question_id).distinct()
     for row in followup_users:
         if row.user_id != user_id and row.user_id not in notified_user_ids:
-            notification = Notifications(
+            add_notification(
                 user_id=row.user_id,
                 type='followup',
                 message=f"{current_user.username} added a follow-up to a thread you contributed to."
             )
-            db.session.add(notification)
             notified_user_ids.add(row.user_id)
 
     db.session.commit()
@@ -83,8 +84,7 @@ def create_followup():
 # READ all follow-ups
 @followup_bp.route('/followups', methods=['GET'])
 def get_all_followups():
-    followups = FollowUp.query.order_by(FollowUp.created_at.desc()).all()
-    return jsonify([serialize_followup(f) for f in followups]), 200
+    return stream_json(FollowUp.query.order_by(FollowUp.created_at.desc()), serialize_followup)
 
 # READ one follow-up
 @followup_bp.route('/followups/<int:id>', methods=['GET'])
@@ -125,6 +125,8 @@ def delete_followup(id):
     if followup.user_id != user_id:
         return jsonify({'message': 'Unauthorized'}), 403
 
+    if followup.question_id:
+        record_activity(followup.question_id, followups=-1, touch=False)
     db.session.delete(followup)
     db.session.commit()
     return jsonify({'message': 'Follow-up deleted successfully'}), 200
@@ -0,0 +1,122 @@
+import re
+import threading
+import time
+import requests
+from flask import current_app
+from google.auth import jwt as google_jwt
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ['accounts.google.com', 'https://accounts.google.com']
+DEFAULT_MAX_AGE = 300   # used when the response has no Cache-Control max-age
+REFRESH_AHEAD = 0.8     # refresh in the background after 80% of max-age
+CLOCK_SKEW_SECONDS = 10
+UNKNOWN_KEY_COOLDOWN = 60  # min seconds between refetches triggered by unknown key ids
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens against an in-memory copy of Google's certs.
+
+    Certs are fetched over a pooled requests.Session, cached for the
+    Cache-Control max-age Google sends, and refreshed in a background
+    thread shortly before they expire, so steady-state logins do no I/O.
+    A token signed with an unknown key id triggers a refetch (Google may have
+    rotated keys), but at most once per UNKNOWN_KEY_COOLDOWN, so a stream of
+    forged key ids can't turn every login into a request to Google.
+    """
+
+    def __init__(self, certs_url=GOOGLE_CERTS_URL, session=None):
+        self.certs_url = certs_url
+        self.session = session or requests.Session()
+        self.stats = {'fetches': 0, 'hits': 0, 'refresh_errors': 0, 'unknown_key_rejections': 0}
+        self._certs = None
+        self._refresh_at = 0
+        self._expires_at = 0
+        self._fetched_at = None
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+
+    def _fetch(self):
+        response = self.session.get(self.certs_url, timeout=5)
+        response.raise_for_status()
+        match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+        now = time.monotonic()
+        self._certs = response.json()
+        self._refresh_at = now + max_age * REFRESH_AHEAD
+        self._expires_at = now + max_age
+        self._fetched_at = now
+        self.stats['fetches'] += 1
+
+    def _refresh_in_background(self):
+        try:
+            with self._fetch_lock:
+                self._fetch()
+        except Exception:
+            # Keep serving the current certs until they actually expire
+            self.stats['refresh_errors'] += 1
+        finally:
+            self._refreshing = False
+
+    def certs(self, force=False):
+        now = time.monotonic()
+        if force or self._certs is None or now >= self._expires_at:
+            with self._fetch_lock:
+                if force or self._certs is None or time.monotonic() >= self._expires_at:
+                    self._fetch()
+            return self._certs
+
+        if now >= self._refresh_at and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+        self.stats['hits'] += 1
+        return self._certs
+
+    def _certs_after_unknown_key(self, seen):
+        # Refetch unless the certs changed since `seen` was read, or were
+        # fetched within the cooldown (then the key id really is unknown)
+        with self._fetch_lock:
+            if self._certs is not seen:
+                return self._certs
+            if self._fetched_at is not None and time.monotonic() - self._fetched_at < UNKNOWN_KEY_COOLDOWN:
+                return seen
+            self._fetch()
+            return self._certs
+
+    def verify(self, token, audience):
+        """Same checks as google.oauth2.id_token.verify_oauth2_token.
+
+        Raises ValueError if the token is invalid.
+        """
+        certs = self.certs()
+        try:
+            idinfo = google_jwt.decode(token, certs=certs, audience=audience,
+                                       clock_skew_in_seconds=CLOCK_SKEW_SECONDS)
+        except ValueError as e:
+            # Google may have rotated keys before our copy expired
+            if 'Certificate for key id' not in str(e):
+                raise
+            fresh = self._certs_after_unknown_key(certs)
+            if fresh is certs:
+                self.stats['unknown_key_rejections'] += 1
+                raise
+            idinfo = google_jwt.decode(token, certs=fresh, audience=audience,
+                                       clock_skew_in_seconds=CLOCK_SKEW_SECONDS)
+
+        if idinfo.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError('Wrong issuer')
+        return idinfo
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+def google_verifier():
+    """Process-wide verifier; GOOGLE_CERTS_URL in the app config overrides the URL."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = GoogleTokenVerifier(current_app.config.get('GOOGLE_CERTS_URL', GOOGLE_CERTS_URL))
+    return _verifier
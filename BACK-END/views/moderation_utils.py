@@ -0,0 +1,170 @@
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import case, func, or_
+from models import db, Question, Reports, ReportSummary, ReportReasonCount
+from .db_utils import dialect_insert
+
+DEFAULT_AUTO_HIDE_THRESHOLD = 5
+TOP_REASONS = 3
+
+def auto_hide_threshold():
+    """Open reports that hide a question pending review; 0 turns auto-hiding off."""
+    return current_app.config.get('REPORT_AUTO_HIDE_THRESHOLD', DEFAULT_AUTO_HIDE_THRESHOLD)
+
+def valid_reason(reason):
+    return isinstance(reason, str) and bool(reason.strip())
+
+def normalize_reason(reason):
+    # Group "Spam", " spam " and "SPAM" under one counter
+    return ' '.join(reason.split()).lower()[:255]
+
+def _bump_reason(question_id, reason, delta):
+    stmt = dialect_insert(ReportReasonCount).values(
+        question_id=question_id, reason=normalize_reason(reason), count=delta
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['question_id', 'reason'],
+        set_={'count': ReportReasonCount.count + stmt.excluded.count}
+    ))
+
+def record_report(question_id, reason, reported_at):
+    """Fold a newly inserted report into its question's summary.
+
+    Runs in the caller's transaction. Returns True if this report pushed the
+    question over the auto-hide threshold.
+    """
+    stmt = dialect_insert(ReportSummary).values(
+        question_id=question_id, report_count=1, open_count=1,
+        first_reported_at=reported_at, last_reported_at=reported_at
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['question_id'],
+        set_={
+            'report_count': ReportSummary.report_count + 1,
+            'open_count': ReportSummary.open_count + 1,
+            'last_reported_at': reported_at,
+        }
+    ))
+    _bump_reason(question_id, reason, 1)
+
+    threshold = auto_hide_threshold()
+    if not threshold:
+        return False
+    open_count = db.session.query(ReportSummary.open_count).filter_by(question_id=question_id).scalar()
+    if open_count < threshold:
+        return False
+    return bool(Question.query.filter_by(id=question_id, is_hidden=False)
+                .update({Question.is_hidden: True}, synchronize_session=False))
+
+def drop_report(report):
+    """Take a report that is about to be deleted out of its question's summary."""
+    summary = db.session.get(ReportSummary, report.question_id)
+    if summary is None:
+        return
+    values = {ReportSummary.report_count: ReportSummary.report_count - 1}
+    # Reports from before the last review were already closed out of open_count
+    if summary.reviewed_at is None or report.created_at > summary.reviewed_at:
+        values[ReportSummary.open_count] = case(
+            (ReportSummary.open_count > 0, ReportSummary.open_count - 1), else_=0
+        )
+    ReportSummary.query.filter_by(question_id=report.question_id).update(values, synchronize_session=False)
+    _bump_reason(report.question_id, report.reason, -1)
+
+def change_reason(question_id, old_reason, new_reason):
+    if normalize_reason(old_reason) != normalize_reason(new_reason):
+        _bump_reason(question_id, old_reason, -1)
+        _bump_reason(question_id, new_reason, 1)
+
+def review_question(question_id, hide):
+    """Close the open reports on a question, leaving it hidden or visible."""
+    ReportSummary.query.filter_by(question_id=question_id).update({
+        ReportSummary.open_count: 0,
+        ReportSummary.reviewed_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    Question.query.filter_by(id=question_id).update({Question.is_hidden: hide}, synchronize_session=False)
+
+def forget_reports(question_id):
+    """Delete a question's reports and summaries (before deleting the question)."""
+    for model in (Reports, ReportSummary, ReportReasonCount):
+        model.query.filter_by(question_id=question_id).delete(synchronize_session=False)
+
+def reconcile_report_summaries():
+    """Recount report_summaries and report_reason_counts from the reports table.
+
+    The counters are maintained incrementally, so a failed write or a manual
+    edit can leave them off. Returns the number of questions repaired.
+    """
+    summaries = {s.question_id: s for s in ReportSummary.query}
+    open_report = or_(ReportSummary.reviewed_at.is_(None), Reports.created_at > ReportSummary.reviewed_at)
+    actual = {
+        question_id: (n, open_count or 0, first, last)
+        for question_id, n, open_count, first, last in db.session.query(
+            Reports.question_id, func.count(), func.sum(case((open_report, 1), else_=0)),
+            func.min(Reports.created_at), func.max(Reports.created_at)
+        ).outerjoin(ReportSummary, ReportSummary.question_id == Reports.question_id)
+        .filter(Reports.question_id.isnot(None))
+        .group_by(Reports.question_id)
+    }
+
+    repaired = set()
+    for question_id in summaries.keys() | actual.keys():
+        summary = summaries.get(question_id)
+        n, open_count, first, last = actual.get(question_id, (0, 0, None, None))
+        if summary is None:
+            summary = ReportSummary(question_id=question_id)
+            db.session.add(summary)
+        elif (summary.report_count, summary.open_count) == (n, open_count) and \
+                (not n or (summary.first_reported_at, summary.last_reported_at) == (first, last)):
+            continue
+        # A question whose reports were all deleted keeps its row, like drop_report() leaves it
+        summary.report_count, summary.open_count = n, open_count
+        if n:
+            summary.first_reported_at, summary.last_reported_at = first, last
+        repaired.add(question_id)
+
+    # Reasons are normalized in Python, so they're recounted here too
+    counts = Counter(
+        (question_id, normalize_reason(reason))
+        for question_id, reason in db.session.query(Reports.question_id, Reports.reason)
+        .filter(Reports.question_id.isnot(None), Reports.reason.isnot(None)).yield_per(1000)
+    )
+    for row in ReportReasonCount.query:
+        count = counts.pop((row.question_id, row.reason), 0)
+        if row.count != count:
+            if count:
+                row.count = count
+            else:
+                db.session.delete(row)
+            repaired.add(row.question_id)
+    for (question_id, reason), count in counts.items():
+        db.session.add(ReportReasonCount(question_id=question_id, reason=reason, count=count))
+        repaired.add(question_id)
+
+    db.session.commit()
+    return len(repaired)
+
+def top_reasons(question_ids, limit=TOP_REASONS):
+    """{question_id: [{'reason', 'count'}, ...]} for a page of questions, in one query."""
+    rows = ReportReasonCount.query \
+        .filter(ReportReasonCount.question_id.in_(question_ids), ReportReasonCount.count > 0) \
+        .order_by(ReportReasonCount.question_id, ReportReasonCount.count.desc(), ReportReasonCount.reason) \
+        .all()
+    reasons = {question_id: [] for question_id in question_ids}
+    for row in rows:
+        if len(reasons[row.question_id]) < limit:
+            reasons[row.question_id].append({'reason': row.reason, 'count': row.count})
+    return reasons
+
+def serialize_summary(summary, reasons):
+    return {
+        'question_id': summary.question_id,
+        'report_count': summary.report_count,
+        # Reports are unique per (user, question), so every report is a distinct reporter
+        'distinct_reporters': summary.report_count,
+        'open_count': summary.open_count,
+        'top_reasons': reasons,
+        'first_reported_at': summary.first_reported_at,
+        'last_reported_at': summary.last_reported_at,
+        'reviewed_at': summary.reviewed_at
+    }
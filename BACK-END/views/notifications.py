@@ -1,6 +1,16 @@
-from flask import Blueprint, request, jsonify
-from models import db, Notifications, User  # noqa: F401
-from views.auth import token_required
+import hashlib
+import json
+import queue
+import secrets
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, Notifications, StreamTicket, User  # noqa: F401
+from views.auth import token_required, decode_jwt, get_cached_user
+from views.pubsub_utils import publish_after_commit, subscribe, unsubscribe
+from views.notify_utils import add_notification, adjust_unread
+from views.stream_utils import stream_json
 
 
 notification_bp = Blueprint('notification_bp', __name__, url_prefix='/api')
@@ -16,6 +26,13 @@ def serialize_notification(notification):
         'is_read': notification.is_read
     }
 
+# Push every notification row written through the ORM to live subscribers
+@event.listens_for(Session, 'after_flush')
+def publish_new_notifications(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Notifications):
+            publish_after_commit(session, serialize_notification(obj))
+
 # CREATE a notification (used by other services, not users directly)
 @notification_bp.route('/notifications', methods=['POST'])
 @token_required
@@ -28,12 +45,11 @@ def create_notification(current_user):
     if not user_id or not type or not message:
         return jsonify({'message': 'user_id, type, and message are required'}), 400
 
-    notification = Notifications(
+    notification = add_notification(
         user_id=user_id,
         type=type,
         message=message
     )
-    db.session.add(notification)
     db.session.commit()
 
     return jsonify({'message': 'Notification created', 'notification': serialize_notification(notification)}), 201
@@ -60,8 +76,7 @@ def get_all_notifications(current_user):
     if offset is not None:
         query = query.offset(offset)
 
-    notifications = query.all()
-    return jsonify([serialize_notification(n) for n in notifications]), 200
+    return stream_json(query, serialize_notification)
 
 # READ my notifications
 @notification_bp.route('/notifications/me', methods=['GET'])
@@ -85,6 +100,85 @@ def get_my_notifications(current_user):
     notifications = query.all()
     return jsonify([serialize_notification(n) for n in notifications]), 200
 
+# UNREAD count (badge) - a primary-key lookup of the counter column
+@notification_bp.route('/notifications/me/unread-count', methods=['GET'])
+@token_required
+def get_my_unread_count(current_user):
+    count = db.session.query(User.unread_notifications).filter_by(id=current_user.id).scalar()
+    return jsonify({'unread_count': count or 0}), 200
+
+# STREAM my notifications (Server-Sent Events)
+SSE_HEARTBEAT_SECONDS = 15
+STREAM_TICKET_SECONDS = 30
+
+def _ticket_hash(ticket):
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+def _redeem_stream_ticket(ticket):
+    """User id for a valid ticket, or None. Each ticket works once, in any worker."""
+    row = StreamTicket.query.filter(
+        StreamTicket.ticket_hash == _ticket_hash(ticket), StreamTicket.expires_at > datetime.utcnow()
+    ).first()
+    if row is None:
+        return None
+    user_id = row.user_id
+    # Only the request whose DELETE removes the row gets to use it
+    redeemed = StreamTicket.query.filter_by(ticket_hash=row.ticket_hash).delete(synchronize_session=False)
+    db.session.commit()
+    return user_id if redeemed else None
+
+# EventSource can't send an Authorization header, and a JWT in the URL ends up
+# in access logs and browser history. Clients trade their JWT for a ticket
+# here and open /notifications/stream?ticket=<ticket> right away.
+@notification_bp.route('/notifications/stream-ticket', methods=['POST'])
+@token_required
+def create_stream_ticket(current_user):
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    StreamTicket.query.filter(StreamTicket.expires_at <= now).delete(synchronize_session=False)
+    db.session.add(StreamTicket(ticket_hash=_ticket_hash(ticket), user_id=current_user.id,
+                                expires_at=now + timedelta(seconds=STREAM_TICKET_SECONDS)))
+    db.session.commit()
+    return jsonify({'ticket': ticket, 'expires_in': STREAM_TICKET_SECONDS}), 201
+
+@notification_bp.route('/notifications/stream', methods=['GET'])
+def stream_notifications():
+    ticket = request.args.get('ticket')
+    if ticket:
+        user_id = _redeem_stream_ticket(ticket)
+        if user_id is None:
+            return jsonify({'error': 'Stream ticket is invalid, expired or already used'}), 401
+    else:
+        # Non-browser clients can still send the JWT as a header
+        token = request.headers.get('Authorization', '').split(' ')[-1]
+        data = decode_jwt(token) if token else None
+        if not data:
+            return jsonify({'error': 'Token is invalid or expired!'}), 401
+        user_id = data['id']
+    user = get_cached_user(user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    subscription = subscribe(user.id)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    payload = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f'event: notification\ndata: {json.dumps(payload, default=str)}\n\n'
+        finally:
+            unsubscribe(user.id, subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 # READ one notification
 @notification_bp.route('/notifications/<int:id>', methods=['GET'])
 @token_required
@@ -110,7 +204,10 @@ def update_notification(current_user, id):
         return jsonify({'message': 'Unauthorized'}), 403
 
     data = request.get_json()
+    was_read = bool(notification.is_read)
     notification.is_read = data.get('is_read', notification.is_read)
+    if bool(notification.is_read) != was_read:
+        adjust_unread(notification.user_id, 1 if was_read else -1)
 
     db.session.commit()
     return jsonify({'message': 'Notification updated', 'notification': serialize_notification(notification)}), 200
@@ -126,18 +223,88 @@ def delete_notification(current_user, id):
     if notification.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'message': 'Unauthorized'}), 403
 
+    if not notification.is_read:
+        adjust_unread(notification.user_id, -1)
     db.session.delete(notification)
     db.session.commit()
     return jsonify({'message': 'Notification deleted'}), 200
 
+# -------------------- Bulk operations --------------------
+# Each runs as one UPDATE/DELETE ... WHERE and reports how many rows it touched.
+
+MAX_BULK_IDS = 1000
+
+def bulk_ids():
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return None, (jsonify({'message': 'ids must be a non-empty list of notification ids'}), 400)
+    if len(ids) > MAX_BULK_IDS:
+        return None, (jsonify({'message': f'At most {MAX_BULK_IDS} ids per request'}), 400)
+    return ids, None
+
+# MARK selected as read
+@notification_bp.route('/notifications/mark-read', methods=['PUT'])
+@token_required
+def mark_notifications_read(current_user):
+    ids, error = bulk_ids()
+    if error:
+        return error
+
+    updated = Notifications.query.filter(
+        Notifications.user_id == current_user.id,
+        Notifications.id.in_(ids),
+        Notifications.is_read.is_(False)
+    ).update({Notifications.is_read: True}, synchronize_session=False)
+    adjust_unread(current_user.id, -updated)
+
+    db.session.commit()
+    return jsonify({'message': 'Notifications marked as read', 'updated': updated}), 200
+
 # MARK ALL as read
 @notification_bp.route('/notifications/mark-all-read', methods=['PUT'])
 @token_required
 def mark_all_notifications_read(current_user):
-    notifications = Notifications.query.filter_by(user_id=current_user.id, is_read=False).all()
+    updated = Notifications.query.filter(
+        Notifications.user_id == current_user.id,
+        Notifications.is_read.is_(False)
+    ).update({Notifications.is_read: True}, synchronize_session=False)
+    adjust_unread(current_user.id, -updated)
+
+    db.session.commit()
+    return jsonify({'message': 'All notifications marked as read', 'updated': updated}), 200
+
+# DELETE all read
+@notification_bp.route('/notifications/read', methods=['DELETE'])
+@token_required
+def delete_read_notifications(current_user):
+    deleted = Notifications.query.filter(
+        Notifications.user_id == current_user.id,
+        Notifications.is_read.is_(True)
+    ).delete(synchronize_session=False)
+
+    db.session.commit()
+    return jsonify({'message': 'Read notifications deleted', 'deleted': deleted}), 200
+
+# DELETE selected
+@notification_bp.route('/notifications/bulk-delete', methods=['POST'])
+@token_required
+def delete_notifications(current_user):
+    ids, error = bulk_ids()
+    if error:
+        return error
 
-    for notification in notifications:
-        notification.is_read = True
+    # Unread ones are deleted separately so the counter moves by the right amount
+    deleted_unread = Notifications.query.filter(
+        Notifications.user_id == current_user.id,
+        Notifications.id.in_(ids),
+        Notifications.is_read.is_(False)
+    ).delete(synchronize_session=False)
+    deleted = deleted_unread + Notifications.query.filter(
+        Notifications.user_id == current_user.id,
+        Notifications.id.in_(ids)
+    ).delete(synchronize_session=False)
+    adjust_unread(current_user.id, -deleted_unread)
 
     db.session.commit()
-    return jsonify({'message': 'All notifications marked as read'}), 200
+    return jsonify({'message': 'Notifications deleted', 'deleted': deleted}), 200
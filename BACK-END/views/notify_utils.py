@@ -0,0 +1,123 @@
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select, update, literal, func
+from models import db, User, Notifications
+from metrics import NOTIFICATION_FANOUT_ROWS
+from .pubsub_utils import publish_after_commit
+
+# Running totals for broadcast fan-out, read by monitoring
+fanout_stats = {
+    'runs': 0,
+    'rows': 0,
+    'last_rows': 0,
+    'last_ms': 0.0,
+    'max_ms': 0.0,
+}
+
+# -------------------- Single notifications --------------------
+def adjust_unread(user_id, delta):
+    """Move a user's unread counter; run it in the same transaction as the change."""
+    if delta:
+        User.query.filter_by(id=user_id).update(
+            {User.unread_notifications: User.unread_notifications + delta},
+            synchronize_session=False
+        )
+
+def add_notification(user_id, type, message):
+    """Add a notification and bump the recipient's unread counter. The caller commits."""
+    notification = Notifications(user_id=user_id, type=type, message=message)
+    db.session.add(notification)
+    adjust_unread(user_id, 1)
+    return notification
+
+def reconcile_unread_counts():
+    """Recount unread notifications for users whose counter drifted.
+
+    Returns the number of users repaired.
+    """
+    actual = select(func.count(Notifications.id)) \
+        .where(Notifications.user_id == User.id, Notifications.is_read.is_(False)) \
+        .scalar_subquery()
+    repaired = db.session.execute(
+        update(User).where(User.unread_notifications != actual).values(unread_notifications=actual)
+    ).rowcount
+    db.session.commit()
+    return repaired
+
+# -------------------- Broadcast fan-out --------------------
+DEFAULT_FANOUT_CHUNK = 5000
+
+def _insert_broadcast(type, message, created_at, id_range):
+    # INSERT INTO notifications (...) SELECT users.id, ... FROM users
+    # WHERE id in the range, then bump exactly those users' counters. Both
+    # statements share the range, so a user created in between is in neither.
+    low, high = id_range
+    rows = select(
+        User.id,
+        literal(type),
+        literal(message),
+        literal(created_at, db.DateTime),
+        literal(False),
+    ).where(User.id > low, User.id <= high)
+
+    stmt = insert(Notifications).from_select(
+        ['user_id', 'type', 'message', 'created_at', 'is_read'], rows
+    )
+    inserted = db.session.execute(stmt).rowcount
+
+    db.session.execute(
+        update(User)
+        .where(User.id > low, User.id <= high)
+        .values(unread_notifications=User.unread_notifications + 1)
+    )
+    return inserted
+
+def broadcast_notification(type, message):
+    """Write one notification per user with set-based inserts.
+
+    The broadcast goes to the users that exist when it starts (ids up to
+    max(users.id) at that moment), in user-id ranges of
+    NOTIFICATION_FANOUT_CHUNK (default 5000) that are committed one at a
+    time. Each transaction only locks one range of user rows, so a large
+    fan-out doesn't hold every user's row against concurrent notifications.
+    A falsy NOTIFICATION_FANOUT_CHUNK writes everything in one range.
+
+    create_question runs this through submit_task, i.e. an in-process thread
+    pool: a broadcast still queued or running when the worker restarts is
+    lost (or cut short after some ranges). That is accepted for these
+    notifications, which are a courtesy and can be missed. Anything that must
+    be delivered belongs in a durable queue like the mail outbox.
+    """
+    started = time.perf_counter()
+    created_at = datetime.utcnow()
+    chunk = current_app.config.get('NOTIFICATION_FANOUT_CHUNK', DEFAULT_FANOUT_CHUNK)
+
+    # One event for everyone; subscribers get it once the rows are committed
+    publish_after_commit(db.session, {
+        'user_id': None,
+        'type': type,
+        'message': message,
+        'created_at': created_at.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+        'is_read': False
+    })
+
+    total = 0
+    max_id = db.session.query(func.max(User.id)).scalar() or 0
+    low = 0
+    while low < max_id:
+        high = min(low + chunk, max_id) if chunk else max_id
+        total += _insert_broadcast(type, message, created_at, (low, high))
+        db.session.commit()
+        low = high
+    db.session.commit()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    fanout_stats['runs'] += 1
+    fanout_stats['rows'] += total
+    fanout_stats['last_rows'] = total
+    fanout_stats['last_ms'] = elapsed_ms
+    fanout_stats['max_ms'] = max(fanout_stats['max_ms'], elapsed_ms)
+    NOTIFICATION_FANOUT_ROWS.observe(total)
+    current_app.logger.info('Notification fan-out (%s): %d rows in %.1f ms', type, total, elapsed_ms)
+    return total
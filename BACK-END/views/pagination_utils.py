@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+class InvalidCursor(ValueError):
+    pass
+
+# -------------------- Cursor encoding --------------------
+def _dump(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+def _load(value):
+    if isinstance(value, dict):
+        if set(value) != {'dt'} or not isinstance(value['dt'], str):
+            raise ValueError
+        return datetime.fromisoformat(value['dt'])
+    # bool is an int subclass, but no sort key is a boolean
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError
+    return value
+
+def encode_cursor(values):
+    raw = json.dumps([_dump(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise ValueError
+        return [_load(v) for v in values]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+
+# -------------------- Request args --------------------
+def page_args(always=False):
+    """Read ?limit= and ?cursor= from the request.
+
+    Returns (limit, cursor_values), or (None, None) when the client sent
+    neither, so endpoints can keep their legacy un-paginated response.
+    Endpoints without legacy clients pass always=True and get DEFAULT_LIMIT.
+    """
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if limit is None and not cursor and not always:
+        return None, None
+
+    limit = min(max(limit or DEFAULT_LIMIT, 1), MAX_LIMIT)
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+# -------------------- Keyset pagination --------------------
+def _matches(column, value):
+    expected = column.type.python_type
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+def _after(columns, values):
+    # (c1, c2, ...) < (v1, v2, ...) spelled out so every backend can use the index
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < values[i]))
+    return or_(*clauses)
+
+def keyset_page(query, columns, limit, cursor_values=None):
+    """Return one page of query ordered by columns, all descending.
+
+    The last column must be unique (normally the primary key). Returns
+    (items, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor_values is not None:
+        if len(cursor_values) != len(columns) or not all(map(_matches, columns, cursor_values)):
+            raise InvalidCursor('Invalid cursor')
+        query = query.filter(_after(columns, cursor_values))
+
+    items = query.order_by(*[c.desc() for c in columns]).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor([getattr(last, c.key) for c in columns])
+
+def offset_page(source, limit, cursor_values=None):
+    """Page ranked results (e.g. search) with an opaque offset cursor.
+
+    source is an ordered query, an already-sorted list, or a function
+    returning the first n items in order (e.g. a top-k over ranked matches).
+    """
+    offset = cursor_values[0] if cursor_values else 0
+    if len(cursor_values or [0]) != 1 or not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor('Invalid cursor')
+
+    if callable(source):
+        items = source(offset + limit + 1)[offset:]
+    elif isinstance(source, list):
+        items = source[offset:offset + limit + 1]
+    else:
+        items = source.offset(offset).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    return items[:limit], encode_cursor([offset + limit])
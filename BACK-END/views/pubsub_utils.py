@@ -0,0 +1,155 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from extensions import db
+
+# -------------------- Notification pub/sub --------------------
+# Events are queued on the session and only published once it commits.
+# NOTIFICATION_PUBSUB (app config or environment) picks the transport:
+#   'memory'   - deliver inside this process (single worker, dev)
+#   'postgres' - LISTEN/NOTIFY, so every gunicorn worker sees every event
+# With more than one worker process, an event published in one worker would
+# never reach streams held by another, so 'memory' refuses to start there.
+
+CHANNEL = 'notifications'
+PENDING_KEY = 'pubsub_pending'
+SUBSCRIBER_QUEUE_SIZE = 100
+PG_PAYLOAD_LIMIT = 7900  # NOTIFY payloads must stay under 8000 bytes
+TRANSPORTS = ('memory', 'postgres')
+
+class Broker:
+    """Hands events to the local subscriber queues of the target user.
+
+    Events with user_id None are broadcasts and go to every subscriber.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add(q)
+        return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def deliver(self, payload):
+        user_id = payload.get('user_id')
+        with self._lock:
+            if user_id is None:
+                targets = [q for subs in self._subscribers.values() for q in subs]
+            else:
+                targets = list(self._subscribers.get(user_id, ()))
+        for q in targets:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                pass  # slow consumer; it can catch up from /notifications/me
+
+broker = Broker()
+
+# -------------------- Postgres transport --------------------
+_listener = None
+_listener_lock = threading.Lock()
+
+def _pg_publish(payloads):
+    with db.engine.connect() as connection:
+        for payload in payloads:
+            body = json.dumps(payload, default=str)
+            if len(body.encode()) > PG_PAYLOAD_LIMIT:
+                body = json.dumps(dict(payload, message=None, truncated=True), default=str)
+            connection.execute(text('SELECT pg_notify(:channel, :payload)'),
+                               {'channel': CHANNEL, 'payload': body})
+        connection.commit()
+
+def _pg_listen(app):
+    while True:
+        try:
+            with app.app_context():
+                engine = db.engine
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+            connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+            connection.autocommit = True
+            connection.cursor().execute(f'LISTEN {CHANNEL}')
+            while True:
+                if select.select([connection], [], [], 30) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    broker.deliver(json.loads(connection.notifies.pop(0).payload))
+        except Exception:
+            app.logger.exception('Notification listener failed; reconnecting')
+            time.sleep(2)
+
+def _start_listener():
+    global _listener
+    app = current_app._get_current_object()
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_pg_listen, args=(app,),
+                                         name='moringadesk-listen', daemon=True)
+            _listener.start()
+
+def check_transport(transport, workers):
+    if transport not in TRANSPORTS:
+        raise RuntimeError(f"NOTIFICATION_PUBSUB must be one of {', '.join(TRANSPORTS)}, not {transport!r}")
+    if transport == 'memory' and workers > 1:
+        raise RuntimeError(
+            f"NOTIFICATION_PUBSUB='memory' only delivers within one process, but {workers} workers "
+            "are configured; set NOTIFICATION_PUBSUB=postgres or run a single worker"
+        )
+
+def init_pubsub(app):
+    """Pick the transport and refuse to start with one that would lose events."""
+    transport = app.config.setdefault('NOTIFICATION_PUBSUB', os.environ.get('NOTIFICATION_PUBSUB', 'memory'))
+    check_transport(transport, int(os.environ.get('WEB_CONCURRENCY', 1)))
+
+def _use_postgres():
+    return current_app.config.get('NOTIFICATION_PUBSUB', 'memory') == 'postgres'
+
+# -------------------- Public API --------------------
+def publish_after_commit(session, payload):
+    """Publish payload once session commits; dropped on rollback."""
+    session.info.setdefault(PENDING_KEY, []).append(payload)
+
+def subscribe(user_id):
+    if _use_postgres():
+        _start_listener()
+    return broker.subscribe(user_id)
+
+def unsubscribe(user_id, q):
+    broker.unsubscribe(user_id, q)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session):
+    payloads = session.info.pop(PENDING_KEY, None)
+    if not payloads:
+        return
+    if _use_postgres():
+        _pg_publish(payloads)
+    else:
+        for payload in payloads:
+            broker.deliver(payload)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session):
+    session.info.pop(PENDING_KEY, None)
@@ -1,10 +1,40 @@
 from flask import Blueprint, request, jsonify
-from models import db, Question, User, Category, Notifications
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Question, Category, Answers, FollowUp, QuestionTags, RelatedQuestions
 from .auth import token_required
+from .analytics_utils import question_bucket, rollup_question_change
+from .answers import serialize_answer
+from .followup import serialize_followup
+from .notify_utils import broadcast_notification
+from .moderation_utils import forget_reports
+from .related_utils import refresh_related, forget_related
+from .pagination_utils import InvalidCursor, page_args, keyset_page, offset_page
+from .ranking_utils import SORT_COLUMNS, hot_score
+from .reputation_utils import bump_user_stats, forget_answers_stats
+from .search_utils import apply_search, index_question, top_ranked, unindex_question
+from .task_utils import submit_task
 from datetime import datetime
 
 question_bp = Blueprint('question', __name__, url_prefix='/api/questions')
 
+# Serializer
+def serialize_question(question):
+    return {
+        'id': question.id,
+        'title': question.title,
+        'description': question.description,
+        'user_id': question.user_id,
+        'category_id': question.category_id,
+        'language': question.language,
+        'created_at': question.created_at,
+        'is_solved': question.is_solved,
+        'answer_count': question.answer_count,
+        'followup_count': question.followup_count,
+        'vote_total': question.vote_total,
+        'last_activity_at': question.last_activity_at
+    }
+
 # -------------------- Create Question --------------------
 @question_bp.route('', methods=['POST'])
 @token_required
@@ -28,28 +58,31 @@ def create_question(current_user):
     if not category:
         return jsonify({'error': 'Invalid category ID'}), 400
 
+    created_at = datetime.utcnow()
     new_question = Question(
         title=title,
         description=description,
         user_id=current_user.id,
         category_id=category_id,
         language=language,  # <-- Add language to model
-        created_at=datetime.utcnow()
+        created_at=created_at,
+        last_activity_at=created_at,
+        hot_score=hot_score(0, 0, 0, created_at)
     )
 
     db.session.add(new_question)
+    bump_user_stats(current_user.id, questions_asked=1)
     db.session.commit()
-
-    # Notify all users including the one who asked
-    users = User.query.all()
-    for user in users:
-        notification = Notifications(
-            user_id=user.id,
-            type='question',
-            message=f'{current_user.username} asked a new question: \"{title}\"'
-        )
-        db.session.add(notification)
-    db.session.commit()
+    index_question(new_question)
+    submit_task(refresh_related, new_question.id)
+
+    # Notify all users including the one who asked (set-based, off the request path;
+    # best effort, see broadcast_notification)
+    submit_task(
+        broadcast_notification,
+        'question',
+        f'{current_user.username} asked a new question: \"{title}\"'
+    )
 
     return jsonify({
         'success': 'Question created successfully',
@@ -68,7 +101,8 @@ def create_question(current_user):
 @question_bp.route('/<int:question_id>/is_solved', methods=['PUT'])
 @token_required
 def set_question_solved(current_user, question_id):
-    question = Question.query.get(question_id)
+    # Locked, so two concurrent flips can't both move the rollup counters
+    question = db.session.get(Question, question_id, with_for_update=True)
     if not question:
         return jsonify({'error': 'Question not found'}), 404
     if question.user_id != current_user.id and not current_user.is_admin:
@@ -77,65 +111,85 @@ def set_question_solved(current_user, question_id):
     is_solved = data.get('is_solved')
     if is_solved is None:
         return jsonify({'error': 'is_solved (true/false) is required'}), 400
+    old_bucket = question_bucket(question)
     question.is_solved = bool(is_solved)
+    rollup_question_change(question.created_at, old_bucket, question_bucket(question))
     db.session.commit()
     return jsonify({'success': 'Question solved status updated', 'question': {
         'id': question.id,
         'is_solved': question.is_solved
     }}), 200
 
+# Questions hidden by moderation stay out of every public read
+def visible_questions():
+    return Question.query.filter(Question.is_hidden.is_(False))
+
+# -------------------- List helper (legacy array or cursor page) --------------------
+def question_list_response(query, columns=SORT_COLUMNS['new'], always_paginate=False):
+    try:
+        limit, cursor = page_args(always=always_paginate)
+        if limit is None:
+            questions = query.order_by(*[c.desc() for c in columns]).all()
+            return jsonify([serialize_question(q) for q in questions]), 200
+
+        questions, next_cursor = keyset_page(query, columns, limit, cursor)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'questions': [serialize_question(q) for q in questions],
+        'next_cursor': next_cursor
+    }), 200
+
+# -------------------- Tag filter --------------------
+MAX_FILTER_TAGS = 20
+
+def parse_tag_ids(raw):
+    """Parse ?tags=1,5,9 into a de-duplicated list of ints, or raise ValueError."""
+    tag_ids = list(dict.fromkeys(int(part) for part in raw.split(',') if part.strip()))
+    if not tag_ids or len(tag_ids) > MAX_FILTER_TAGS:
+        raise ValueError
+    return tag_ids
+
+def filter_by_tags(query, tag_ids, mode='any'):
+    """Keep questions carrying any (or, with mode='all', every) one of tag_ids.
+
+    Resolved inside the database through ix_question_tags_tag_id_question_id,
+    so the question list is never loaded to be intersected in Python.
+    """
+    matching = db.session.query(QuestionTags.question_id).filter(QuestionTags.tag_id.in_(tag_ids))
+    if mode == 'all' and len(tag_ids) > 1:
+        matching = matching.group_by(QuestionTags.question_id) \
+            .having(func.count(func.distinct(QuestionTags.tag_id)) == len(tag_ids))
+    return query.filter(Question.id.in_(matching))
+
 # -------------------- Get All Solved Questions --------------------
 @question_bp.route('/is_solved', methods=['GET'])
 def get_solved_questions():
-    questions = Question.query.filter_by(is_solved=True).all()
-    result = []
-    for q in questions:
-        result.append({
-            'id': q.id,
-            'title': q.title,
-            'description': q.description,
-            'user_id': q.user_id,
-            'category_id': q.category_id,
-            'language': q.language,
-            'created_at': q.created_at,
-            'is_solved': q.is_solved
-        })
-    return jsonify(result), 200
+    return question_list_response(visible_questions().filter_by(is_solved=True))
 
 #--------------------- Get Unsolved Questions --------------
 @question_bp.route('/is_unsolved', methods=['GET'])
 def get_unsolved_questions():
-    questions = Question.query.filter_by(is_solved=False).all()
-    result = []
-    for q in questions:
-        result.append({
-            'id': q.id,
-            'title': q.title,
-            'description': q.description,
-            'user_id': q.user_id,
-            'category_id': q.category_id,
-            'language': q.language,
-            'created_at': q.created_at,
-            'is_solved': q.is_solved
-        })
-    return jsonify(result), 200
+    return question_list_response(visible_questions().filter_by(is_solved=False))
 
 # -------------------- Get All Questions (with Filters) --------------------
 @question_bp.route('', methods=['GET'])
 def get_questions():
-    query = Question.query
+    query = visible_questions()
 
     # Filters
     search = request.args.get('search')
     category_id = request.args.get('category_id')
     language = request.args.get('language')
     solved = request.args.get('solved')
+    tags = request.args.get('tags')
+    mode = request.args.get('mode', 'any')
+    sort = request.args.get('sort', 'new')
 
-    if search:
-        query = query.filter(
-            (Question.title.ilike(f'%{search}%')) |
-            (Question.description.ilike(f'%{search}%'))
-        )
+    # Every sort reads a stored, indexed column; nothing is aggregated here
+    if sort not in SORT_COLUMNS:
+        return jsonify({'error': f"sort must be one of: {', '.join(SORT_COLUMNS)}"}), 400
 
     if category_id:
         query = query.filter_by(category_id=category_id)
@@ -149,46 +203,114 @@ def get_questions():
         elif solved.lower() == 'false':
             query = query.filter_by(is_solved=False)
 
-    questions = query.order_by(Question.created_at.desc()).all()
+    if tags:
+        if mode not in ('any', 'all'):
+            return jsonify({'error': "mode must be 'any' or 'all'"}), 400
+        try:
+            query = filter_by_tags(query, parse_tag_ids(tags), mode)
+        except ValueError:
+            return jsonify({'error': f'tags must be a comma-separated list of up to {MAX_FILTER_TAGS} tag ids'}), 400
+
+    if not search:
+        return question_list_response(query, SORT_COLUMNS[sort])
+
+    # Search results are ordered by rank (sort is ignored), so they page by position instead
+    query, scores = apply_search(query, search)
+    source = query.order_by(Question.created_at.desc(), Question.id.desc())
+    if scores is not None:
+        # Ranked in memory; only the rows of the page being served are loaded
+        source = lambda count=None: top_ranked(query, scores, count)
+
+    try:
+        limit, cursor = page_args()
+        if limit is None:
+            questions = source() if callable(source) else source.all()
+            return jsonify([serialize_question(q) for q in questions]), 200
+
+        questions, next_cursor = offset_page(source, limit, cursor)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    result = []
-    for q in questions:
-        result.append({
-            'id': q.id,
-            'title': q.title,
-            'description': q.description,
-            'user_id': q.user_id,
-            'category_id': q.category_id,
-            'language': q.language,
-            'created_at': q.created_at,
-            'is_solved': q.is_solved
-        })
-
-    return jsonify(result), 200
+    return jsonify({
+        'questions': [serialize_question(q) for q in questions],
+        'next_cursor': next_cursor
+    }), 200
 
 # -------------------- Get One Question --------------------
 @question_bp.route('/<int:question_id>', methods=['GET'])
 def get_question(question_id):
     question = Question.query.get(question_id)
-    if not question:
+    if not question or question.is_hidden:
+        return jsonify({'error': 'Question not found'}), 404
+
+    return jsonify(serialize_question(question)), 200
+
+# -------------------- Get Question Thread --------------------
+# Question, answers, follow-ups, tags and authors in one response. Uses a fixed
+# four queries however big the thread is: question+author, answers+authors,
+# follow-ups+authors, tags.
+@question_bp.route('/<int:question_id>/thread', methods=['GET'])
+def get_question_thread(question_id):
+    question = Question.query.options(
+        joinedload(Question.user),
+        selectinload(Question.answers).joinedload(Answers.user),
+        selectinload(Question.follow_ups).joinedload(FollowUp.user),
+        selectinload(Question.question_tags).joinedload(QuestionTags.tag),
+    ).filter_by(id=question_id).first()
+    if not question or question.is_hidden:
         return jsonify({'error': 'Question not found'}), 404
 
+    def author(user):
+        return {'id': user.id, 'username': user.username} if user else None
+
+    def oldest_first(item):
+        # Rows from before created_at was always set sort last instead of breaking the sort
+        return (item.created_at is None, item.created_at or datetime.min, item.id)
+
+    follow_ups_by_answer = {}
+    for f in sorted(question.follow_ups, key=oldest_first):
+        follow_ups_by_answer.setdefault(f.answer_id, []).append(
+            dict(serialize_followup(f), author=author(f.user))
+        )
+
+    answers = []
+    for a in sorted(question.answers, key=oldest_first):
+        answers.append(dict(
+            serialize_answer(a),
+            is_approved=a.is_approved,
+            author=author(a.user),
+            follow_ups=follow_ups_by_answer.get(a.id, [])
+        ))
+
     return jsonify({
-        'id': question.id,
-        'title': question.title,
-        'description': question.description,
-        'user_id': question.user_id,
-        'category_id': question.category_id,
-        'language': question.language,
-        'created_at': question.created_at,
-        'is_solved': question.is_solved
+        'question': dict(serialize_question(question), author=author(question.user)),
+        'tags': [{'id': qt.tag.id, 'name': qt.tag.name, 'type': qt.tag.type}
+                 for qt in question.question_tags if qt.tag],
+        'answers': answers,
+        # follow-ups posted on the question itself rather than on an answer
+        'follow_ups': follow_ups_by_answer.get(None, [])
     }), 200
 
+# -------------------- Get Related Questions --------------------
+# Reads the precomputed lists in related_questions; hand-made links come first.
+@question_bp.route('/<int:question_id>/related', methods=['GET'])
+def get_related_questions(question_id):
+    if not db.session.query(Question.id).filter_by(id=question_id).first():
+        return jsonify({'error': 'Question not found'}), 404
+
+    rows = db.session.query(Question, RelatedQuestions.score) \
+        .join(RelatedQuestions, RelatedQuestions.related_question_id == Question.id) \
+        .filter(RelatedQuestions.question_id == question_id, Question.is_hidden.is_(False)) \
+        .order_by(RelatedQuestions.is_auto, RelatedQuestions.score.desc()) \
+        .all()
+
+    return jsonify([dict(serialize_question(q), score=score) for q, score in rows]), 200
+
 # -------------------- Update Question --------------------
 @question_bp.route('/<int:question_id>', methods=['PUT'])
 @token_required
 def update_question(current_user, question_id):
-    question = Question.query.get(question_id)
+    question = db.session.get(Question, question_id, with_for_update=True)
     if not question:
         return jsonify({'error': 'Question not found'}), 404
 
@@ -196,13 +318,17 @@ def update_question(current_user, question_id):
         return jsonify({'error': 'Unauthorized to update this question'}), 403
 
     data = request.get_json()
+    old_bucket = question_bucket(question)
     question.title = data.get('title', question.title)
     question.description = data.get('description', question.description)
     question.category_id = data.get('category_id', question.category_id)
     question.language = data.get('language', question.language)
     question.is_solved = data.get('is_solved', question.is_solved)  # <-- support is_solved update
+    rollup_question_change(question.created_at, old_bucket, question_bucket(question))
 
     db.session.commit()
+    index_question(question)
+    submit_task(refresh_related, question.id)
 
     return jsonify({
         'success': 'Question updated successfully',
@@ -229,7 +355,13 @@ def delete_question(current_user, question_id):
     if question.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Unauthorized to delete this question'}), 403
 
+    forget_related(question_id)
+    forget_reports(question_id)
+    forget_answers_stats(question_id)
+    bump_user_stats(question.user_id, questions_asked=-1)
+    rollup_question_change(question.created_at, question_bucket(question), None)
     db.session.delete(question)
     db.session.commit()
+    unindex_question(question_id)
 
     return jsonify({'success': f'Question {question.title} deleted successfully'}), 200
@@ -1,9 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity  
+from sqlalchemy.exc import IntegrityError
 from models import db, QuestionTags, Question, Tags, User  
+from .db_utils import dialect_insert
+from .related_utils import refresh_related
+from .stream_utils import stream_json
+from .task_utils import submit_task
 
 questiontags_bp = Blueprint('questiontags_bp', __name__, url_prefix='/api')
 
+MAX_TAGS_PER_QUESTION = 20
+
 #  Serializer
 def serialize_question_tag(qt):
     return {
@@ -23,23 +30,81 @@ def create_question_tag():
     if not question_id or not tag_id:
         return jsonify({'message': 'question_id and tag_id are required'}), 400
 
-    # Optional: Check if relationship already exists
-    existing = QuestionTags.query.filter_by(question_id=question_id, tag_id=tag_id).first()
-    if existing:
+    # The unique (question_id, tag_id) constraint replaces a separate existence check
+    result = db.session.execute(
+        dialect_insert(QuestionTags)
+        .values(question_id=question_id, tag_id=tag_id)
+        .on_conflict_do_nothing(index_elements=['question_id', 'tag_id'])
+    )
+    if not result.rowcount:
+        db.session.rollback()
         return jsonify({'message': 'This tag is already assigned to the question'}), 400
 
-    qt = QuestionTags(question_id=question_id, tag_id=tag_id)
-    db.session.add(qt)
     db.session.commit()
+    qt = QuestionTags(id=result.inserted_primary_key[0], question_id=question_id, tag_id=tag_id)
+    submit_task(refresh_related, question_id)
 
     return jsonify({'message': 'QuestionTag created', 'question_tag': serialize_question_tag(qt)}), 201
 
+# REPLACE the full tag set of a question
+@questiontags_bp.route('/questions/<int:question_id>/tags', methods=['PUT'])
+@jwt_required()
+def replace_question_tags(question_id):
+    question = db.session.query(Question.id, Question.user_id).filter_by(id=question_id).first()
+    if not question:
+        return jsonify({'message': 'Question not found'}), 404
+
+    # Only the asker or an admin may retag a question
+    current_user = int(get_jwt_identity())
+    if question.user_id != current_user:
+        user = User.query.get(current_user)
+        if not user or not user.is_admin:
+            return jsonify({'message': 'Unauthorized'}), 403
+
+    tag_ids = (request.get_json(silent=True) or {}).get('tag_ids')
+    if not isinstance(tag_ids, list) or not all(isinstance(t, int) and not isinstance(t, bool) for t in tag_ids):
+        return jsonify({'message': 'tag_ids must be a list of tag ids'}), 400
+    tag_ids = set(tag_ids)
+    if len(tag_ids) > MAX_TAGS_PER_QUESTION:
+        return jsonify({'message': f'A question can have at most {MAX_TAGS_PER_QUESTION} tags'}), 400
+
+    known = {row.id for row in db.session.query(Tags.id).filter(Tags.id.in_(tag_ids))} if tag_ids else set()
+    if known != tag_ids:
+        return jsonify({'message': 'Unknown tag ids', 'tag_ids': sorted(tag_ids - known)}), 400
+
+    current = {row.tag_id for row in db.session.query(QuestionTags.tag_id).filter_by(question_id=question_id)}
+    added = tag_ids - current
+    removed = current - tag_ids
+
+    if removed:
+        QuestionTags.query.filter(
+            QuestionTags.question_id == question_id, QuestionTags.tag_id.in_(removed)
+        ).delete(synchronize_session=False)
+    if added:
+        # Concurrent replaces may race on the same pair; the constraint makes that a no-op
+        db.session.execute(
+            dialect_insert(QuestionTags)
+            .values([{'question_id': question_id, 'tag_id': tag_id} for tag_id in added])
+            .on_conflict_do_nothing(index_elements=['question_id', 'tag_id'])
+        )
+    db.session.commit()
+
+    if added or removed:
+        submit_task(refresh_related, question_id)
+
+    return jsonify({
+        'message': 'Question tags updated',
+        'question_id': question_id,
+        'tag_ids': sorted(tag_ids),
+        'added': sorted(added),
+        'removed': sorted(removed)
+    }), 200
+
 # READ all QuestionTags
 @questiontags_bp.route('/questiontags', methods=['GET'])
 @jwt_required()
 def get_all_question_tags():
-    qtags = QuestionTags.query.all()
-    return jsonify([serialize_question_tag(qt) for qt in qtags]), 200
+    return stream_json(QuestionTags.query.order_by(QuestionTags.id), serialize_question_tag)
 
 #  READ QuestionTag by ID
 @questiontags_bp.route('/questiontags/<int:id>', methods=['GET'])
@@ -59,10 +124,19 @@ def update_question_tag(id):
         return jsonify({'message': 'QuestionTag not found'}), 404
 
     data = request.get_json()
+    old_question_id = qt.question_id
     qt.question_id = data.get('question_id', qt.question_id)
     qt.tag_id = data.get('tag_id', qt.tag_id)
 
-    db.session.commit()
+    # Moving the row onto a pair that already exists trips the unique (question_id, tag_id) constraint
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'This tag is already assigned to the question'}), 400
+
+    for question_id in {old_question_id, qt.question_id}:
+        submit_task(refresh_related, question_id)
     return jsonify({'message': 'QuestionTag updated', 'question_tag': serialize_question_tag(qt)}), 200
 
 #  DELETE QuestionTag
@@ -75,4 +149,5 @@ def delete_question_tag(id):
 
     db.session.delete(qt)
     db.session.commit()
+    submit_task(refresh_related, qt.question_id)
     return jsonify({'message': 'QuestionTag deleted'}), 200
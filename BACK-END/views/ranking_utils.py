@@ -0,0 +1,81 @@
+import math
+from datetime import datetime
+from sqlalchemy import func, select, update
+from models import db, Question, Answers, FollowUp
+
+# Same epoch and decay as Reddit's "hot" ranking: 12.5 hours (45000 s) of
+# age is worth a factor of 10 in points, i.e. a half-life of
+# 45000 * log10(2) s, about 3.76 hours
+EPOCH = datetime(2005, 12, 8, 7, 46, 43)
+DECAY_SECONDS = 45000
+ANSWER_WEIGHT = 2
+FOLLOWUP_WEIGHT = 1
+
+SORT_COLUMNS = {
+    'new': [Question.created_at, Question.id],
+    'hot': [Question.hot_score, Question.id],
+    'top': [Question.vote_total, Question.id],
+    'active': [Question.last_activity_at, Question.id],
+}
+
+def hot_score(answer_count, followup_count, vote_total, created_at):
+    """Engagement on a log scale plus a bonus for being new.
+
+    The time term only depends on created_at, so a score never needs
+    recomputing as the question ages; newer questions simply start higher.
+    """
+    points = vote_total + ANSWER_WEIGHT * answer_count + FOLLOWUP_WEIGHT * followup_count
+    order = math.log10(max(abs(points), 1))
+    sign = 1 if points > 0 else -1 if points < 0 else 0
+    seconds = ((created_at or datetime.utcnow()) - EPOCH).total_seconds()
+    return round(sign * order + seconds / DECAY_SECONDS, 7)
+
+def record_activity(question_id, answers=0, followups=0, votes=0, touch=True):
+    """Apply counter deltas to a question and re-score it.
+
+    Runs in the caller's transaction. The counter UPDATE takes the row lock
+    first, so the score written afterwards always reflects every committed delta.
+    """
+    values = {
+        Question.answer_count: Question.answer_count + answers,
+        Question.followup_count: Question.followup_count + followups,
+        Question.vote_total: Question.vote_total + votes,
+    }
+    if touch:
+        values[Question.last_activity_at] = datetime.utcnow()
+    Question.query.filter_by(id=question_id).update(values, synchronize_session=False)
+
+    row = db.session.query(
+        Question.answer_count, Question.followup_count, Question.vote_total, Question.created_at
+    ).filter_by(id=question_id).first()
+    if row:
+        Question.query.filter_by(id=question_id).update(
+            {Question.hot_score: hot_score(*row)}, synchronize_session=False
+        )
+
+def recompute_rankings(batch_size=1000):
+    """Recount every question's activity counters from source and re-score.
+
+    Repairs drift from writes that bypassed the API. Returns the number of
+    questions processed.
+    """
+    answers = select(func.count(Answers.id)).where(Answers.question_id == Question.id).scalar_subquery()
+    followups = select(func.count(FollowUp.id)).where(FollowUp.question_id == Question.id).scalar_subquery()
+    votes = select(func.coalesce(func.sum(Answers.score), 0)).where(Answers.question_id == Question.id).scalar_subquery()
+    db.session.execute(update(Question).values(answer_count=answers, followup_count=followups, vote_total=votes))
+
+    total, last_id = 0, 0
+    while True:
+        rows = db.session.query(
+            Question.id, Question.answer_count, Question.followup_count, Question.vote_total, Question.created_at
+        ).filter(Question.id > last_id).order_by(Question.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.session.execute(update(Question), [
+            {'id': row.id, 'hot_score': hot_score(*row[1:])} for row in rows
+        ])
+        total += len(rows)
+        last_id = rows[-1].id
+
+    db.session.commit()
+    return total
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from sqlalchemy import insert, text
+from models import db, Question, QuestionTags, RelatedQuestions
+from .search_utils import tokenize
+
+# -------------------- Related-questions engine --------------------
+# TF-IDF vectors over title/description terms plus tag and category features.
+# Each question's top-k neighbours are precomputed into related_questions
+# (is_auto=True), so reading them is an index lookup.
+
+TOP_K = 5
+MIN_SCORE = 0.05
+TITLE_WEIGHT = 2
+TAG_WEIGHT = 3
+CATEGORY_WEIGHT = 1
+INDEX_MAX_AGE = 600  # seconds; reload to pick up writes from other workers
+# Candidates come only from features rare enough to be selective: a feature
+# shared by more than CANDIDATE_DF_FRACTION of questions (e.g. a big
+# category) still counts towards the score but doesn't pull in candidates.
+CANDIDATE_DF_FRACTION = 0.05
+MIN_CANDIDATE_DF = 100  # small sites: every feature is selective enough
+MAX_CANDIDATES = 500    # scored per refresh, best feature overlap first
+LOCK_STRIPES = 64
+ADVISORY_LOCK_NAMESPACE = 5167  # first key of pg_advisory_xact_lock(int, int)
+
+def question_features(title, description, category_id, tag_ids):
+    features = Counter()
+    for term in tokenize(title):
+        features[term] += TITLE_WEIGHT
+    for term in tokenize(description):
+        features[term] += 1
+    for tag_id in tag_ids:
+        features[f'tag:{tag_id}'] += TAG_WEIGHT
+    if category_id is not None:
+        features[f'cat:{category_id}'] += CATEGORY_WEIGHT
+    return features
+
+class RelatedIndex:
+    """In-memory term frequencies, document frequencies and postings."""
+
+    def __init__(self):
+        self.tf = {}
+        self.df = Counter()
+        self.postings = defaultdict(set)
+        self.loaded_at = None
+        self.lock = threading.RLock()
+
+    def _remove(self, question_id):
+        for term in self.tf.pop(question_id, {}):
+            self.df[term] -= 1
+            self.postings[term].discard(question_id)
+            if not self.df[term]:
+                del self.df[term]
+                del self.postings[term]
+
+    def _add(self, question_id, features):
+        self.tf[question_id] = features
+        for term in features:
+            self.df[term] += 1
+            self.postings[term].add(question_id)
+
+    def load(self, force=False):
+        with self.lock:
+            if not force and self.loaded_at and time.monotonic() - self.loaded_at < INDEX_MAX_AGE:
+                return
+            tags = defaultdict(list)
+            for question_id, tag_id in db.session.query(QuestionTags.question_id, QuestionTags.tag_id):
+                tags[question_id].append(tag_id)
+
+            self.tf, self.df, self.postings = {}, Counter(), defaultdict(set)
+            rows = db.session.query(Question.id, Question.title, Question.description, Question.category_id) \
+                .execution_options(yield_per=1000)
+            for question_id, title, description, category_id in rows:
+                self._add(question_id, question_features(title, description, category_id, tags[question_id]))
+            self.loaded_at = time.monotonic()
+
+    def update(self, question):
+        features = question_features(question.title, question.description, question.category_id,
+                                     [qt.tag_id for qt in question.question_tags])
+        with self.lock:
+            self._remove(question.id)
+            self._add(question.id, features)
+
+    def remove(self, question_id):
+        with self.lock:
+            self._remove(question_id)
+
+    def _vector(self, question_id):
+        total = len(self.tf)
+        weights = {term: count * math.log(1 + total / self.df[term])
+                   for term, count in self.tf.get(question_id, {}).items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def candidates(self, question_id, vector):
+        """Questions sharing the most selective features, at most MAX_CANDIDATES."""
+        df_limit = max(MIN_CANDIDATE_DF, len(self.tf) * CANDIDATE_DF_FRACTION)
+        terms = sorted(vector, key=lambda term: self.df[term])
+        selective = [term for term in terms if self.df[term] <= df_limit] or terms[:1]
+        overlap = Counter()
+        for term in selective:
+            overlap.update(self.postings[term])
+        overlap.pop(question_id, None)
+        return [other for other, _ in overlap.most_common(MAX_CANDIDATES)]
+
+    def top_k(self, question_id, k=TOP_K):
+        """[(other_id, cosine similarity)] best first, scoring only likely candidates."""
+        with self.lock:
+            vector = self._vector(question_id)
+            candidates = self.candidates(question_id, vector)
+
+            scored = []
+            for other in candidates:
+                other_vector = self._vector(other)
+                score = sum(w * other_vector.get(term, 0.0) for term, w in vector.items())
+                if score >= MIN_SCORE:
+                    scored.append((other, score))
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:k]
+
+related_index = RelatedIndex()
+
+# -------------------- Writing precomputed lists --------------------
+def _write_related(question_id, pairs):
+    RelatedQuestions.query.filter_by(question_id=question_id, is_auto=True).delete(synchronize_session=False)
+    if pairs:
+        db.session.execute(insert(RelatedQuestions), [
+            {'question_id': question_id, 'related_question_id': other, 'score': score, 'is_auto': True}
+            for other, score in pairs
+        ])
+
+def _merge_into(question_id, other_id, score, k=TOP_K):
+    """Offer other_id to question_id's stored list; keeps only the best k."""
+    current = RelatedQuestions.query.filter_by(question_id=question_id, is_auto=True).all()
+    pairs = {row.related_question_id: row.score for row in current}
+    pairs[other_id] = score
+    best = sorted(pairs.items(), key=lambda pair: pair[1], reverse=True)[:k]
+    if dict(best) != {row.related_question_id: row.score for row in current}:
+        _write_related(question_id, best)
+
+_stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+def _lock_lists(question_ids):
+    """Serialize writers of these questions' lists until commit.
+
+    Locks are taken in id order, so two refreshes can't deadlock. On
+    Postgres, transaction-scoped advisory locks extend this across workers.
+    Returns the in-process locks to release after committing.
+    """
+    stripes = sorted({question_id % LOCK_STRIPES for question_id in question_ids})
+    held = []
+    for stripe in stripes:
+        _stripes[stripe].acquire()
+        held.append(_stripes[stripe])
+    if db.engine.dialect.name == 'postgresql':
+        for question_id in sorted(set(question_ids)):
+            db.session.execute(text('SELECT pg_advisory_xact_lock(:namespace, :id)'),
+                               {'namespace': ADVISORY_LOCK_NAMESPACE, 'id': question_id})
+    return held
+
+def refresh_related(question_id):
+    """Re-vector one question and update its list and its neighbours' lists.
+
+    Questions that listed this one but are no longer among its neighbours
+    lose that (now stale) row.
+    """
+    related_index.load()
+    question = Question.query.get(question_id)
+    if not question:
+        return
+    related_index.update(question)
+
+    pairs = related_index.top_k(question_id)
+    neighbours = {other for other, _ in pairs}
+    listed_by = {row.question_id for row in db.session.query(RelatedQuestions.question_id).filter_by(
+        related_question_id=question_id, is_auto=True)}
+    stale = listed_by - neighbours
+
+    held = _lock_lists([question_id, *neighbours, *stale])
+    try:
+        _write_related(question_id, pairs)
+        for other, score in pairs:
+            _merge_into(other, question_id, score)
+        if stale:
+            RelatedQuestions.query.filter(
+                RelatedQuestions.question_id.in_(stale),
+                RelatedQuestions.related_question_id == question_id,
+                RelatedQuestions.is_auto.is_(True)
+            ).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        for lock in held:
+            lock.release()
+
+def forget_related(question_id):
+    """Drop a deleted question from the index and from other questions' lists."""
+    related_index.remove(question_id)
+    RelatedQuestions.query.filter(
+        (RelatedQuestions.question_id == question_id) | (RelatedQuestions.related_question_id == question_id),
+        RelatedQuestions.is_auto.is_(True)
+    ).delete(synchronize_session=False)
+
+def rebuild_related(k=TOP_K, progress=None):
+    """Recompute every question's list from scratch. Returns the number of questions."""
+    related_index.load(force=True)
+    question_ids = sorted(related_index.tf)
+    for i, question_id in enumerate(question_ids, 1):
+        _write_related(question_id, related_index.top_k(question_id, k))
+        if i % 500 == 0:
+            db.session.commit()
+            if progress:
+                progress(i, len(question_ids))
+    db.session.commit()
+    return len(question_ids)
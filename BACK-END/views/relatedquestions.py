@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from models import db, RelatedQuestions, Question  
+from .stream_utils import stream_json
 
 related_questions_bp = Blueprint('related_questions_bp', __name__, url_prefix='/api')
 
@@ -33,8 +34,7 @@ def create_related_question():
 @related_questions_bp.route('/relatedquestions', methods=['GET'])
 @jwt_required()
 def get_all_related_questions():
-    related_questions = RelatedQuestions.query.all()
-    return jsonify([serialize_related_question(rq) for rq in related_questions]), 200
+    return stream_json(RelatedQuestions.query.order_by(RelatedQuestions.id), serialize_related_question)
 
 # GET related question by ID
 @related_questions_bp.route('/relatedquestions/<int:id>', methods=['GET'])
@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Reports, Question, User, Category  
+from models import db, Reports, Question, User, Category, ReportSummary
 from datetime import datetime  
+from .db_utils import dialect_insert
+from .moderation_utils import (
+    record_report, drop_report, change_reason, review_question, top_reasons, serialize_summary, valid_reason
+)
+from .pagination_utils import DEFAULT_LIMIT, InvalidCursor, page_args, keyset_page
 
 reports_bp = Blueprint('reports_bp', __name__, url_prefix='/api')
 
@@ -20,8 +25,8 @@ def serialize_report(report):
 @reports_bp.route('/reports', methods=['POST'])
 @jwt_required()
 def create_report():
-    data = request.get_json()
-    current_user = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    current_user = int(get_jwt_identity())
 
     category_id = data.get('category_id')
     question_id = data.get('question_id')
@@ -29,18 +34,30 @@ def create_report():
 
     if not category_id or not question_id or not reason:
         return jsonify({'message': 'category_id, question_id and reason are required'}), 400
-
-    report = Reports(
-        user_id=current_user,
-        category_id=category_id,
-        question_id=question_id,
-        reason=reason
+    if not valid_reason(reason):
+        return jsonify({'message': 'reason must be a non-empty string'}), 400
+
+    if not db.session.query(Question.id).filter_by(id=question_id).first():
+        return jsonify({'message': 'Question not found'}), 404
+
+    # The unique (user_id, question_id) constraint makes repeat reports a no-op
+    created_at = datetime.utcnow()
+    result = db.session.execute(
+        dialect_insert(Reports)
+        .values(user_id=current_user, category_id=category_id, question_id=question_id,
+                reason=reason, created_at=created_at)
+        .on_conflict_do_nothing(index_elements=['user_id', 'question_id'])
     )
+    if not result.rowcount:
+        db.session.rollback()
+        return jsonify({'message': 'You have already reported this question'}), 400
 
-    db.session.add(report)
+    hidden = record_report(question_id, reason, created_at)
     db.session.commit()
 
-    return jsonify({'message': 'Report created', 'report': serialize_report(report)}), 201
+    report = Reports(id=result.inserted_primary_key[0], user_id=current_user, category_id=category_id,
+                     question_id=question_id, reason=reason, created_at=created_at)
+    return jsonify({'message': 'Report created', 'report': serialize_report(report), 'question_hidden': hidden}), 201
 
 # GET all reports (admin only)
 @reports_bp.route('/reports', methods=['GET'])
@@ -73,7 +90,7 @@ def get_report(id):
 @reports_bp.route('/reports/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_report(id):
-    current_user = get_jwt_identity()
+    current_user = int(get_jwt_identity())
     report = Reports.query.get(id)
     if not report:
         return jsonify({'message': 'Report not found'}), 404
@@ -82,8 +99,12 @@ def update_report(id):
     if report.user_id != current_user and not user.is_admin:
         return jsonify({'message': 'Unauthorized'}), 403
 
-    data = request.get_json()
-    report.reason = data.get('reason', report.reason)
+    data = request.get_json(silent=True) or {}
+    new_reason = data.get('reason', report.reason)
+    if not valid_reason(new_reason):
+        return jsonify({'message': 'reason must be a non-empty string'}), 400
+    change_reason(report.question_id, report.reason, new_reason)
+    report.reason = new_reason
     report.category_id = data.get('category_id', report.category_id)
 
     db.session.commit()
@@ -93,7 +114,7 @@ def update_report(id):
 @reports_bp.route('/reports/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_report(id):
-    current_user = get_jwt_identity()
+    current_user = int(get_jwt_identity())
     report = Reports.query.get(id)
     if not report:
         return jsonify({'message': 'Report not found'}), 404
@@ -102,6 +123,70 @@ def delete_report(id):
     if report.user_id != current_user and not user.is_admin:
         return jsonify({'message': 'Unauthorized'}), 403
 
+    drop_report(report)
     db.session.delete(report)
     db.session.commit()
     return jsonify({'message': 'Report deleted'}), 200
+
+# GET moderation queue (admin only): questions with open reports, most reported first
+@reports_bp.route('/reports/queue', methods=['GET'])
+@jwt_required()
+def get_moderation_queue():
+    user = User.query.get(get_jwt_identity())
+    if not user.is_admin:
+        return jsonify({'message': 'Admin access required'}), 403
+
+    try:
+        limit, cursor = page_args()
+        summaries, next_cursor = keyset_page(
+            ReportSummary.query.filter(ReportSummary.open_count > 0),
+            [ReportSummary.open_count, ReportSummary.question_id], limit or DEFAULT_LIMIT, cursor
+        )
+    except InvalidCursor:
+        return jsonify({'message': 'Invalid cursor'}), 400
+
+    question_ids = [s.question_id for s in summaries]
+    questions = {q.id: q for q in Question.query.filter(Question.id.in_(question_ids))}
+    reasons = top_reasons(question_ids)
+
+    return jsonify({
+        'queue': [dict(
+            serialize_summary(s, reasons[s.question_id]),
+            title=questions[s.question_id].title,
+            is_hidden=questions[s.question_id].is_hidden
+        ) for s in summaries],
+        'next_cursor': next_cursor
+    }), 200
+
+# GET report summary for one question (admin only)
+@reports_bp.route('/reports/questions/<int:question_id>/summary', methods=['GET'])
+@jwt_required()
+def get_report_summary(question_id):
+    user = User.query.get(get_jwt_identity())
+    if not user.is_admin:
+        return jsonify({'message': 'Admin access required'}), 403
+
+    summary = db.session.get(ReportSummary, question_id)
+    if not summary:
+        return jsonify({'message': 'No reports for this question'}), 404
+
+    return jsonify(serialize_summary(summary, top_reasons([question_id])[question_id])), 200
+
+# PUT review a reported question (admin only): dismiss the reports or keep it hidden
+@reports_bp.route('/reports/queue/<int:question_id>', methods=['PUT'])
+@jwt_required()
+def review_reported_question(question_id):
+    user = User.query.get(get_jwt_identity())
+    if not user.is_admin:
+        return jsonify({'message': 'Admin access required'}), 403
+
+    action = (request.get_json(silent=True) or {}).get('action')
+    if action not in ('dismiss', 'hide'):
+        return jsonify({'message': "action must be 'dismiss' or 'hide'"}), 400
+
+    if not db.session.get(ReportSummary, question_id):
+        return jsonify({'message': 'No reports for this question'}), 404
+
+    review_question(question_id, hide=(action == 'hide'))
+    db.session.commit()
+    return jsonify({'message': 'Reports reviewed', 'question_id': question_id, 'is_hidden': action == 'hide'}), 200
@@ -0,0 +1,71 @@
+from sqlalchemy import case, func, insert, select
+from models import db, User, Question, Answers, UserStats
+from .db_utils import dialect_insert
+
+# Reputation points per unit of each counter
+QUESTION_POINTS = 1
+ANSWER_POINTS = 2
+APPROVED_POINTS = 15
+VOTE_POINTS = 10
+
+COUNTERS = ('questions_asked', 'answers_given', 'approved_answers', 'net_votes')
+
+def reputation(questions_asked=0, answers_given=0, approved_answers=0, net_votes=0):
+    return (QUESTION_POINTS * questions_asked + ANSWER_POINTS * answers_given
+            + APPROVED_POINTS * approved_answers + VOTE_POINTS * net_votes)
+
+def bump_user_stats(user_id, **deltas):
+    """Add deltas (keyed by COUNTERS) to a user's stats row, creating it if needed.
+
+    A single upsert in the caller's transaction, so concurrent writers can't
+    lose each other's increments.
+    """
+    if not user_id or not any(deltas.values()):
+        return
+    values = {name: deltas.get(name, 0) for name in COUNTERS}
+    values['reputation'] = reputation(**values)
+
+    stmt = dialect_insert(UserStats).values(user_id=int(user_id), **values)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={name: getattr(UserStats, name) + getattr(stmt.excluded, name) for name in values}
+    ))
+
+def forget_answers_stats(question_id):
+    """Take a question's answers off their authors' stats before it is deleted."""
+    per_author = db.session.query(
+        Answers.user_id,
+        func.count(Answers.id),
+        func.sum(case((Answers.is_approved.is_(True), 1), else_=0)),
+        func.sum(Answers.score),
+    ).filter_by(question_id=question_id).group_by(Answers.user_id).all()
+    for user_id, answers, approved, votes in per_author:
+        bump_user_stats(user_id, answers_given=-answers, approved_answers=-(approved or 0), net_votes=-(votes or 0))
+
+def serialize_user_stats(stats):
+    if stats is None:
+        return {name: 0 for name in COUNTERS + ('reputation',)}
+    return {
+        'questions_asked': stats.questions_asked,
+        'answers_given': stats.answers_given,
+        'approved_answers': stats.approved_answers,
+        'net_votes': stats.net_votes,
+        'reputation': stats.reputation
+    }
+
+def recompute_user_stats():
+    """Rebuild user_stats from questions and answers. Returns the row count."""
+    questions = select(func.count(Question.id)).where(Question.user_id == User.id).scalar_subquery()
+    answers = select(func.count(Answers.id)).where(Answers.user_id == User.id).scalar_subquery()
+    approved = select(func.count(Answers.id)) \
+        .where(Answers.user_id == User.id, Answers.is_approved.is_(True)).scalar_subquery()
+    votes = select(func.coalesce(func.sum(Answers.score), 0)).where(Answers.user_id == User.id).scalar_subquery()
+
+    rows = select(User.id, questions, answers, approved, votes).subquery()
+    db.session.query(UserStats).delete(synchronize_session=False)
+    db.session.execute(insert(UserStats).from_select(
+        ['user_id', *COUNTERS, 'reputation'],
+        select(*rows.c, reputation(*list(rows.c)[1:]))
+    ))
+    db.session.commit()
+    return db.session.query(func.count(UserStats.user_id)).scalar()
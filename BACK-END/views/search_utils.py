@@ -0,0 +1,212 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import bindparam, func, literal_column, or_
+from models import db, Question
+from .task_utils import submit_task
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'i',
+    'in', 'is', 'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with',
+}
+TITLE_WEIGHT = 2
+INDEX_MAX_AGE = 300  # seconds; reload to pick up writes from other workers
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if t not in _STOP_WORDS]
+
+def is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+# -------------------- Pure-Python fallback (SQLite) --------------------
+class InvertedIndex:
+    """In-process term -> {question_id: weighted term frequency} index.
+
+    Built from the questions table on the first search and kept in sync by
+    the question create/update/delete handlers. The index is per process:
+    writes served by another worker only show up here once the index is
+    older than INDEX_MAX_AGE. It is then rebuilt in the background while
+    searches keep using the current copy, so only the first search in a
+    process waits for a build.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._replay = []
+
+    @staticmethod
+    def _add_to(postings, doc_terms, question_id, title, description):
+        weights = defaultdict(int)
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            weights[term] += 1
+        for term, tf in weights.items():
+            postings[term][question_id] = tf
+        doc_terms[question_id] = set(weights)
+
+    def _add(self, question_id, title, description):
+        self._add_to(self.postings, self.doc_terms, question_id, title, description)
+
+    def _remove(self, question_id):
+        for term in self.doc_terms.pop(question_id, ()):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(question_id, None)
+                if not docs:
+                    del self.postings[term]
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def _build(self):
+        postings, doc_terms = defaultdict(dict), {}
+        rows = db.session.query(Question.id, Question.title, Question.description) \
+            .execution_options(yield_per=1000)
+        for question_id, title, description in rows:
+            self._add_to(postings, doc_terms, question_id, title, description)
+        return postings, doc_terms
+
+    def _rebuild(self):
+        try:
+            postings, doc_terms = self._build()
+            with self._lock:
+                self.postings, self.doc_terms = postings, doc_terms
+                # Writes made while the build was reading
+                for question_id, fields in self._replay:
+                    self._remove(question_id)
+                    if fields is not None:
+                        self._add(question_id, *fields)
+                self.loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._rebuilding, self._replay = False, []
+
+    def load(self):
+        if self.loaded:
+            if time.monotonic() - self.loaded_at >= INDEX_MAX_AGE:
+                with self._lock:
+                    if self._rebuilding:
+                        return
+                    self._rebuilding, self._replay = True, []
+                submit_task(self._rebuild)
+            return
+        with self._lock:
+            if not self.loaded:
+                self.postings, self.doc_terms = self._build()
+                self.loaded_at = time.monotonic()
+
+    def add(self, question_id, title, description):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(question_id)
+            self._add(question_id, title, description)
+            if self._rebuilding:
+                self._replay.append((question_id, (title, description)))
+
+    def remove(self, question_id):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(question_id)
+            if self._rebuilding:
+                self._replay.append((question_id, None))
+
+    def search(self, text):
+        """Return {question_id: score} for questions containing every term."""
+        self.load()
+        terms = set(tokenize(text))
+        if not terms:
+            return {}
+
+        with self._lock:
+            postings = [self.postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return {}
+            postings.sort(key=len)
+            total = len(self.doc_terms)
+            # idf once per term; walk the rarest term's postings and drop a
+            # question at the first term it lacks
+            (first, first_idf), *rest = [(docs, math.log(1 + total / len(docs))) for docs in postings]
+            scores = {}
+            for question_id, tf in first.items():
+                score = tf * first_idf
+                for docs, idf in rest:
+                    other = docs.get(question_id)
+                    if other is None:
+                        break
+                    score += other * idf
+                else:
+                    scores[question_id] = score
+        return scores
+
+question_index = InvertedIndex()
+
+# -------------------- Hooks for question writes --------------------
+def index_question(question):
+    if not is_postgres():
+        question_index.add(question.id, question.title, question.description)
+
+def unindex_question(question_id):
+    if not is_postgres():
+        question_index.remove(question_id)
+
+# -------------------- Query helper --------------------
+def apply_search(query, text):
+    """Full-text search over a Question query.
+
+    Returns (query, scores). On Postgres the query is restricted to matches
+    and ordered by ts_rank, and scores is None. Otherwise scores maps each
+    matching question id to its rank and the query is left as is: pass both
+    to top_ranked(), which applies them. Text made only of stop words and
+    punctuation has nothing to rank, so it falls back to a substring match
+    (scores None, no ordering applied).
+    """
+    if not tokenize(text):
+        return query.filter(or_(Question.title.ilike(f'%{text}%'),
+                                Question.description.ilike(f'%{text}%'))), None
+
+    if is_postgres():
+        ts_query = func.websearch_to_tsquery('english', text)
+        vector = literal_column('questions.search_vector')
+        query = query.filter(vector.op('@@')(ts_query)) \
+            .order_by(func.ts_rank_cd(vector, ts_query).desc())
+        return query, None
+
+    return query, question_index.search(text)
+
+def _rows(query, ids):
+    # Ids are rendered inline, so broad matches don't hit SQLite's bound-parameter limit
+    found = {q.id: q for q in query.filter(
+        Question.id.in_(bindparam('search_ids', ids, expanding=True, literal_execute=True))
+    )}
+    return [found[question_id] for question_id in ids if question_id in found]
+
+def top_ranked(query, scores, count=None):
+    """The count best-scoring matches that query allows, best first.
+
+    Ranks in memory with a heap and loads rows only for the best candidates,
+    widening the window when the query's other filters reject some of them.
+    Ties go to the newer question. count=None returns every match.
+    """
+    rank = lambda question_id: (scores[question_id], question_id)
+    if count is None:
+        return _rows(query, sorted(scores, key=rank, reverse=True)) if scores else []
+
+    window = max(count * 2, 100)
+    while True:
+        ids = heapq.nlargest(window, scores, key=rank)
+        rows = _rows(query, ids) if ids else []
+        if len(rows) >= count or window >= len(scores):
+            return rows[:count]
+        window *= 4
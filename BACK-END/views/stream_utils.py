@@ -0,0 +1,43 @@
+from flask import Response, current_app, request, stream_with_context
+
+# Rows fetched per round trip, and roughly how many bytes to buffer per chunk
+STREAM_BATCH_SIZE = 1000
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def wants_ndjson():
+    return request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+
+def stream_json(query, serialize):
+    """Stream a query as a JSON array, or NDJSON with ?format=ndjson.
+
+    Rows are fetched with yield_per (a server-side cursor on Postgres) and
+    written out as they arrive, so memory stays flat however big the table is.
+    """
+    dumps = current_app.json.dumps
+    ndjson = wants_ndjson()
+    rows = query.yield_per(STREAM_BATCH_SIZE)
+
+    def generate():
+        buffer = [] if ndjson else ['[']
+        size = 0
+        separator = '\n' if ndjson else ','
+        first = True
+        for row in rows:
+            item = dumps(serialize(row))
+            if not first:
+                buffer.append(separator)
+            buffer.append(item)
+            first = False
+            size += len(item)
+            if size >= STREAM_CHUNK_BYTES:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        if not ndjson:
+            buffer.append(']\n')
+        elif not first:
+            buffer.append('\n')
+        yield ''.join(buffer)
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
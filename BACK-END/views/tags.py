@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from models import db, Tags
+from .cache_utils import bump_version, cached_json_response
+from .question import filter_by_tags, question_list_response, visible_questions
 
 tags_bp = Blueprint('tags_bp', __name__, url_prefix='/api')
 
@@ -26,6 +28,7 @@ def create_tag():
     tag = Tags(name=name, type=type)
     db.session.add(tag)
     db.session.commit()
+    bump_version('tags')
 
     return jsonify({'message': 'Tag created', 'tag': serialize_tag(tag)}), 201
 
@@ -33,8 +36,9 @@ def create_tag():
 @tags_bp.route('/tags', methods=['GET'])
 @jwt_required()
 def get_all_tags():
-    tags = Tags.query.order_by(Tags.created_at.desc()).all()
-    return jsonify([serialize_tag(tag) for tag in tags]), 200
+    return cached_json_response(
+        'tags', lambda: [serialize_tag(tag) for tag in Tags.query.order_by(Tags.created_at.desc()).all()]
+    )
 
 # READ tag by id
 @tags_bp.route('/tags/<int:id>', methods=['GET'])
@@ -45,6 +49,15 @@ def get_tag(id):
         return jsonify({'message': 'Tag not found'}), 404
     return jsonify(serialize_tag(tag)), 200
 
+# READ questions carrying a tag: always a page of {questions, next_cursor}
+# (?limit= defaults to 20, at most 100; follow ?cursor= for more)
+@tags_bp.route('/tags/<int:id>/questions', methods=['GET'])
+@jwt_required()
+def get_tag_questions(id):
+    if not db.session.query(Tags.id).filter_by(id=id).first():
+        return jsonify({'message': 'Tag not found'}), 404
+    return question_list_response(filter_by_tags(visible_questions(), [id]), always_paginate=True)
+
 # UPDATE a tag
 @tags_bp.route('/tags/<int:id>', methods=['PUT'])
 @jwt_required()
@@ -58,6 +71,7 @@ def update_tag(id):
     tag.type = data.get('type', tag.type)
 
     db.session.commit()
+    bump_version('tags')
     return jsonify({'message': 'Tag updated', 'tag': serialize_tag(tag)}), 200
 
 # DELETE a tag
@@ -70,4 +84,5 @@ def delete_tag(id):
 
     db.session.delete(tag)
     db.session.commit()
+    bump_version('tags')
     return jsonify({'message': 'Tag deleted'}), 200
@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from extensions import db
+
+# Shared pool for work that should not hold up the HTTP response
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='moringadesk-task')
+_outstanding_lock = threading.Lock()
+_outstanding = 0
+
+def _task_done(future):
+    global _outstanding
+    with _outstanding_lock:
+        _outstanding -= 1
+
+def task_queue_depth():
+    """Tasks submitted and not yet finished, whether queued or running."""
+    return _outstanding
+
+def submit_task(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) in a background thread with its own app context.
+
+    Set TASKS_ALWAYS_EAGER in the app config to run tasks inline instead
+    (handy for the shell and for debugging).
+    """
+    app = current_app._get_current_object()
+    if app.config.get('TASKS_ALWAYS_EAGER'):
+        return fn(*args, **kwargs)
+
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Background task %s failed', getattr(fn, '__name__', fn))
+                raise
+
+    global _outstanding
+    with _outstanding_lock:
+        _outstanding += 1
+    try:
+        future = _executor.submit(run)
+    except Exception:
+        _task_done(None)
+        raise
+    # Also fires for cancelled futures, so the count can't leak
+    future.add_done_callback(_task_done)
+    return future
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from models import db, User
-from .auth import token_required  # fixed: relative import for Blueprint
+from sqlalchemy.orm import joinedload
+from models import db, User, UserStats
+from .auth import token_required, invalidate_cached_user  # fixed: relative import for Blueprint
+from .pagination_utils import DEFAULT_LIMIT, InvalidCursor, page_args, keyset_page
+from .reputation_utils import serialize_user_stats
+from .vote_utils import forget_user_votes
 
 user_bp = Blueprint('user', __name__, url_prefix='/api/users')
 
@@ -33,7 +37,27 @@ def get_user(current_user, user_id):
         'id': user.id,
         'username': user.username,
         'email': user.email,
-        'is_admin': user.is_admin
+        'is_admin': user.is_admin,
+        'stats': serialize_user_stats(db.session.get(UserStats, user.id))
+    }), 200
+
+# -------------------- Leaderboard --------------------
+# Reads user_stats only: one indexed range scan per page, no aggregation
+@user_bp.route('/leaderboard', methods=['GET'])
+@token_required
+def get_leaderboard(current_user):
+    try:
+        limit, cursor = page_args()
+        query = UserStats.query.options(joinedload(UserStats.user))
+        rows, next_cursor = keyset_page(
+            query, [UserStats.reputation, UserStats.user_id], limit or DEFAULT_LIMIT, cursor
+        )
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'users': [dict(serialize_user_stats(s), id=s.user_id, username=s.user.username) for s in rows],
+        'next_cursor': next_cursor
     }), 200
 
 # -------------------- Update User --------------------
@@ -51,6 +75,7 @@ def update_user(current_user, user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    invalidate_cached_user(user.id)
 
     return jsonify({
         'success': 'User updated successfully',
@@ -80,6 +105,7 @@ def activate_user(current_user, user_id):
 
     user.is_active = bool(is_active)
     db.session.commit()
+    invalidate_cached_user(user.id)
 
     status = 'activated' if user.is_active else 'deactivated'
     return jsonify({'success': f'User {user.username} {status} successfully', 'is_active': user.is_active}), 200
@@ -95,7 +121,10 @@ def delete_user(current_user, user_id):
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
+    # The votes go with the user (cascade); take them off the tallies first
+    forget_user_votes(user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_cached_user(user_id)
 
     return jsonify({'message': f'User {user.username} deleted successfully'}), 200
@@ -0,0 +1,40 @@
+from sqlalchemy import func, select, update
+from models import db, Votes, Answers
+from .ranking_utils import record_activity
+from .reputation_utils import bump_user_stats
+
+# Keep the denormalized tallies on Answers, the question's ranking and the author's stats in step with the votes table
+def adjust_tally(answer, vote_type, delta):
+    column = Answers.upvotes if vote_type == 'up' else Answers.downvotes
+    score_delta = delta if vote_type == 'up' else -delta
+    Answers.query.filter_by(id=answer.id).update({
+        column: column + delta,
+        Answers.score: Answers.score + score_delta
+    }, synchronize_session=False)
+    record_activity(answer.question_id, votes=score_delta, touch=False)
+    bump_user_stats(answer.user_id, net_votes=score_delta)
+
+def forget_user_votes(user_id):
+    """Take a user's votes off the tallies before the user (and so the votes) is deleted."""
+    rows = db.session.query(Votes.answer_id, Votes.vote_type, func.count()) \
+        .filter_by(user_id=user_id).group_by(Votes.answer_id, Votes.vote_type).all()
+    answers = {a.id: a for a in Answers.query.filter(Answers.id.in_({row[0] for row in rows}))} if rows else {}
+    for answer_id, vote_type, count in rows:
+        if answer_id in answers:
+            adjust_tally(answers[answer_id], vote_type, -count)
+
+def recompute_vote_tallies():
+    """Recount every answer's upvotes, downvotes and score from the votes table.
+
+    Run it before recompute_rankings() and recompute_user_stats(), which
+    sum Answers.score. Returns the number of answers processed.
+    """
+    def count(vote_type):
+        return select(func.count(Votes.id)) \
+            .where(Votes.answer_id == Answers.id, Votes.vote_type == vote_type).scalar_subquery()
+
+    total = db.session.execute(
+        update(Answers).values(upvotes=count('up'), downvotes=count('down'), score=count('up') - count('down'))
+    ).rowcount
+    db.session.commit()
+    return total
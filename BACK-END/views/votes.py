@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Votes, Answers, User, Notifications
+from models import db, Votes, Answers, User
+from .db_utils import dialect_insert
+from .notify_utils import add_notification
+from .stream_utils import stream_json
+from .vote_utils import adjust_tally
 
 votes_bp = Blueprint('votes_bp', __name__, url_prefix='/api')
 
@@ -18,7 +22,7 @@ def serialize_vote(vote):
 @jwt_required()
 def create_vote():
     data = request.get_json()
-    current_user = get_jwt_identity()
+    current_user = int(get_jwt_identity())
 
     answer_id = data.get('answer_id')
     vote_type = data.get('vote_type')
@@ -28,42 +32,67 @@ def create_vote():
     if not answer_id:
         return jsonify({'error': 'answer_id is required'}), 400
 
-    existing = Votes.query.filter_by(user_id=current_user, answer_id=answer_id).first()
+    answer = Answers.query.get(answer_id)
+    if not answer:
+        return jsonify({'error': 'Answer not found'}), 404
 
-    if existing:
-        if existing.vote_type == vote_type:
-            db.session.delete(existing)
-            db.session.commit()
-            return jsonify({'success': 'Vote removed'}), 200
-        else:
-            existing.vote_type = vote_type
-            db.session.commit()
-            return jsonify({'success': 'Vote updated', 'vote': serialize_vote(existing)}), 200
-    else:
-        vote = Votes(user_id=current_user, answer_id=answer_id, vote_type=vote_type)
-        db.session.add(vote)
+    # Each step is a single conditional statement, so concurrent clicks can't
+    # double count: whichever statement actually changes a row moves the tally.
+
+    # Same vote again -> remove it
+    removed = Votes.query.filter_by(
+        user_id=current_user, answer_id=answer_id, vote_type=vote_type
+    ).delete(synchronize_session=False)
+    if removed:
+        adjust_tally(answer, vote_type, -1)
+        db.session.commit()
+        return jsonify({'success': 'Vote removed'}), 200
+
+    # No vote yet -> insert, relying on the unique (user_id, answer_id) index
+    result = db.session.execute(
+        dialect_insert(Votes)
+        .values(user_id=current_user, answer_id=answer_id, vote_type=vote_type)
+        .on_conflict_do_nothing(index_elements=['user_id', 'answer_id'])
+    )
+    if result.rowcount:
+        vote = Votes(id=result.inserted_primary_key[0], user_id=current_user,
+                     answer_id=answer_id, vote_type=vote_type)
+        adjust_tally(answer, vote_type, 1)
 
         # Notify the owner of the answer
-        answer = Answers.query.get(answer_id)
-        if answer and answer.user_id != current_user:
+        if answer.user_id != current_user:
             voter = User.query.get(current_user)
             notif_msg = f'{voter.username} {vote_type}voted your answer.'
-            notification = Notifications(
+            add_notification(
                 user_id=answer.user_id,
                 type='vote',
                 message=notif_msg
             )
-            db.session.add(notification)
 
         db.session.commit()
         return jsonify({'success': 'Vote created', 'vote': serialize_vote(vote)}), 201
 
+    # Opposite vote exists -> flip it
+    flipped = Votes.query.filter(
+        Votes.user_id == current_user,
+        Votes.answer_id == answer_id,
+        Votes.vote_type != vote_type
+    ).update({Votes.vote_type: vote_type}, synchronize_session=False)
+    if flipped:
+        adjust_tally(answer, 'down' if vote_type == 'up' else 'up', -1)
+        adjust_tally(answer, vote_type, 1)
+
+    vote = Votes.query.filter_by(user_id=current_user, answer_id=answer_id).first()
+    db.session.commit()
+    if not vote:
+        return jsonify({'success': 'Vote removed'}), 200
+    return jsonify({'success': 'Vote updated', 'vote': serialize_vote(vote)}), 200
+
 # GET all votes
 @votes_bp.route('/votes', methods=['GET'])
 @jwt_required()
 def get_all_votes():
-    votes = Votes.query.all()
-    return jsonify([serialize_vote(v) for v in votes]), 200
+    return stream_json(Votes.query.order_by(Votes.id), serialize_vote)
 
 # GET vote by ID
 @votes_bp.route('/votes/<int:id>', methods=['GET'])
@@ -78,7 +107,7 @@ def get_vote(id):
 @votes_bp.route('/votes/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_vote(id):
-    current_user = get_jwt_identity()
+    current_user = int(get_jwt_identity())
     vote = Votes.query.get(id)
 
     if not vote:
@@ -91,16 +120,24 @@ def update_vote(id):
     if new_vote_type not in ['up', 'down']:
         return jsonify({'error': 'vote_type must be "up" or "down"'}), 400
 
-    vote.vote_type = new_vote_type
+    # Conditional, like create_vote: only the request that flips the row moves the tally
+    flipped = Votes.query.filter(Votes.id == id, Votes.vote_type != new_vote_type) \
+        .update({Votes.vote_type: new_vote_type}, synchronize_session=False)
+    if flipped:
+        adjust_tally(vote.answer, 'down' if new_vote_type == 'up' else 'up', -1)
+        adjust_tally(vote.answer, new_vote_type, 1)
     db.session.commit()
 
+    vote = Votes.query.get(id)
+    if not vote:
+        return jsonify({'error': 'Vote not found'}), 404
     return jsonify({'success': 'Vote updated', 'vote': serialize_vote(vote)}), 200
 
 # DELETE vote (owner only)
 @votes_bp.route('/votes/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_vote(id):
-    current_user = get_jwt_identity()
+    current_user = int(get_jwt_identity())
     vote = Votes.query.get(id)
 
     if not vote:
@@ -108,7 +145,14 @@ def delete_vote(id):
     if vote.user_id != current_user:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    db.session.delete(vote)
-    db.session.commit()
+    # Delete by (id, type) so the tally moves for the type actually removed,
+    # even if a concurrent request flipped the vote since it was read
+    answer = vote.answer
+    for vote_type in (vote.vote_type, 'down' if vote.vote_type == 'up' else 'up'):
+        if Votes.query.filter_by(id=id, vote_type=vote_type).delete(synchronize_session=False):
+            adjust_tally(answer, vote_type, -1)
+            db.session.commit()
+            return jsonify({'success': 'Vote deleted'}), 200
 
-    return jsonify({'success': 'Vote deleted'}), 200
+    db.session.commit()
+    return jsonify({'error': 'Vote not found'}), 404